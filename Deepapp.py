@@ -14,11 +14,26 @@ import hashlib
 import tkinter.font as tkFont
 from datetime import datetime, date
 
-# Tenta importar DeepFace e PIL
-try:
-    from deepface import DeepFace
+from core.embedding_store import EmbeddingStore
+from core.gallery import FaceGallery
+from core.ann_index import attach_index
+from core.pipeline import RecognitionPipeline
+from core.motion import MotionGate, gated, low_power_switch
+from core.tracking import FaceTracker
+from core.batch_embedding import BatchEmbedder
+from core.templates import build_person_template
+from core.frame_buffers import LetterboxCanvas, FaceRecord, letterbox_layout
+from core.metrics import StageMetrics, TimedCapture, draw_metrics_overlay, start_exporter
+from core.overlay import LabelSpriteCache, blend_sprite
+from core.multires import make_detection_proxy, scale_box, scale_point, crop_face, to_face_input
+from core.lazy_imports import LazyModule, module_available
+from core.live_gallery import person_id_from_filename
+
+# DeepFace (TensorFlow) e PIL são importados só no primeiro uso, para a tela de login abrir na hora
+if module_available("deepface"):
+    DeepFace = LazyModule("deepface.DeepFace")
     DEEPFACE_AVAILABLE = True
-except ImportError:
+else:
     DEEPFACE_AVAILABLE = False
     print("[AVISO GLOBAL] DeepFace não está instalado. Funcionalidades do DeepScan serão limitadas.")
     class DeepFacePlaceholder:
@@ -29,20 +44,12 @@ except ImportError:
     DeepFace = DeepFacePlaceholder()
 
 
-PIL_AVAILABLE = False
-PIL_Image = None
-PIL_ImageDraw = None
-PIL_ImageFont = None
-PIL_ImageTk = None
-try:
-    from PIL import Image as PIL_Image_Import, ImageDraw as PIL_ImageDraw_Import, ImageFont as PIL_ImageFont_Import, ImageTk as PIL_ImageTk_Import
-    PIL_AVAILABLE = True
-    PIL_Image = PIL_Image_Import
-    PIL_ImageDraw = PIL_ImageDraw_Import
-    PIL_ImageFont = PIL_ImageFont_Import
-    PIL_ImageTk = PIL_ImageTk_Import
-    print("[INFO GLOBAL] Pillow (PIL) está instalada.")
-except ImportError:
+PIL_AVAILABLE = module_available("PIL")
+PIL_Image = LazyModule("PIL.Image") if PIL_AVAILABLE else None
+PIL_ImageDraw = LazyModule("PIL.ImageDraw") if PIL_AVAILABLE else None
+PIL_ImageFont = LazyModule("PIL.ImageFont") if PIL_AVAILABLE else None
+PIL_ImageTk = LazyModule("PIL.ImageTk") if PIL_AVAILABLE else None
+if not PIL_AVAILABLE:
     print("[AVISO GLOBAL] Pillow (PIL) não está instalada. Suporte a caracteres especiais (acentos) no DeepScan pode ser limitado.")
 
 # --- Funções Auxiliares Globais ---
@@ -75,6 +82,8 @@ USER_DATA_ROOT_FOLDER = "UserData"
 DS_NOME_SUBPASTA_ROSTOS = "Rostos"
 DSC_SUBPASTA_FONTES = "Fontes"
 DS_PATH_ARQUIVO_INFOS_NOME = 'inforos.txt'
+DSC_NOME_ARQUIVO_CACHE_EMBEDDINGS = 'embeddings_cache.pkl'
+DSC_NOME_ARQUIVO_INDICE_ANN = 'ann_index.npz'
 
 
 # --- Variáveis de controle de thread ---
@@ -151,6 +160,8 @@ DS_COR_TEXTO_CONTADOR = (0, 165, 255)
 DS_COR_TEXTO_SAIR_MSG = (255, 255, 255)
 DS_COR_RETANGULO_CAPTURA = (102, 0, 235)
 DS_NOME_JANELA_CAPTURA = "Deep Save"
+DS_LADO_MAXIMO_DETECCAO = 480 # Haar roda numa cópia reduzida do frame
+DS_ARQUIVO_METRICAS = 'deepsave_metrics.prom' # Relativo à pasta do app ('.json' = JSON); None não exporta
 DS_MAX_FOTOS_POR_PESSOA = 5
 DS_ESCALA_FONTE_SAIR_MSG = 0.4
 DS_ESPESSURA_TEXTO_SAIR_MSG = 1
@@ -161,11 +172,11 @@ def ds_obter_proximo_id_pessoa_base_interno(path_rostos_conhecidos_usuario):
         return "001"
     arquivos_jpg = [f for f in os.listdir(path_rostos_conhecidos_usuario) if f.lower().endswith((".jpg", ".jpeg"))]
     if not arquivos_jpg: return "001"
-    pattern = re.compile(r"^(\d{3})")
+    pattern = re.compile(r"^(\d{3,})")
     ids_numericos = set()
     for nome_arquivo in arquivos_jpg:
         match = pattern.match(nome_arquivo)
-        if match and re.fullmatch(r"\d{3}(?: \(\d+\))?\.jpe?g$", nome_arquivo, re.IGNORECASE):
+        if match and re.fullmatch(r"\d{3,}(?: \(\d+\))?\.jpe?g$", nome_arquivo, re.IGNORECASE):
             ids_numericos.add(int(match.group(1)))
     if not ids_numericos: return "001"
     return f"{max(ids_numericos) + 1:03d}"
@@ -183,11 +194,15 @@ def ds_capturar_e_salvar_rosto_individual_interno(caminho_completo_imagem_a_salv
     rosto_salvo = False
     print(f"[DS] Preparando para salvar em: {os.path.basename(caminho_completo_imagem_a_salvar)}")
     cv2.namedWindow(DS_NOME_JANELA_CAPTURA)
+    DSC_METRICAS.reset(); exportador = start_exporter(DSC_METRICAS, get_resource_path(DS_ARQUIVO_METRICAS) if DS_ARQUIVO_METRICAS else None, DSC_INTERVALO_EXPORTACAO_METRICAS)
     while True:
-        ret, frame = cap.read()
+        t_cap = DSC_METRICAS.start(); ret, frame = cap.read(); DSC_METRICAS.stop("capture", t_cap)
         if not ret: print("[DS_ERRO] Nao foi possivel ler o frame da camera."); break
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        rostos = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(100, 100))
+        t_frame = DSC_METRICAS.start()
+        proxy, escala = make_detection_proxy(frame, DS_LADO_MAXIMO_DETECCAO); lado_min = max(20, int(100 / escala))
+        gray = cv2.cvtColor(proxy, cv2.COLOR_BGR2GRAY)
+        rostos = [scale_box(r, escala, frame.shape) for r in face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(lado_min, lado_min))]
+        DSC_METRICAS.stop("detect", t_frame)
         frame_display = frame.copy()
         cv2.putText(frame_display, "Q/E para Sair", (10, 20), DS_FONTE_TEXTO, DS_ESCALA_FONTE_SAIR_MSG, DS_COR_TEXTO_SAIR_MSG, DS_ESPESSURA_TEXTO_SAIR_MSG, cv2.LINE_AA)
         if len(rostos) > 0:
@@ -209,12 +224,15 @@ def ds_capturar_e_salvar_rosto_individual_interno(caminho_completo_imagem_a_salv
         else:
             inicio_tempo_deteccao = None
             cv2.putText(frame_display, "Procurando rosto...", (20, 50), DS_FONTE_TEXTO, 0.7, DS_COR_TEXTO_ALERTA, 2)
-        cv2.imshow(DS_NOME_JANELA_CAPTURA, frame_display)
+        if DSC_OVERLAY_METRICAS: draw_metrics_overlay(frame_display, DSC_METRICAS, ("capture", "detect", "imshow"), origin=(10, 80))
+        t_show = DSC_METRICAS.start(); cv2.imshow(DS_NOME_JANELA_CAPTURA, frame_display); DSC_METRICAS.stop("imshow", t_show)
+        DSC_METRICAS.stop("frame", t_frame); DSC_METRICAS.tick("display")
         key = cv2.waitKey(1) & 0xFF
         if key == ord('q') or key == ord('e'): print("[DS] Captura cancelada pelo usuario."); break
         try:
             if cv2.getWindowProperty(DS_NOME_JANELA_CAPTURA, cv2.WND_PROP_VISIBLE) < 1: print("[DS] Janela de captura fechada pelo usuario (X)."); break
         except cv2.error: print("[DS] Janela de captura nao encontrada, encerrando captura."); break
+    if exportador is not None: exportador.stop()
     cap.release(); cv2.destroyAllWindows(); [cv2.waitKey(1) for _ in range(5)]
     return rosto_salvo
 
@@ -351,7 +369,19 @@ DSC_FONTE_TEXTO_CV2 = cv2.FONT_HERSHEY_SIMPLEX; DSC_ESCALA_FONTE_CV2 = 0.55; DSC
 DSC_ESPESSURA_TEXTO_CV2 = 1; DSC_TAMANHO_FONTE_PILLOW = 18; DSC_TEXT_PADDING = 5
 DSC_PATH_FONTE_TTF_NOME = "arial.ttf"; DSC_NOME_JANELA_APP = "Deep Scan"
 DSC_LARGURA_JANELA_DESEJADA = 1280; DSC_ALTURA_JANELA_DESEJADA = int(DSC_LARGURA_JANELA_DESEJADA * 9 / 16)
+DSC_MAX_REPRESENTANTES_TEMPLATE = 2; DSC_TOP_K_REFINAMENTO_TEMPLATE = 3
+DSC_ARMAZENAMENTO_GALERIA = 'int8' # Embeddings na memória: 'float32', 'float16' ou 'int8' (core.quantization)
+DSC_BACKEND_INDICE_ANN = 'ivf'; DSC_TAMANHO_MINIMO_GALERIA_ANN = 5000
+DSC_WORKERS_INFERENCIA = 1; DSC_TAMANHO_FILA_INFERENCIA = 1
+# Portão de movimento: sem movimento nem rostos não detecta; parado por DSC_SEGUNDOS_ATE_OCIOSO a câmera cai para baixo consumo
+DSC_PORTAO_MOVIMENTO = True; DSC_SEGUNDOS_ATE_OCIOSO = 30.0; DSC_FPS_CAPTURA_OCIOSO = 2; DSC_RESOLUCAO_OCIOSO = (320, 240)
+DSC_LADO_MAXIMO_DETECCAO = 640 # Detecção numa cópia reduzida; recorte do frame original (0 = frame inteiro)
+DSC_METRICAS_ATIVAS = False; DSC_OVERLAY_METRICAS = False; DSC_INTERVALO_EXPORTACAO_METRICAS = 5.0 # Desligadas o custo é praticamente zero
+DSC_ARQUIVO_METRICAS = 'deepscan_metrics.prom'
+DSC_LIMIAR_IOU_RASTREIO = 0.3; DSC_MAX_FALHAS_RASTREIO = 5; DSC_SEGUNDOS_REVERIFICACAO_RASTREIO = 2.0
 DSC_CACHE_EMBEDDINGS_CONHECIDOS = []; DSC_CACHE_INFO_PESSOAS = {}; DSC_FONTE_PILLOW_OBJ = None; DSC_DEEPFACE_MODELS_LOADED = False
+DSC_CACHE_SPRITES_ROTULOS = LabelSpriteCache(max_entries=256) # Rótulos de nomes já rasterizados (texto, fonte, cor)
+DSC_METRICAS = StageMetrics(enabled=DSC_METRICAS_ATIVAS) # Histogramas por estágio do DeepScan e do DeepSave (um de cada vez)
 
 def dsc_carregar_informacoes_pessoas_interno(caminho_arquivo_infos_usuario_full, force_reload=False):
     if not force_reload and DSC_CACHE_INFO_PESSOAS: return DSC_CACHE_INFO_PESSOAS
@@ -378,19 +408,28 @@ def dsc_carregar_rostos_conhecidos_interno(DeepFace_instance_local, pasta_conten
     for nome_arquivo in os.listdir(pasta_contendo_imagens_rostos_usuario_full):
         caminho_completo = os.path.join(pasta_contendo_imagens_rostos_usuario_full, nome_arquivo)
         if os.path.isfile(caminho_completo) and nome_arquivo.lower().endswith(('.jpg', '.jpeg', '.png')):
-            match_id = re.match(r"(\d{3})", os.path.splitext(nome_arquivo)[0])
-            if not match_id: continue
-            nome_id_base_str = match_id.group(1).upper()
+            nome_id_base_str = person_id_from_filename(nome_arquivo) # Mesmo padrão de IDs (3+ dígitos) do app modular
+            if nome_id_base_str is None: continue
             if nome_id_base_str not in informacoes_pessoas: continue
-            if nome_id_base_str not in imagens_por_id_base or not re.search(r" \(\d+\)$", os.path.splitext(imagens_por_id_base[nome_id_base_str]['nome_arquivo'])[0]):
-                imagens_por_id_base[nome_id_base_str] = {'caminho': caminho_completo, 'nome_arquivo': nome_arquivo}
+            imagens_por_id_base.setdefault(nome_id_base_str, []).append({'caminho': caminho_completo, 'nome_arquivo': nome_arquivo}) # Todas as fotos formam o template
     if not imagens_por_id_base: return []
-    for nome_id, img_data in imagens_por_id_base.items():
-        try:
-            rep_list = DeepFace_instance_local.represent(img_path=img_data['caminho'], model_name=modelo_reconhecimento, detector_backend=modelo_deteccao, enforce_detection=True, align=True)
-            if rep_list and 'embedding' in rep_list[0]:
-                rostos_conhecidos_data_temp.append({"nome_id": nome_id, "embedding": rep_list[0]['embedding'], "dados_pessoa": informacoes_pessoas[nome_id]})
-        except Exception as e: print(f"[DSC_ERRO] Processando '{img_data['nome_arquivo']}' (ID: {nome_id}): {e}")
+    # Cache persistente em UserData/<usuario>/: só fotos novas ou alteradas passam pelo DeepFace.represent
+    caminho_cache = os.path.join(os.path.dirname(pasta_contendo_imagens_rostos_usuario_full), DSC_NOME_ARQUIVO_CACHE_EMBEDDINGS)
+    cache_embeddings = EmbeddingStore(caminho_cache, modelo_reconhecimento, modelo_deteccao)
+    def _representar(caminho_img):
+        rep_list = DeepFace_instance_local.represent(img_path=caminho_img, model_name=modelo_reconhecimento, detector_backend=modelo_deteccao, enforce_detection=True, align=True)
+        return rep_list[0]['embedding'] if rep_list and 'embedding' in rep_list[0] else None
+    for nome_id, fotos in imagens_por_id_base.items():
+        embeddings_pessoa = []
+        for img_data in fotos:
+            try:
+                embedding = cache_embeddings.get_or_compute(img_data['caminho'], _representar)
+                if embedding is not None: embeddings_pessoa.append(embedding)
+            except Exception as e: print(f"[DSC_ERRO] Processando '{img_data['nome_arquivo']}' (ID: {nome_id}): {e}")
+        if not embeddings_pessoa: continue
+        centroide, representantes = build_person_template(embeddings_pessoa, max_representatives=DSC_MAX_REPRESENTANTES_TEMPLATE, outlier_distance=DSC_LIMIAR_SIMILARIDADE)
+        rostos_conhecidos_data_temp.append({"nome_id": nome_id, "embedding": centroide, "representatives": representantes, "dados_pessoa": informacoes_pessoas[nome_id]})
+    cache_embeddings.prune(img_data['caminho'] for fotos in imagens_por_id_base.values() for img_data in fotos); cache_embeddings.save()
     DSC_CACHE_EMBEDDINGS_CONHECIDOS = rostos_conhecidos_data_temp
     if DSC_CACHE_EMBEDDINGS_CONHECIDOS: print(f"[DSC_INFO] {len(DSC_CACHE_EMBEDDINGS_CONHECIDOS)} embeddings carregados.")
     return DSC_CACHE_EMBEDDINGS_CONHECIDOS
@@ -412,14 +451,12 @@ def dsc_desenhar_informacoes_interno(frame, rosto_info, x, y, w, h, identificado
             except Exception as e: print(f"[DSC_AVISO] Falha ao carregar fonte TTF: {e}. Pillow usará padrão."); DSC_FONTE_PILLOW_OBJ = "error_load"
         else: print(f"[DSC_AVISO] Fonte TTF não encontrada. Pillow usará padrão."); DSC_FONTE_PILLOW_OBJ = "error_not_found"
     pillow_ok = False
-    if PIL_AVAILABLE and isinstance(DSC_FONTE_PILLOW_OBJ, PIL_ImageFont.FreeTypeFont) and PIL_Image and PIL_ImageDraw:
+    if PIL_AVAILABLE and isinstance(DSC_FONTE_PILLOW_OBJ, PIL_ImageFont.FreeTypeFont):
         try:
-            pil_img = PIL_Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)); draw = PIL_ImageDraw.Draw(pil_img)
-            try: text_bbox = draw.textbbox((0,0), nome_display, font=DSC_FONTE_PILLOW_OBJ)
-            except AttributeError: text_bbox = (0,0) + draw.textsize(nome_display, font=DSC_FONTE_PILLOW_OBJ)
-            y_text = y - (text_bbox[3] - text_bbox[1]) - DSC_TEXT_PADDING if y - (text_bbox[3] - text_bbox[1]) - DSC_TEXT_PADDING > DSC_TEXT_PADDING else y + h + DSC_TEXT_PADDING
-            draw.text((x, y_text), nome_display, font=DSC_FONTE_PILLOW_OBJ, fill=(cor_texto_nome[2], cor_texto_nome[1], cor_texto_nome[0]))
-            frame[:] = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGB2BGR); pillow_ok = True
+            # Sprite do nome rasterizado uma vez (LRU) e mesclado só na região do texto, sem copiar o frame inteiro
+            sprite = DSC_CACHE_SPRITES_ROTULOS.get(nome_display, DSC_FONTE_PILLOW_OBJ, cor_texto_nome)
+            y_text = y - sprite.height - DSC_TEXT_PADDING if y - sprite.height - DSC_TEXT_PADDING > DSC_TEXT_PADDING else y + h + DSC_TEXT_PADDING
+            blend_sprite(frame, sprite, x, y_text); pillow_ok = True
         except Exception as e: print(f"[DSC_AVISO] Erro ao desenhar com Pillow: {e}")
     if not pillow_ok:
         (tw, th), _ = cv2.getTextSize(nome_display, DSC_FONTE_TEXTO_CV2, DSC_ESCALA_FONTE_CV2, DSC_ESPESSURA_TEXTO_CV2)
@@ -438,8 +475,8 @@ def ds_identificar_arquivos_nao_atribuidos_geral(path_rostos, path_infos): # Sim
     nao_atribuidos = []
     for f_name in os.listdir(path_rostos):
         if f_name.lower().endswith((".jpg", ".jpeg")):
-            match = re.match(r"(\d{3})", f_name)
-            if not match or match.group(1) not in ids_em_inforos or not re.fullmatch(r"\d{3}(?: \(\d+\))?\.jpe?g$", f_name, re.IGNORECASE):
+            match = re.match(r"(\d{3,})", f_name)
+            if not match or match.group(1) not in ids_em_inforos or not re.fullmatch(r"\d{3,}(?: \(\d+\))?\.jpe?g$", f_name, re.IGNORECASE):
                 nao_atribuidos.append(f_name)
     return sorted(list(set(nao_atribuidos)))
 
@@ -455,7 +492,7 @@ def dsc_atribuir_fotos_pendentes_automaticamente(path_rostos, path_infos):
     ids_com_fotos_formatadas = set()
     if os.path.exists(path_rostos):
         for f_name in os.listdir(path_rostos):
-            match = re.match(r"(\d{3})(?: \(\d+\))?\.jpe?g$", f_name, re.IGNORECASE)
+            match = re.match(r"(\d{3,})(?: \(\d+\))?\.jpe?g$", f_name, re.IGNORECASE)
             if match: ids_com_fotos_formatadas.add(match.group(1))
     else: print(f"[DSC_AUTO] Pasta '{os.path.basename(path_rostos)}' não encontrada."); return
     ids_sem_fotos = sorted(list(ids_em_inforos - ids_com_fotos_formatadas), key=int, reverse=True)
@@ -481,6 +518,56 @@ def dsc_atribuir_fotos_pendentes_automaticamente(path_rostos, path_infos):
         if not nao_atribuidos: break
     print("[DSC_AUTO] Verificação finalizada.")
 
+def dsc_embedding_individual_interno(rosto_crop):
+    try:
+        emb_atual_list = DeepFace.represent(img_path=rosto_crop, model_name=DSC_MODELO_RECONHECIMENTO, detector_backend='skip', enforce_detection=False, align=False)
+        return emb_atual_list[0]['embedding'] if emb_atual_list and emb_atual_list[0].get('embedding') else None
+    except Exception as e_rep: print(f"[DSC_ERRO_REP] {e_rep}"); return None
+
+def dsc_escala_janela_interno(frame_orig):
+    # Fatores (x, y) do frame original para a área útil da LetterboxCanvas da janela
+    larg, alt, _off_x, _off_y = letterbox_layout(frame_orig.shape, DSC_LARGURA_JANELA_DESEJADA, DSC_ALTURA_JANELA_DESEJADA)
+    return larg / frame_orig.shape[1], alt / frame_orig.shape[0]
+
+def dsc_detectar_rostos_interno(frame_orig):
+    # Detecta numa cópia reduzida (DSC_LADO_MAXIMO_DETECCAO) e recorta/alinha do frame original em resolução total
+    proxy, escala = make_detection_proxy(frame_orig, DSC_LADO_MAXIMO_DETECCAO); deteccoes = []
+    for fi in DeepFace.extract_faces(img_path=proxy, detector_backend=DSC_MODELO_DETECCAO, enforce_detection=False, align=escala == 1.0):
+        if fi['confidence'] < 0.5: continue
+        area = fi['facial_area']; caixa = (area['x'], area['y'], area['w'], area['h'])
+        if escala == 1.0: deteccoes.append((caixa, fi['face'])); continue
+        caixa = scale_box(caixa, escala, frame_orig.shape)
+        rosto_crop = crop_face(frame_orig, caixa, scale_point(area.get('left_eye'), escala), scale_point(area.get('right_eye'), escala))
+        if rosto_crop.size > 0: deteccoes.append((caixa, to_face_input(rosto_crop)))
+    return deteccoes
+
+def dsc_processar_frame_interno(frame_orig, galeria, rastreador=None, embedder=None):
+    # Detecção + embedding + matching de um frame; roda nos workers do pipeline.
+    # Com rastreador, só trilhas novas/incertas (ou vencidas para reverificação) passam pelo DeepFace.represent.
+    # As caixas voltam na escala do frame_proc da janela, onde são desenhadas.
+    rostos_desenhar_cache = []
+    try:
+        t_etapa = DSC_METRICAS.start(); deteccoes = dsc_detectar_rostos_interno(frame_orig); DSC_METRICAS.stop("detect", t_etapa); esc_x, esc_y = dsc_escala_janela_interno(frame_orig)
+        if rastreador is not None:
+            with rastreador.lock: trilhas = rastreador.update([caixa for caixa, _ in deteccoes])
+        else: trilhas = [None] * len(deteccoes)
+        candidatos = [i for i, ((x,y,w,h_), rosto_crop) in enumerate(deteccoes) if galeria and rosto_crop.size > 0 and w > 0 and h_ > 0 and (rastreador is None or rastreador.needs_recognition(trilhas[i]))]
+        # Todos os rostos pendentes do frame numa única passada do modelo (ou um a um, sem embedder)
+        crops = [deteccoes[i][1] for i in candidatos]
+        t_etapa = DSC_METRICAS.start(); embeddings_crops = embedder.embed(crops) if embedder is not None else [dsc_embedding_individual_interno(c) for c in crops]; DSC_METRICAS.stop("embed", t_etapa)
+        pendentes = [i for i, emb in zip(candidatos, embeddings_crops) if emb is not None]; embeddings_frame = [emb for emb in embeddings_crops if emb is not None]; resultados = {}
+        # Todos os rostos pendentes comparados com toda a galeria num único produto matricial
+        t_etapa = DSC_METRICAS.start(); matches = galeria.match(embeddings_frame, DSC_LIMIAR_SIMILARIDADE) if galeria else []; DSC_METRICAS.stop("match", t_etapa)
+        for i, (melhor_match, dist) in zip(pendentes, matches):
+            resultados[i] = melhor_match
+            if rastreador is not None:
+                with rastreador.lock: rastreador.record_identity(trilhas[i], melhor_match, dist, DSC_LIMIAR_SIMILARIDADE)
+        for i, ((x,y,w,h_), _rosto) in enumerate(deteccoes):
+            info = trilhas[i].identity if rastreador is not None else resultados.get(i) # Identidade mais votada da trilha evita troca de nomes entre frames
+            rostos_desenhar_cache.append(FaceRecord(info or {}, int(x*esc_x), int(y*esc_y), int(w*esc_x), int(h_*esc_y), info is not None))
+    except Exception as e_ext: print(f"[DSC_ERRO_EXTRACT] {e_ext}")
+    return rostos_desenhar_cache
+
 def executar_reconhecimento_deep_scan(user_email):
     global DSC_DEEPFACE_MODELS_LOADED, DSC_CACHE_EMBEDDINGS_CONHECIDOS, DSC_CACHE_INFO_PESSOAS, DSC_FONTE_PILLOW_OBJ
     if not DEEPFACE_AVAILABLE: messagebox.showerror("DeepScan - Erro", "DeepFace não instalado."); return
@@ -493,69 +580,56 @@ def executar_reconhecimento_deep_scan(user_email):
             print("[DSC_INFO] Pré-carregando modelos DeepFace..."); DeepFace.build_model(DSC_MODELO_RECONHECIMENTO)
             DSC_DEEPFACE_MODELS_LOADED = True; print(f"[DSC_INFO] Modelo '{DSC_MODELO_RECONHECIMENTO}' pré-carregado.")
         except Exception as e: messagebox.showerror("DeepScan - Erro", f"Erro ao carregar modelos: {e}"); return
-    DSC_CACHE_INFO_PESSOAS.clear(); DSC_CACHE_EMBEDDINGS_CONHECIDOS.clear(); DSC_FONTE_PILLOW_OBJ = None # Reset caches por sessão
+    DSC_CACHE_INFO_PESSOAS.clear(); DSC_CACHE_EMBEDDINGS_CONHECIDOS.clear(); DSC_CACHE_SPRITES_ROTULOS.clear(); DSC_FONTE_PILLOW_OBJ = None # Reset caches por sessão
     infos_pessoas = dsc_carregar_informacoes_pessoas_interno(path_infos, force_reload=True)
     embeddings_conhecidos = dsc_carregar_rostos_conhecidos_interno(DeepFace, path_rostos, infos_pessoas, DSC_MODELO_DETECCAO, DSC_MODELO_RECONHECIMENTO, force_reload=True)
     if not embeddings_conhecidos:
         msg = "Nenhum rosto conhecido carregado." + ("\nNenhuma info de pessoa encontrada." if not infos_pessoas else "\nTodos serão 'Desconhecido'.")
         if not infos_pessoas: messagebox.showwarning("DeepScan - Sem Dados", msg); print(f"[DSC_CRÍTICO] {msg}"); return
         else: messagebox.showinfo("DeepScan - Atenção", msg); print(f"[DSC_AVISO] {msg}")
+    galeria = FaceGallery(embeddings_conhecidos, rerank_top_k=DSC_TOP_K_REFINAMENTO_TEMPLATE, id_key="nome_id", storage=DSC_ARMAZENAMENTO_GALERIA)
+    DSC_CACHE_EMBEDDINGS_CONHECIDOS = [] # Os vetores ficam só no armazenamento compacto da galeria
+    attach_index(galeria, DSC_BACKEND_INDICE_ANN, os.path.join(os.path.dirname(path_rostos), DSC_NOME_ARQUIVO_INDICE_ANN), min_size=DSC_TAMANHO_MINIMO_GALERIA_ANN)
     cap = cv2.VideoCapture(0)
     if not cap.isOpened(): messagebox.showerror("DeepScan - Erro", "Não foi possível abrir a webcam."); return
     cv2.namedWindow(DSC_NOME_JANELA_APP, cv2.WINDOW_NORMAL)
     try: cv2.resizeWindow(DSC_NOME_JANELA_APP, DSC_LARGURA_JANELA_DESEJADA, DSC_ALTURA_JANELA_DESEJADA)
     except: pass
     print(f"\n[DSC_INFO] Iniciando reconhecimento para '{user_email}'... Q/E para sair.")
-    frame_count = 0; process_every_n = 2; rostos_desenhar_cache = []; running = True
-    while running:
-        ret, frame_orig = cap.read();
-        if not ret: break
-        h_orig, w_orig = frame_orig.shape[:2]; ratio_orig = w_orig/h_orig if h_orig > 0 else 1.0
-        ratio_janela = DSC_LARGURA_JANELA_DESEJADA/DSC_ALTURA_JANELA_DESEJADA if DSC_ALTURA_JANELA_DESEJADA > 0 else 1.0
-        frame_display = np.zeros((DSC_ALTURA_JANELA_DESEJADA, DSC_LARGURA_JANELA_DESEJADA, 3), dtype=np.uint8)
-        off_x, off_y = 0,0
-        if abs(ratio_orig - ratio_janela) < 0.01: frame_proc = cv2.resize(frame_orig, (DSC_LARGURA_JANELA_DESEJADA, DSC_ALTURA_JANELA_DESEJADA))
-        elif ratio_orig > ratio_janela: new_h = int(DSC_LARGURA_JANELA_DESEJADA/ratio_orig); frame_proc = cv2.resize(frame_orig, (DSC_LARGURA_JANELA_DESEJADA, new_h)); off_y = (DSC_ALTURA_JANELA_DESEJADA - new_h)//2
-        else: new_w = int(DSC_ALTURA_JANELA_DESEJADA*ratio_orig); frame_proc = cv2.resize(frame_orig, (new_w, DSC_ALTURA_JANELA_DESEJADA)); off_x = (DSC_LARGURA_JANELA_DESEJADA - new_w)//2
-        
-        frame_para_desenhar = frame_proc.copy() # Desenha sobre a cópia do frame redimensionado
-
-        frame_count +=1
-        if frame_count % process_every_n == 0:
-            rostos_desenhar_cache.clear()
-            try:
-                faces_info = DeepFace.extract_faces(img_path=frame_proc, detector_backend=DSC_MODELO_DETECCAO, enforce_detection=False, align=True)
-                for face_info in faces_info:
-                    if face_info['confidence'] < 0.5: continue
-                    x,y,w,h_ = face_info['facial_area']['x'], face_info['facial_area']['y'], face_info['facial_area']['w'], face_info['facial_area']['h']
-                    rosto_crop = face_info['face']
-                    if rosto_crop.size == 0 or w == 0 or h_ == 0: rostos_desenhar_cache.append({'info':{},'x':x,'y':y,'w':w,'h':h_,'id':False}); continue
-                    if not embeddings_conhecidos: rostos_desenhar_cache.append({'info':{},'x':x,'y':y,'w':w,'h':h_,'id':False}); continue
-                    try:
-                        emb_atual_list = DeepFace.represent(img_path=rosto_crop, model_name=DSC_MODELO_RECONHECIMENTO, detector_backend='skip', enforce_detection=False, align=False)
-                        if not emb_atual_list or not emb_atual_list[0].get('embedding'): rostos_desenhar_cache.append({'info':{},'x':x,'y':y,'w':w,'h':h_,'id':False}); continue
-                        emb_atual = emb_atual_list[0]['embedding']; menor_dist = float('inf'); melhor_match = None; id_ok = False
-                        for emb_conhecido_data in embeddings_conhecidos:
-                            res = DeepFace.verify(img1_path=emb_atual, img2_path=emb_conhecido_data["embedding"], model_name=DSC_MODELO_RECONHECIMENTO, distance_metric='cosine', detector_backend='skip', align=False, enforce_detection=False)
-                            dist = res['distance']
-                            if dist < menor_dist and dist < DSC_LIMIAR_SIMILARIDADE: menor_dist=dist; melhor_match=emb_conhecido_data; id_ok=True
-                        rostos_desenhar_cache.append({'info':melhor_match if id_ok else {},'x':x,'y':y,'w':w,'h':h_,'id':id_ok})
-                    except Exception as e_rep: print(f"[DSC_ERRO_REP] {e_rep}"); rostos_desenhar_cache.append({'info':{},'x':x,'y':y,'w':w,'h':h_,'id':False})
-            except Exception as e_ext: print(f"[DSC_ERRO_EXTRACT] {e_ext}")
-        
-        for r_draw in rostos_desenhar_cache:
-            DSC_FONTE_PILLOW_OBJ = dsc_desenhar_informacoes_interno(frame_para_desenhar, r_draw['info'], r_draw['x'],r_draw['y'],r_draw['w'],r_draw['h'], r_draw['id'], DSC_PATH_FONTE_TTF_NOME, DSC_FONTE_PILLOW_OBJ)
-        
-        # Coloca o frame processado (com desenhos) de volta no frame_display (com barras pretas se necessário)
-        if abs(ratio_orig - ratio_janela) < 0.01: frame_display = frame_para_desenhar
-        else: frame_display[off_y : off_y+frame_para_desenhar.shape[0], off_x : off_x+frame_para_desenhar.shape[1]] = frame_para_desenhar
-
-        cv2.imshow(DSC_NOME_JANELA_APP, frame_display)
+    # Pipeline em estágios: thread de captura (sempre o frame mais novo), worker(s) de inferência e exibição aqui, na taxa da câmera
+    rastreador = FaceTracker(iou_threshold=DSC_LIMIAR_IOU_RASTREIO, max_misses=DSC_MAX_FALHAS_RASTREIO, reverify_seconds=DSC_SEGUNDOS_REVERIFICACAO_RASTREIO)
+    try: embedder = BatchEmbedder(DeepFace.build_model(DSC_MODELO_RECONHECIMENTO), fallback_fn=dsc_embedding_individual_interno)
+    except Exception as e: print(f"[DSC_AVISO] Embedding em lote indisponível: {e}"); embedder = None
+    DSC_METRICAS.reset(); exportador = start_exporter(DSC_METRICAS, get_resource_path(DSC_ARQUIVO_METRICAS) if DSC_ARQUIVO_METRICAS else None, DSC_INTERVALO_EXPORTACAO_METRICAS)
+    processar = lambda frame_orig: dsc_processar_frame_interno(frame_orig, galeria, rastreador, embedder)
+    portao = MotionGate(idle_after=DSC_SEGUNDOS_ATE_OCIOSO) if DSC_PORTAO_MOVIMENTO else None
+    pipeline = RecognitionPipeline(TimedCapture(cap, DSC_METRICAS), gated(processar, portao, rastreador) if portao else processar, num_workers=DSC_WORKERS_INFERENCIA, queue_size=DSC_TAMANHO_FILA_INFERENCIA)
+    if portao: portao.on_idle, portao.on_wake = low_power_switch(pipeline.grabber, DSC_FPS_CAPTURA_OCIOSO, DSC_RESOLUCAO_OCIOSO)
+    pipeline.start()
+    tela = LetterboxCanvas(DSC_LARGURA_JANELA_DESEJADA, DSC_ALTURA_JANELA_DESEJADA); ultimo_id_resultado = 0
+    running = True
+    while running and pipeline.is_running:
+        item = pipeline.wait_frame()
+        if item is not None:
+            _frame_id, frame_orig = item; t_frame = DSC_METRICAS.start()
+            # Redimensiona direto para a view da tela pré-alocada (já com as barras pretas): nenhum buffer novo por frame
+            frame_proc = tela.render(frame_orig)
+            id_resultado, rostos_desenhar_cache = pipeline.latest_results()
+            if id_resultado != ultimo_id_resultado: ultimo_id_resultado = id_resultado; DSC_METRICAS.tick("inference")
+            t_etapa = DSC_METRICAS.start()
+            for r in rostos_desenhar_cache or ():
+                DSC_FONTE_PILLOW_OBJ = dsc_desenhar_informacoes_interno(frame_proc, r.info, r.x, r.y, r.w, r.h, r.identified, DSC_PATH_FONTE_TTF_NOME, DSC_FONTE_PILLOW_OBJ)
+            DSC_METRICAS.stop("draw", t_etapa)
+            if DSC_OVERLAY_METRICAS: draw_metrics_overlay(tela.canvas, DSC_METRICAS, ("capture", "detect", "embed", "match", "draw", "imshow"), ("display", "inference"))
+            t_etapa = DSC_METRICAS.start(); cv2.imshow(DSC_NOME_JANELA_APP, tela.canvas); DSC_METRICAS.stop("imshow", t_etapa)
+            DSC_METRICAS.stop("frame", t_frame); DSC_METRICAS.tick("display")
         key = cv2.waitKey(1) & 0xFF
         if key == ord('q') or key == ord('e'): running=False; break
         try:
             if cv2.getWindowProperty(DSC_NOME_JANELA_APP, cv2.WND_PROP_VISIBLE) < 1: running=False; break
         except cv2.error: running=False; break
+    pipeline.stop()
+    if exportador is not None: exportador.stop()
     cap.release(); cv2.destroyAllWindows(); [cv2.waitKey(1) for _ in range(5)]
     print(f"[DSC_INFO] Recursos DeepScan liberados para '{user_email}'.")
 #===============================================================================
@@ -0,0 +1,71 @@
+#Benchmark de recall x latência dos índices ANN contra a busca exata
+#Uso (na raiz do projeto): python -m benchmarks.ann_benchmark --size 20000 --queries 500
+
+# -*- coding: utf-8 -*-
+import argparse
+import time
+
+import numpy as np
+
+from core import ann_index
+
+
+def _synthetic_gallery(size, dim, n_queries, noise, seed):
+    # Identidades aleatórias; consultas = identidade sorteada + ruído (outra "foto")
+    rng = np.random.default_rng(seed)
+    gallery = rng.standard_normal((size, dim)).astype(np.float32)
+    truth = rng.integers(0, size, n_queries)
+    queries = gallery[truth] + noise * rng.standard_normal((n_queries, dim)).astype(np.float32)
+    return gallery, queries
+
+
+def _run(index, queries, k, **search_kwargs):
+    latencies = []
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, found = index.search(query[np.newaxis, :], k, **search_kwargs)
+        latencies.append(time.perf_counter() - start)
+        ids[i] = found[0]
+    return ids, np.array(latencies) * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k e latência dos backends de core.ann_index")
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=1)
+    parser.add_argument("--noise", type=float, default=0.6)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    gallery, queries = _synthetic_gallery(args.size, args.dim, args.queries, args.noise, args.seed)
+    ids = np.arange(args.size)
+    print(f"Galeria sintética: {args.size} x {args.dim}, {args.queries} consultas, k={args.k}")
+    print(f"{'backend':<18}{'build (s)':>10}{'recall':>9}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+
+    exact = ann_index.create_index("exact", args.dim)
+    start = time.perf_counter(); exact.add(gallery, ids); build = time.perf_counter() - start
+    reference, lat = _run(exact, queries, args.k)
+    print(f"{'exact':<18}{build:>10.2f}{1.0:>9.3f}{np.percentile(lat, 50):>10.3f}{np.percentile(lat, 95):>10.3f}")
+
+    def _recall(found):
+        return np.mean([len(set(f) & set(r)) / args.k for f, r in zip(found, reference)])
+
+    ivf = ann_index.create_index("ivf", args.dim)
+    start = time.perf_counter(); ivf.add(gallery, ids); build = time.perf_counter() - start
+    for nprobe in args.nprobe:
+        found, lat = _run(ivf, queries, args.k, nprobe=nprobe)
+        print(f"{f'ivf nprobe={nprobe}':<18}{build:>10.2f}{_recall(found):>9.3f}{np.percentile(lat, 50):>10.3f}{np.percentile(lat, 95):>10.3f}")
+
+    if ann_index.HNSWLIB_AVAILABLE:
+        hnsw = ann_index.create_index("hnswlib", args.dim)
+        start = time.perf_counter(); hnsw.add(gallery, ids); build = time.perf_counter() - start
+        found, lat = _run(hnsw, queries, args.k)
+        print(f"{'hnswlib':<18}{build:>10.2f}{_recall(found):>9.3f}{np.percentile(lat, 50):>10.3f}{np.percentile(lat, 95):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+#Benchmark reprodutível do DeepScan: carga da galeria, latência por estágio, FPS e pico de memória
+#Uso (na raiz do projeto):
+#  python -m benchmarks.deepscan_benchmark --sizes 100 1000 10000 --frames 300
+#  python -m benchmarks.deepscan_benchmark --real --user-dir UserData/<usuario> --video gravacao.mp4
+
+# -*- coding: utf-8 -*-
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+
+import cv2
+import numpy as np
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+import config
+from benchmarks.stub_deepface import StubDeepFace, noisy_face
+from core import deepscan_logic
+from core.frame_buffers import FrameBuffer
+from core.tracking import box_iou
+
+STAGES = ("detect", "embed", "match", "draw", "frame")
+GALLERY_MARKER = ".benchmark_gallery.json"
+
+
+def build_synthetic_gallery(user_dir, size, photos, seed):
+    # Mesmo layout do DeepSave: Rostos/NNN.jpg, "NNN (k).jpg" e inforos.txt. Reaproveitado se já existir.
+    spec = {"size": size, "photos": photos, "seed": seed}
+    marker = os.path.join(user_dir, GALLERY_MARKER)
+    if os.path.exists(marker):
+        with open(marker, 'r', encoding='utf-8') as f:
+            if json.load(f) == spec:
+                return
+    shutil.rmtree(user_dir, ignore_errors=True)
+    faces_path = os.path.join(user_dir, config.DS_SUBFOLDER_FACES)
+    os.makedirs(faces_path)
+    rng = np.random.default_rng(seed)
+    width = max(3, len(str(size)))
+    with open(os.path.join(user_dir, config.DS_INFO_FILENAME), 'w', encoding='utf-8') as info:
+        info.write("# ID:Nome Completo,Sexo\n")
+        for identity in range(1, size + 1):
+            person_id = f"{identity:0{width}d}"
+            info.write(f"{person_id}:Pessoa {identity},N/A\n")
+            for k in range(photos):
+                filename = f"{person_id}.jpg" if k == 0 else f"{person_id} ({k}).jpg"
+                cv2.imwrite(os.path.join(faces_path, filename), noisy_face(identity, 64, rng))
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump(spec, f)
+
+
+def synthetic_frames(n_frames, gallery_size, faces_per_frame, unknown_ratio, resolution, seed):
+    # Rostos que se movem devagar e trocam de identidade de tempos em tempos (exercita o rastreador).
+    # Cada frame vem com a verdade: [(caixa, identidade ou None)].
+    rng = np.random.default_rng(seed)
+    width, height = resolution
+
+    def new_slot(i):
+        unknown = rng.random() < unknown_ratio
+        identity = int(rng.integers(gallery_size + 1, gallery_size * 2 + 2)) if unknown else int(rng.integers(1, gallery_size + 1))
+        size = int(rng.integers(height // 8, height // 4))
+        lane = width // faces_per_frame
+        return {
+            "identity": identity, "known": not unknown, "size": size,
+            "x": float(lane * i + rng.integers(0, max(1, lane - size))), "y": float(rng.integers(0, height - size)),
+            "vx": float(rng.normal(0, 2)), "vy": float(rng.normal(0, 2)), "ttl": int(rng.integers(30, 120))
+        }
+
+    slots = [new_slot(i) for i in range(faces_per_frame)]
+    for _ in range(n_frames):
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        truth = []
+        for i, slot in enumerate(slots):
+            slot["ttl"] -= 1
+            if slot["ttl"] <= 0:
+                slot = slots[i] = new_slot(i)
+            slot["x"] = min(max(0.0, slot["x"] + slot["vx"]), width - slot["size"] - 1)
+            slot["y"] = min(max(0.0, slot["y"] + slot["vy"]), height - slot["size"] - 1)
+            x, y, s = int(slot["x"]), int(slot["y"]), slot["size"]
+            frame[y:y + s, x:x + s] = noisy_face(slot["identity"], s, rng)
+            truth.append(((x, y, s, s), slot["identity"] if slot["known"] else None))
+        yield frame, truth
+
+
+def video_frames(path, limit):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Não foi possível abrir o vídeo: {path}")
+    count = 0
+    while count < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        count += 1
+        yield frame, None
+    cap.release()
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {name: [] for name in STAGES}
+
+    def wrap(self, name, fn):
+        samples = self.samples[name]
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                samples.append((time.perf_counter() - start) * 1000.0)
+        return timed
+
+    def percentiles(self):
+        report = {}
+        for name, values in self.samples.items():
+            if values:
+                p50, p95, p99 = np.percentile(values, [50, 95, 99])
+                report[name] = {"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3), "count": len(values)}
+        return report
+
+
+def _peak_rss_mb():
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return round(peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0, 1)
+
+
+def _reset_session():
+    for key in ("embeddings", "person_info", "embedding_store", "gallery", "embedder"):
+        deepscan_logic.SESSION_CACHE[key] = [] if key == "embeddings" else ({} if key == "person_info" else None)
+
+
+def _load_gallery(user_dir):
+    faces_path = os.path.join(user_dir, config.DS_SUBFOLDER_FACES)
+    info_path = os.path.join(user_dir, config.DS_INFO_FILENAME)
+    start = time.perf_counter()
+    person_info = deepscan_logic._load_person_info(info_path, force_reload=True)
+    entries = deepscan_logic._load_known_faces(faces_path, person_info, force_reload=True)
+    gallery = deepscan_logic._build_gallery(entries, os.path.join(user_dir, config.DSC_ANN_INDEX_FILENAME))
+    return gallery, time.perf_counter() - start
+
+
+def _accuracy(faces, truth, counts):
+    # Cada rosto verdadeiro casa com a caixa de maior IoU (> 0.5); desconhecido correto = None
+    for box, identity in truth:
+        counts["faces"] += 1
+        overlaps = [(box_iou(box, found_box), entry) for entry, found_box in faces]
+        best_iou, entry = max(overlaps, key=lambda item: item[0], default=(0.0, None))
+        if best_iou <= 0.5:
+            counts["missed"] += 1
+            continue
+        predicted = int(entry["person_id"]) if entry is not None else None
+        counts["correct"] += predicted == identity
+
+
+def run_case(options, gallery_size):
+    # Executado num processo próprio (spawn) para o pico de RSS ser só deste caso
+    if not options["real"]:
+        deepscan_logic.DeepFace = StubDeepFace()
+        deepscan_logic.DEEPFACE_AVAILABLE = True
+        # Os rostos sintéticos só são achados pelo detector do substituto
+        config.DSC_DETECTION_ENGINE = "deepface"
+    elif not deepscan_logic.DEEPFACE_AVAILABLE:
+        raise RuntimeError("DeepFace não instalado: rode sem --real para usar o modelo substituto.")
+    # Caches com nomes próprios: o benchmark nunca toca nos caches reais do usuário
+    config.DSC_EMBEDDING_CACHE_FILENAME = "benchmark_embeddings_cache.pkl"
+    config.DSC_ANN_INDEX_FILENAME = "benchmark_ann_index.npz"
+
+    if options["user_dir"]:
+        user_dir = options["user_dir"]
+    else:
+        user_dir = os.path.join(options["data_dir"], config.USER_DATA_ROOT_FOLDER, f"bench_{gallery_size}")
+        build_synthetic_gallery(user_dir, gallery_size, options["photos"], options["seed"])
+    for filename in (config.DSC_EMBEDDING_CACHE_FILENAME, config.DSC_ANN_INDEX_FILENAME):
+        path = os.path.join(user_dir, filename)
+        if os.path.exists(path):
+            os.remove(path)
+
+    deepscan_logic.DeepFace.build_model(config.DSC_RECOGNITION_MODEL)
+    _reset_session()
+    _gallery, cold_s = _load_gallery(user_dir)
+    _reset_session()
+    gallery, warm_s = _load_gallery(user_dir)
+
+    timer = StageTimer()
+    deepscan_logic._detect_faces = timer.wrap("detect", deepscan_logic._detect_faces)
+    gallery.match = timer.wrap("match", gallery.match)
+    embedder = deepscan_logic._get_embedder()
+    embedder.embed = timer.wrap("embed", embedder.embed)
+    draw = timer.wrap("draw", deepscan_logic._draw_face_info)
+    tracker = None if options["no_track"] else deepscan_logic._create_tracker()
+    buffer = FrameBuffer()
+
+    if options["video"]:
+        frames = video_frames(options["video"], options["frames"])
+    else:
+        frames = synthetic_frames(options["frames"], len(gallery) or 1, options["faces"], options["unknown_ratio"], options["resolution"], options["seed"])
+    counts = {"faces": 0, "correct": 0, "missed": 0}
+    processed = 0
+    start = time.perf_counter()
+    for frame, truth in frames:
+        frame_start = time.perf_counter()
+        faces = deepscan_logic._recognize_faces(frame, gallery, tracker, embedder)
+        display = buffer.copy(frame)
+        for entry, (x, y, w, h) in faces:
+            draw(display, entry, x, y, w, h, is_identified=entry is not None)
+        timer.samples["frame"].append((time.perf_counter() - frame_start) * 1000.0)
+        processed += 1
+        if truth is not None:
+            _accuracy(faces, truth, counts)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "gallery_size": len(gallery),
+        "photos": sum(entry.get("photo_count", 1) for entry in gallery.entries),
+        "model": "deepface" if options["real"] else "stub",
+        "ann_index": type(gallery.index).__name__ if gallery.index is not None else None,
+        "load_cold_s": round(cold_s, 3),
+        "load_warm_s": round(warm_s, 3),
+        "frames": processed,
+        "fps": round(processed / elapsed, 2) if elapsed > 0 else None,
+        "stages": timer.percentiles(),
+        "accuracy": round(counts["correct"] / counts["faces"], 4) if counts["faces"] else None,
+        "missed_faces": counts["missed"],
+        "peak_rss_mb": _peak_rss_mb()
+    }
+
+
+def _case_entry(options, gallery_size, results):
+    try:
+        results.put(run_case(options, gallery_size))
+    except Exception as e:
+        results.put({"gallery_size": gallery_size, "error": str(e)})
+
+
+def _print_report(reports):
+    print(f"\n{'galeria':>8}{'carga fria s':>14}{'carga quente s':>16}{'FPS':>8}{'acerto':>8}{'pico MB':>9}  índice")
+    for r in reports:
+        if "error" in r:
+            print(f"{r['gallery_size']:>8}  ERRO: {r['error']}")
+            continue
+        accuracy = f"{r['accuracy']:.3f}" if r["accuracy"] is not None else "-"
+        peak = r["peak_rss_mb"] if r["peak_rss_mb"] is not None else "-"
+        print(f"{r['gallery_size']:>8}{r['load_cold_s']:>14.2f}{r['load_warm_s']:>16.2f}{r['fps']:>8.1f}{accuracy:>8}{peak:>9}  {r['ann_index'] or 'exato'}")
+    print(f"\n{'galeria':>8}  {'estágio':<8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'amostras':>10}")
+    for r in reports:
+        for name, stats in r.get("stages", {}).items():
+            print(f"{r['gallery_size']:>8}  {name:<8}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}{stats['count']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do DeepScan com galerias sintéticas e modelo substituto")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Identidades por galeria (100 a 100000)")
+    parser.add_argument("--photos", type=int, default=1, help="Fotos por identidade")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--faces", type=int, default=3, help="Rostos por frame sintético")
+    parser.add_argument("--unknown-ratio", type=float, default=0.2)
+    parser.add_argument("--resolution", default="1280x720")
+    parser.add_argument("--video", help="Reproduz um vídeo gravado em vez de frames sintéticos")
+    parser.add_argument("--user-dir", help="Usa uma galeria existente (Rostos/ + inforos.txt) em vez da sintética")
+    parser.add_argument("--real", action="store_true", help="Usa o DeepFace instalado (exige --user-dir com rostos reais)")
+    parser.add_argument("--no-track", action="store_true")
+    parser.add_argument("--data-dir", default=os.path.join("build", "benchmark_data"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Grava o relatório completo neste arquivo")
+    args = parser.parse_args()
+
+    if args.real and not args.user_dir:
+        parser.error("--real exige --user-dir: o modelo real não detecta os rostos sintéticos.")
+    options = {
+        "real": args.real, "user_dir": args.user_dir, "data_dir": args.data_dir, "photos": max(1, args.photos),
+        "frames": args.frames, "faces": max(1, args.faces), "unknown_ratio": args.unknown_ratio,
+        "resolution": tuple(int(v) for v in args.resolution.lower().split("x")), "video": args.video,
+        "no_track": args.no_track, "seed": args.seed
+    }
+    sizes = [None] if args.user_dir else args.sizes
+    ctx = multiprocessing.get_context("spawn")
+    reports = []
+    for size in sizes:
+        print(f"[BENCH] Galeria {'de ' + args.user_dir if size is None else str(size) + ' identidades'}...", file=sys.stderr)
+        results = ctx.Queue()
+        process = ctx.Process(target=_case_entry, args=(options, size, results))
+        process.start()
+        reports.append(results.get())
+        process.join()
+
+    _print_report(reports)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"options": options, "results": reports}, f, indent=2, ensure_ascii=False)
+    return 0 if all("error" not in r for r in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
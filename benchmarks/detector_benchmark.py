@@ -0,0 +1,118 @@
+#Compara os detectores de rosto: DeepFace.extract_faces contra YuNet, SSD e Haar nativos do OpenCV
+#Mede o caminho completo do DeepScan (_detect_faces: proxy, detecção, recorte alinhado).
+#Uso (na raiz do projeto): python -m benchmarks.detector_benchmark --images UserData --sizes 640 1280
+#Os modelos YuNet/SSD precisam estar em Modelos/ (ver config.DET_*); os ausentes são pulados.
+
+# -*- coding: utf-8 -*-
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+import config
+import utils
+from core import deepscan_logic
+from core.face_detection import DETECTION_ENGINES, get_face_detector
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def _load_images(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(f for f in glob.glob(os.path.join(path, "**", "*"), recursive=True) if f.lower().endswith(IMAGE_EXTENSIONS))
+        elif os.path.isfile(path):
+            files.append(path)
+    images = [cv2.imread(f) for f in sorted(files)]
+    return [img for img in images if img is not None]
+
+
+def _resize_long_side(image, size):
+    h, w = image.shape[:2]
+    factor = size / float(max(h, w))
+    return cv2.resize(image, (max(1, int(round(w * factor))), max(1, int(round(h * factor)))), interpolation=cv2.INTER_AREA if factor < 1 else cv2.INTER_LINEAR)
+
+
+def _iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def _available_engines(requested):
+    engines = []
+    for engine in requested:
+        if engine == "deepface":
+            if deepscan_logic.DEEPFACE_AVAILABLE:
+                engines.append(engine)
+            else:
+                print("Pulando 'deepface': biblioteca não instalada.")
+        elif get_face_detector(engine) is not None:
+            engines.append(engine)
+        else:
+            print(f"Pulando '{engine}': modelo não encontrado em {utils.get_resource_path(config.DET_SUBFOLDER_MODELS)}.")
+    return engines
+
+
+def _run_engine(engine, frames, repeats, max_side):
+    settings = (engine, max_side, deepscan_logic._candidate_confidence(engine))
+    deepscan_logic._detect_faces(frames[0], *settings)
+    latencies, boxes = [], []
+    for repeat in range(repeats):
+        for frame in frames:
+            started = time.perf_counter()
+            detections = deepscan_logic._detect_faces(frame, *settings)
+            latencies.append(time.perf_counter() - started)
+            if repeat == 0:
+                boxes.append([box for box, _ in detections])
+    return np.array(latencies) * 1000.0, boxes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência e concordância dos detectores de rosto")
+    parser.add_argument("--images", nargs="*", default=[], help="Fotos ou pastas (padrão: fotos cadastradas em UserData)")
+    parser.add_argument("--engines", nargs="+", default=["deepface", *DETECTION_ENGINES])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[640, 1280], help="Lado maior das imagens testadas")
+    parser.add_argument("--limit", type=int, default=100, help="Máximo de imagens")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--max-side", type=int, default=config.DSC_DETECTION_MAX_SIDE, help="DSC_DETECTION_MAX_SIDE usado no teste")
+    args = parser.parse_args()
+
+    images = _load_images(args.images or [utils.get_resource_path(config.USER_DATA_ROOT_FOLDER)])[:args.limit]
+    timing_only = not images
+    if timing_only:
+        # Sem fotos: ruído (ninguém detecta nada), vale só a coluna de tempo
+        print("Nenhuma foto encontrada: usando frames de ruído, só o tempo é comparável.")
+        images = [np.random.default_rng(i).integers(0, 256, (720, 1280, 3), dtype=np.uint8) for i in range(10)]
+    engines = _available_engines(args.engines)
+    if not engines:
+        print("Nenhum detector disponível.")
+        return 1
+
+    print(f"{len(images)} imagens, referência de concordância: '{engines[0]}', proxy de detecção {args.max_side}px")
+    print(f"{'tamanho':>8}  {'detector':<9}{'p50 ms':>9}{'p95 ms':>9}{'rostos':>8}{'concord.':>10}")
+    for size in args.sizes:
+        frames = [_resize_long_side(img, size) for img in images]
+        reference = None
+        for engine in engines:
+            latencies, boxes = _run_engine(engine, frames, args.repeats, args.max_side)
+            if reference is None:
+                reference = boxes
+            matched = sum(any(_iou(r, b) >= 0.5 for b in found) for ref, found in zip(reference, boxes) for r in ref)
+            total_ref = sum(len(ref) for ref in reference)
+            agreement = f"{matched / total_ref:>10.3f}" if total_ref and not timing_only else f"{'-':>10}"
+            print(f"{size:>8}  {engine:<9}{np.percentile(latencies, 50):>9.2f}{np.percentile(latencies, 95):>9.2f}{sum(len(b) for b in boxes):>8}{agreement}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#Verifica que o laço de exibição do DeepScan não aloca buffers de frame a cada iteração
+#Uso (na raiz do projeto): python -m benchmarks.frame_alloc_check --frames 300
+
+# -*- coding: utf-8 -*-
+import argparse
+import sys
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from core.frame_buffers import LetterboxCanvas, FaceRecord, letterbox_layout
+
+
+def _legacy_frame(frame, records, width, height):
+    # Laço antigo: resize novo, tela np.zeros nova e dict por rosto a cada frame
+    view_w, view_h, off_x, off_y = letterbox_layout(frame.shape, width, height)
+    frame_proc = cv2.resize(frame, (view_w, view_h))
+    for r in records:
+        cv2.rectangle(frame_proc, (r['x'], r['y']), (r['x'] + r['w'], r['y'] + r['h']), (0, 255, 0), 2)
+    canvas = np.zeros((height, width, 3), dtype=np.uint8)
+    canvas[off_y:off_y + view_h, off_x:off_x + view_w] = frame_proc
+    return canvas
+
+
+def _pooled_frame(canvas, frame, records):
+    view = canvas.render(frame)
+    for r in records:
+        cv2.rectangle(view, (r.x, r.y), (r.x + r.w, r.y + r.h), (0, 255, 0), 2)
+    return canvas.canvas
+
+
+def _measure(step, frames):
+    # Pico alocado acima do uso corrente em cada iteração (rotatividade por frame) e o uso residual
+    churn = []
+    tracemalloc.start()
+    for frame in frames:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        step(frame)
+        _, peak = tracemalloc.get_traced_memory()
+        churn.append(peak - base)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return np.array(churn), current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Alocações por frame do laço de exibição (antigo x buffers reaproveitados)")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--source", default="1920x1080", help="Resolução simulada da câmera (LxA)")
+    parser.add_argument("--faces", type=int, default=3)
+    parser.add_argument("--limit-kb", type=float, default=64.0, help="Rotatividade máxima aceita por frame no modo reaproveitado")
+    args = parser.parse_args()
+
+    src_w, src_h = (int(v) for v in args.source.lower().split("x"))
+    rng = np.random.default_rng(0)
+    pool = [rng.integers(0, 255, (src_h, src_w, 3), dtype=np.uint8) for _ in range(4)]
+    frames = [pool[i % len(pool)] for i in range(args.frames)]
+
+    dict_records = [{'info': {}, 'x': 100 + 200 * i, 'y': 150, 'w': 120, 'h': 150, 'id': False} for i in range(args.faces)]
+    slot_records = [FaceRecord({}, 100 + 200 * i, 150, 120, 150, False) for i in range(args.faces)]
+    canvas = LetterboxCanvas(args.width, args.height)
+    _pooled_frame(canvas, frames[0], slot_records) # Primeira chamada define o layout
+
+    legacy, _ = _measure(lambda f: _legacy_frame(f, dict_records, args.width, args.height), frames)
+    pooled, residual = _measure(lambda f: _pooled_frame(canvas, f, slot_records), frames)
+
+    print(f"{'laço':<16}{'média KB/frame':>16}{'máx KB/frame':>14}{'MB/s a 30 FPS':>16}")
+    for name, churn in (("antigo", legacy), ("reaproveitado", pooled)):
+        print(f"{name:<16}{churn.mean() / 1024:>16.1f}{churn.max() / 1024:>14.1f}{churn.mean() * 30 / 2 ** 20:>16.1f}")
+    print(f"Memória residual após {args.frames} frames (reaproveitado): {residual / 1024:.1f} KB")
+
+    # Estável = nenhum frame aloca mais que o limite e a segunda metade não cresce em relação à primeira
+    half = len(pooled) // 2
+    flat = pooled.max() <= args.limit_kb * 1024 and pooled[half:].mean() <= pooled[:half].mean() + 1024
+    print("OK: alocações por frame estáveis." if flat else "FALHA: o laço reaproveitado ainda aloca por frame.")
+    return 0 if flat else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#Relatório de memória, velocidade e acurácia da galeria em float32, float16 e int8
+#Uso (na raiz do projeto): python -m benchmarks.gallery_quantization --sizes 1000 10000 50000
+#                          python -m benchmarks.gallery_quantization --sizes 20000 --backend ivf
+
+# -*- coding: utf-8 -*-
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import config
+from core.ann_index import attach_index
+from core.gallery import FaceGallery
+from core.quantization import STORAGE_DTYPES
+from core.templates import build_person_template
+
+
+def _synthetic_entries(size, dim, photos, rng):
+    # Cada identidade é um vetor aleatório; as fotos são a identidade + ruído, como no cadastro
+    centers = rng.standard_normal((size, dim)).astype(np.float32)
+    entries = []
+    for person, center in enumerate(centers):
+        embeddings = center + 0.6 * rng.standard_normal((photos, dim)).astype(np.float32)
+        centroid, representatives = build_person_template(
+            embeddings, max_representatives=config.DSC_TEMPLATE_MAX_REPRESENTATIVES, outlier_distance=config.DSC_SIMILARITY_THRESHOLD
+        )
+        entries.append({"person_id": f"{person + 1:03d}", "embedding": centroid, "representatives": representatives, "person_data": (f"Pessoa {person + 1}", "N/A")})
+    return centers, entries
+
+
+def _synthetic_queries(centers, n_queries, impostor_rate, rng):
+    # Fotos novas de pessoas cadastradas (ruído variado, algumas perto do limiar) e de desconhecidos
+    size, dim = centers.shape
+    truth = rng.integers(0, size, n_queries)
+    impostor = rng.random(n_queries) < impostor_rate
+    base = np.where(impostor[:, np.newaxis], rng.standard_normal((n_queries, dim)), centers[truth]).astype(np.float32)
+    noise = rng.uniform(0.5, 1.1, (n_queries, 1)).astype(np.float32)
+    queries = base + noise * rng.standard_normal((n_queries, dim)).astype(np.float32)
+    expected = [None if is_impostor else f"{person + 1:03d}" for person, is_impostor in zip(truth, impostor)]
+    return queries, expected
+
+
+def _legacy_list_bytes(entries):
+    # Custo das mesmas entradas guardadas como listas de floats do Python (formato antigo)
+    vector_list = [0.0] * 512
+    per_vector = sys.getsizeof(vector_list) + 512 * sys.getsizeof(1.5)
+    vectors = sum(1 + (len(e["representatives"]) if e["representatives"] is not None else 0) for e in entries)
+    return vectors * per_vector
+
+
+def _time_matches(gallery, queries, batch, repeats):
+    latencies = []
+    for start in range(0, min(len(queries), repeats * batch), batch):
+        chunk = queries[start:start + batch]
+        started = time.perf_counter()
+        gallery.match(chunk, config.DSC_SIMILARITY_THRESHOLD)
+        latencies.append(time.perf_counter() - started)
+    return np.array(latencies) * 1000.0
+
+
+def _decisions(gallery, queries):
+    results = gallery.match(queries, config.DSC_SIMILARITY_THRESHOLD)
+    return [entry["person_id"] if entry is not None else None for entry, _ in results], np.array([d for _, d in results])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Galeria compacta (float16/int8) contra float32")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--photos", type=int, default=3, help="Fotos por pessoa no cadastro")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--impostors", type=float, default=0.3, help="Fração de consultas de pessoas não cadastradas")
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 8], help="Rostos por chamada de match (por frame)")
+    parser.add_argument("--repeats", type=int, default=200, help="Chamadas cronometradas por tamanho de lote")
+    parser.add_argument("--backend", default=None, help="Índice ANN a anexar ('ivf', 'exact', 'hnswlib'); padrão: busca exata")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"Limiar de distância: {config.DSC_SIMILARITY_THRESHOLD}  |  índice: {args.backend or 'nenhum (busca exata)'}")
+    if args.backend == "ivf":
+        # O k-means do IVF treina sobre os vetores já compactados: as listas mudam um pouco e a
+        # coluna "igual f32" mistura a aproximação do índice com a da quantização
+        print("Obs.: com IVF compare a coluna de acurácia; 'igual f32' inclui a variação das listas do índice.")
+    for size in args.sizes:
+        centers, entries = _synthetic_entries(size, args.dim, args.photos, rng)
+        queries, expected = _synthetic_queries(centers, args.queries, args.impostors, rng)
+        print(f"\nGaleria: {size} pessoas x {args.dim} dims, {args.queries} consultas ({args.impostors:.0%} desconhecidos)")
+        print(f"  listas Python (formato antigo): {_legacy_list_bytes(entries) / 2 ** 20:.1f} MB")
+        header = f"  {'armazenamento':<14}{'MB':>8}{'MB índice':>11}{'montagem (s)':>14}"
+        header += "".join(f"{f'p50 lote {b} (ms)':>18}{f'p95 lote {b} (ms)':>18}" for b in args.batch)
+        header += f"{'acurácia':>10}{'igual f32':>11}{'máx Δdist':>11}"
+        print(header)
+
+        reference_ids, reference_dist = None, None
+        for storage in STORAGE_DTYPES:
+            started = time.perf_counter()
+            gallery = FaceGallery(entries, rerank_top_k=config.DSC_TEMPLATE_RERANK_TOP_K, storage=storage)
+            if args.backend:
+                attach_index(gallery, args.backend, None, min_size=1, **config.DSC_ANN_PARAMS)
+            build = time.perf_counter() - started
+            gallery.match(queries[:1], config.DSC_SIMILARITY_THRESHOLD)
+
+            timings = [_time_matches(gallery, queries, batch, args.repeats) for batch in args.batch]
+            found, distances = _decisions(gallery, queries)
+            if reference_ids is None:
+                reference_ids, reference_dist = found, distances
+            accuracy = np.mean([f == e for f, e in zip(found, expected)])
+            agreement = np.mean([f == r for f, r in zip(found, reference_ids)])
+            max_delta = float(np.max(np.abs(distances - reference_dist)))
+
+            index_bytes = sum(a.nbytes for a in gallery.index.to_arrays().values()) if gallery.index is not None else 0
+            line = f"  {storage:<14}{gallery.nbytes / 2 ** 20:>8.1f}{index_bytes / 2 ** 20:>11.1f}{build:>14.2f}"
+            line += "".join(f"{np.percentile(lat, 50):>18.3f}{np.percentile(lat, 95):>18.3f}" for lat in timings)
+            line += f"{accuracy:>10.4f}{agreement:>11.4f}{max_delta:>11.5f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#Verifica o custo de importação até a tela de login (python -X importtime num processo novo)
+#Falha se algum módulo pesado entrar no caminho do login ou se o tempo passar do orçamento.
+#Uso (na raiz do projeto): python -m benchmarks.import_budget
+#                          python -m benchmarks.import_budget --target Deepapp --budget-ms 600
+
+# -*- coding: utf-8 -*-
+import argparse
+import os
+import subprocess
+import sys
+
+# Nenhum destes pode ser importado só para mostrar o login
+FORBIDDEN = {
+    "main": ("deepface", "tensorflow", "keras", "cv2", "numpy", "PIL", "google.genai", "gui.main_window", "core.deepscan_logic"),
+    # O monolito usa OpenCV/NumPy em constantes de módulo e no núcleo compartilhado: só DeepFace, PIL e Gemini ficam de fora
+    "Deepapp": ("deepface", "tensorflow", "keras", "PIL", "google.genai")
+}
+DEFAULT_BUDGET_MS = {"main": 150.0, "Deepapp": 600.0}
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _measure(target):
+    # Retorna {módulo: tempo cumulativo em µs} de uma importação a frio do alvo
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao importar '{target}':\n{result.stderr[-2000:]}")
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative_us)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orçamento de importação da tela de login")
+    parser.add_argument("--target", default="main", choices=sorted(FORBIDDEN), help="Módulo de entrada a importar")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Tempo máximo de importação do alvo")
+    parser.add_argument("--runs", type=int, default=5, help="Repetições (vale a menor, para descontar ruído)")
+    parser.add_argument("--top", type=int, default=10, help="Quantos módulos mais caros listar")
+    args = parser.parse_args()
+    budget_ms = args.budget_ms if args.budget_ms is not None else DEFAULT_BUDGET_MS[args.target]
+
+    runs = [_measure(args.target) for _ in range(max(1, args.runs))]
+    best = min(runs, key=lambda modules: modules.get(args.target, 0))
+    total_ms = best.get(args.target, 0) / 1000.0
+
+    # Só os pacotes de nível de cima (e os módulos do projeto) para a lista não repetir submódulos
+    top_level = {name: us for name, us in best.items() if "." not in name or name.split(".")[0] in ("gui", "core", "services")}
+    print(f"Importação de '{args.target}': {total_ms:.1f} ms (orçamento {budget_ms:.0f} ms, melhor de {len(runs)})")
+    for name, us in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000.0:>8.1f} ms  {name}")
+
+    leaked = sorted({
+        name for modules in runs for name in modules
+        for forbidden in FORBIDDEN[args.target] if name == forbidden or name.startswith(forbidden + ".")
+    })
+    ok = True
+    if leaked:
+        ok = False
+        print("FALHA: módulos pesados importados antes do login: " + ", ".join(leaked[:15]))
+    if total_ms > budget_ms:
+        ok = False
+        print(f"FALHA: {total_ms:.1f} ms acima do orçamento de {budget_ms:.0f} ms.")
+    if ok:
+        print("OK: login dentro do orçamento de importação.")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
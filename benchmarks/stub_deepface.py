@@ -0,0 +1,92 @@
+#Substituto determinístico do DeepFace para benchmarks sem pesos de modelo
+#Rostos sintéticos são padrões de blocos coloridos por identidade sobre fundo preto;
+#o "detector" acha as regiões não pretas e o "modelo" é uma projeção aleatória fixa.
+
+# -*- coding: utf-8 -*-
+import cv2
+import numpy as np
+
+from core.batch_embedding import prepare_face
+
+PATTERN_GRID = 8
+STUB_EMBEDDING_DIM = 512
+STUB_INPUT_SIZE = (160, 160)
+
+
+def identity_pattern(identity, size=64):
+    # Padrão fixo da identidade (BGR, valores >= 40 para nunca se confundir com o fundo)
+    rng = np.random.default_rng(1_000_003 + identity)
+    grid = rng.integers(40, 256, (PATTERN_GRID, PATTERN_GRID, 3), dtype=np.uint8)
+    return cv2.resize(grid, (size, size), interpolation=cv2.INTER_NEAREST)
+
+
+def noisy_face(identity, size, rng, noise=8.0):
+    # Uma "foto" nova da identidade: ruído e brilho levemente diferentes
+    face = identity_pattern(identity, size).astype(np.float32)
+    face = face * rng.uniform(0.9, 1.1) + rng.normal(0.0, noise, face.shape)
+    return np.clip(face, 40, 255).astype(np.uint8)
+
+
+class StubModel:
+    # Mesma interface usada pelo BatchEmbedder: input_shape e model(batch, training=False)
+    def __init__(self, dim=STUB_EMBEDDING_DIM, seed=0):
+        self.input_shape = STUB_INPUT_SIZE
+        features = PATTERN_GRID * PATTERN_GRID * 3
+        self.projection = np.random.default_rng(seed).standard_normal((features, dim)).astype(np.float32)
+        self.model = self
+
+    def __call__(self, batch, training=False):
+        batch = np.asarray(batch, dtype=np.float32)
+        n, h, w, c = batch.shape
+        bh, bw = h // PATTERN_GRID, w // PATTERN_GRID
+        pooled = batch[:, :bh * PATTERN_GRID, :bw * PATTERN_GRID].reshape(n, PATTERN_GRID, bh, PATTERN_GRID, bw, c).mean(axis=(2, 4))
+        features = pooled.reshape(n, -1)
+        features -= features.mean(axis=1, keepdims=True)
+        return features @ self.projection
+
+
+class StubDeepFace:
+    # Implementa só o que o DeepScan usa: build_model, extract_faces e represent
+    def __init__(self, min_face_size=16):
+        self.min_face_size = min_face_size
+        self._model = StubModel()
+
+    def build_model(self, *args, **kwargs):
+        return self._model
+
+    def _load(self, img_path):
+        if isinstance(img_path, str):
+            img = cv2.imread(img_path)
+            if img is None:
+                raise ValueError(f"Imagem inválida: {img_path}")
+            return img
+        return img_path
+
+    def extract_faces(self, img_path, detector_backend='opencv', enforce_detection=True, align=True, **kwargs):
+        img = self._load(img_path)
+        mask = (img.max(axis=2) > 20).astype(np.uint8)
+        count, _labels, stats, _centroids = cv2.connectedComponentsWithStats(mask, connectivity=4)
+        faces = []
+        for x, y, w, h, _area in stats[1:count]:
+            if w < self.min_face_size or h < self.min_face_size:
+                continue
+            face = img[y:y + h, x:x + w][:, :, ::-1].astype(np.float32) / 255.0
+            faces.append({
+                "face": face,
+                "facial_area": {"x": int(x), "y": int(y), "w": int(w), "h": int(h), "left_eye": None, "right_eye": None},
+                "confidence": 1.0
+            })
+        if not faces and enforce_detection:
+            raise ValueError("Face could not be detected.")
+        return faces
+
+    def represent(self, img_path, model_name=None, detector_backend='opencv', enforce_detection=True, align=True, **kwargs):
+        img = self._load(img_path)
+        if detector_backend == 'skip':
+            faces = [img if img.dtype != np.uint8 else img[:, :, ::-1].astype(np.float32) / 255.0]
+        else:
+            faces = [f["face"] for f in self.extract_faces(img, detector_backend, enforce_detection, align)]
+        if not faces:
+            return []
+        batch = np.stack([prepare_face(face, STUB_INPUT_SIZE) for face in faces])
+        return [{"embedding": vector.tolist()} for vector in self._model(batch)]
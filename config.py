@@ -22,21 +22,130 @@ USER_DATA_FIELDS = ["email", "hashed_password", "fullname", "company", "position
 USER_DATA_ROOT_FOLDER = "UserData"
 DS_SUBFOLDER_FACES = "Rostos"
 DSC_SUBFOLDER_FONTS = "Fontes"
+DET_SUBFOLDER_MODELS = "Modelos"
 DS_INFO_FILENAME = 'inforos.txt'
+DSC_EMBEDDING_CACHE_FILENAME = 'embeddings_cache.pkl'
+DSC_ANN_INDEX_FILENAME = 'ann_index.npz'
+
+# --- Detecção de rostos nativa (OpenCV) ---
+# Arquivos em Modelos/: YuNet (face_detection_yunet_2023mar.onnx, do opencv_zoo) e/ou o SSD res10 (Caffe)
+DET_YUNET_MODEL_FILENAME = "face_detection_yunet_2023mar.onnx"
+DET_SSD_PROTOTXT_FILENAME = "deploy.prototxt"
+DET_SSD_MODEL_FILENAME = "res10_300x300_ssd_iter_140000.caffemodel"
+DET_SCORE_THRESHOLD = 0.6
+DET_NMS_THRESHOLD = 0.3
 
 # --- Configurações do DeepSave ---
+# 'yunet', 'ssd' ou 'haar'; sem o modelo em Modelos/ volta para a cascata Haar
+DS_DETECTION_ENGINE = 'yunet'
 DS_MAX_PHOTOS_PER_PERSON = 5
 DS_CAPTURE_WINDOW_NAME = "Deep Save"
+DS_DETECTION_MAX_SIDE = 480
+# Confiança mínima do detector no DeepSave (independente da do DeepScan, que o autoajuste altera)
+DS_MIN_FACE_CONFIDENCE = 0.5
 
 # --- Configurações do DeepScan ---
 DSC_DETECTION_MODEL = 'opencv'
+# 'yunet', 'ssd' ou 'haar' detectam direto no OpenCV; 'deepface' (ou modelo ausente em Modelos/)
+# usa DeepFace.extract_faces com DSC_DETECTION_MODEL
+DSC_DETECTION_ENGINE = 'yunet'
 DSC_RECOGNITION_MODEL = 'Facenet512'
 DSC_SIMILARITY_THRESHOLD = 0.40
+DSC_MIN_FACE_CONFIDENCE = 0.5
+# Lado maior (px) da cópia usada na detecção; 0 detecta no frame inteiro
+DSC_DETECTION_MAX_SIDE = 640
+DSC_EMBEDDING_BATCH_SIZE = 32
+DSC_TEMPLATE_MAX_REPRESENTATIVES = 2
+DSC_TEMPLATE_RERANK_TOP_K = 3
+# Embeddings da galeria na memória: 'float32', 'float16' (metade) ou 'int8' (um quarto, escala por pessoa).
+# int8 dá as mesmas decisões que float32 no benchmarks/gallery_quantization.py e é quase tão rápido
+DSC_GALLERY_STORAGE = 'int8'
+# Índice ANN (None desliga; 'ivf', 'hnswlib' ou 'exact'), usado só a partir de DSC_ANN_MIN_GALLERY_SIZE pessoas
+DSC_ANN_BACKEND = 'ivf'
+DSC_ANN_MIN_GALLERY_SIZE = 5000
+DSC_ANN_PARAMS = {"nprobe": 8}
+# Câmeras do DeepScan: índice do dispositivo, caminho/URL (ex.: RTSP) ou (nome, fonte).
+# Com mais de uma, a sessão lê todas ao mesmo tempo com um só modelo e uma só galeria
+DSC_CAMERA_SOURCES = [0]
+# Exibição multicâmera: 'tiled' (mosaico numa janela) ou 'windows' (uma janela por câmera); colunas 0 = automático
+DSC_MULTI_CAMERA_VIEW = 'tiled'
+DSC_MULTI_CAMERA_COLUMNS = 0
+# Pipeline captura/inferência/exibição
+DSC_PIPELINE_WORKERS = 1
+DSC_PIPELINE_QUEUE_SIZE = 1
+# Agendamento da inferência (backend 'threads'): reconhecimentos por segundo (0 = o máximo que a CPU der),
+# idade máxima do frame quando o resultado sai (s) e orçamento de embeddings por frame (ms; 0 = 1/alvo, None = sem limite).
+# Rostos que não cabem no orçamento ficam para os frames seguintes, trilhas novas e rostos maiores primeiro
+DSC_SCHEDULER_TARGET_FPS = 15
+DSC_SCHEDULER_MAX_STALENESS = 0.5
+DSC_SCHEDULER_FRAME_BUDGET_MS = 0
+# Portão de movimento: sem movimento nem rostos a detecção não roda; após DSC_IDLE_AFTER_SECONDS parado
+# a câmera cai para DSC_IDLE_CAPTURE_FPS e DSC_IDLE_CAPTURE_SIZE (None mantém a resolução) até o próximo movimento
+DSC_MOTION_GATE = True
+DSC_MOTION_WIDTH = 160
+DSC_MOTION_PIXEL_THRESHOLD = 25
+DSC_MOTION_MIN_AREA = 0.01
+DSC_MOTION_RECHECK_SECONDS = 5.0
+DSC_IDLE_AFTER_SECONDS = 30.0
+DSC_IDLE_CAPTURE_FPS = 2
+DSC_IDLE_CAPTURE_SIZE = (320, 240)
+# Pessoas novas/alteradas no DeepSave, em Rostos/ ou no inforos.txt entram na sessão aberta (backend 'threads')
+DSC_GALLERY_LIVE_UPDATES = True
+DSC_GALLERY_WATCH_INTERVAL = 2.0
+# 'threads' (padrão) ou 'processes': workers em processos separados, frames via shared_memory
+DSC_INFERENCE_BACKEND = 'threads'
+DSC_PROCESS_WORKERS = 2
+# Rastreamento: reconhecimento só em trilhas novas, incertas ou a cada DSC_TRACK_REVERIFY_SECONDS
+DSC_TRACK_IOU_THRESHOLD = 0.3
+DSC_TRACK_MAX_MISSES = 5
+DSC_TRACK_CONFIDENCE_DECAY = 0.9
+DSC_TRACK_MIN_CONFIDENCE = 0.5
+DSC_TRACK_REVERIFY_SECONDS = 2.0
+DSC_TRACK_VOTE_WINDOW = 5
 DSC_FONT_FILENAME = "arial.ttf"
+DSC_LABEL_FONT_SIZE = 18
+DSC_LABEL_PADDING = 5
+DSC_LABEL_SPRITE_CACHE_SIZE = 256
 DSC_APP_WINDOW_NAME = "Deep Scan"
 DSC_WINDOW_WIDTH = 1280
 DSC_WINDOW_HEIGHT = int(DSC_WINDOW_WIDTH * 9 / 16)
 
+# --- Sensor de presença HC-SR04 (Arduino/DeepHCSR04arduino, 9600 baud, uma distância a cada 500 ms) ---
+# Com uma porta ('COM3', '/dev/ttyACM0' ou a do core.sensor_simulator) o DeepScan só detecta e reconhece
+# com alguém até PRESENCE_DISTANCE_CM da porta e fica em baixo consumo no resto do tempo (no lugar do
+# portão de movimento). None desliga. Sem leituras por PRESENCE_STALE_SECONDS a detecção volta ao normal
+PRESENCE_SENSOR_PORT = None
+PRESENCE_SENSOR_BAUDRATE = 9600
+PRESENCE_DISTANCE_CM = 80.0
+PRESENCE_ENTER_SAMPLES = 2
+PRESENCE_LEAVE_SAMPLES = 4
+PRESENCE_HOLD_SECONDS = 3.0
+PRESENCE_STALE_SECONDS = 5.0
+
+# --- Autoajuste por máquina (primeira execução ou Configurações > Calibrar desempenho) ---
+# Mede detector x resolução de detecção contra o FPS alvo e grava o perfil escolhido por máquina;
+# o perfil da sessão substitui DSC_DETECTION_ENGINE, DSC_DETECTION_MAX_SIDE e DSC_MIN_FACE_CONFIDENCE
+AUTOTUNE_ENABLED = True
+AUTOTUNE_PROFILE_FILENAME = "perfil_maquina.json"
+AUTOTUNE_TARGET_FPS = 15
+# Fração do tempo de cada frame que a detecção pode ocupar (o resto fica para embedding, matching e desenho)
+AUTOTUNE_DETECTION_BUDGET = 0.6
+# Ordem de preferência: o primeiro detector/resolução que couber no orçamento é o escolhido
+AUTOTUNE_ENGINES = ['yunet', 'ssd', 'deepface', 'haar']
+AUTOTUNE_MAX_SIDES = [640, 480, 320]
+AUTOTUNE_FRAMES = 15
+# As confianças de cada detector não estão na mesma escala (Haar devolve sempre 1.0)
+AUTOTUNE_MIN_FACE_CONFIDENCE = {'yunet': 0.6, 'ssd': 0.5, 'deepface': 0.5, 'haar': 0.0}
+
+# --- Métricas de Desempenho (desligadas o custo é praticamente zero) ---
+METRICS_ENABLED = False
+METRICS_OVERLAY = False
+METRICS_WINDOW = 512
+METRICS_EXPORT_INTERVAL = 5.0
+# Relativo à pasta do app; '.json' grava JSON, outra extensão o texto do Prometheus. None = não exporta
+DSC_METRICS_EXPORT_PATH = "deepscan_metrics.prom"
+DS_METRICS_EXPORT_PATH = "deepsave_metrics.prom"
+
 # --- Configurações de Idioma ---
 LANGUAGES = sorted(["Português", "English", "Deutsch", "Español", "Français", "Italiano", "Nederlands"])
 DEFAULT_LANGUAGE = "Português"
@@ -57,4 +166,5 @@ UI_TEXTS = {
     "language_select_title": "Selecionar Idioma",
     "save_language_button": "Salvar Idioma",
     "back_to_settings_button": "Voltar para Configurações",
+    "autotune_button": "Calibrar desempenho",
 }
\ No newline at end of file
@@ -0,0 +1,325 @@
+#Índices de vizinho mais próximo (exato e aproximado) para galerias grandes
+
+# -*- coding: utf-8 -*-
+import os
+import hashlib
+
+import numpy as np
+
+from core.gallery import l2_normalize
+from core.quantization import QuantizedVectors
+
+# Backends registrados precisam de: __init__(dim, storage="float32", **kw), __len__, add(vectors, ids),
+# search(queries, k) -> (distâncias, ids), to_arrays() e from_arrays(dict).
+# 'storage' é o armazenamento dos vetores (core.quantization), o mesmo da galeria.
+# Backend opcional: hnswlib (grafo HNSW nativo). Sem ele, o IVF em NumPy é usado.
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+_ASSIGN_CHUNK_SIZE = 8192
+
+
+def _empty_result(n_queries, k):
+    return np.full((n_queries, k), np.inf, dtype=np.float32), np.full((n_queries, k), -1, dtype=np.int64)
+
+
+def _top_k(distances, k):
+    # Top-k por linha (menor distância primeiro) sem ordenar a linha inteira
+    k = min(k, distances.shape[1])
+    idx = np.argpartition(distances, k - 1, axis=1)[:, :k] if k < distances.shape[1] else np.tile(np.arange(distances.shape[1]), (distances.shape[0], 1))
+    part = np.take_along_axis(distances, idx, axis=1)
+    order = np.argsort(part, axis=1)
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(idx, order, axis=1)
+
+
+class ExactIndex:
+    # Busca exata (força bruta); referência para o benchmark e galerias pequenas
+    name = "exact"
+
+    def __init__(self, dim, storage="float32"):
+        self.dim = dim
+        self.storage = storage
+        self._vectors = QuantizedVectors(dim, storage)
+        self._ids = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, vectors, ids):
+        self._vectors.append(l2_normalize(vectors))
+        self._ids = np.concatenate([self._ids, np.asarray(ids, dtype=np.int64)])
+
+    def search(self, queries, k):
+        queries = l2_normalize(queries)
+        if not len(self):
+            return _empty_result(len(queries), k)
+        distances, rows = _top_k(1.0 - self._vectors.dot(queries), k)
+        return _pad(distances, self._ids[rows], k)
+
+    def to_arrays(self):
+        return dict(self._vectors.to_arrays(), ids=self._ids)
+
+    @classmethod
+    def from_arrays(cls, data):
+        vectors = QuantizedVectors.from_arrays(data["vectors"], data.get("scales"))
+        index = cls(vectors.dim, vectors.storage)
+        index._vectors, index._ids = vectors, data["ids"]
+        return index
+
+
+class IVFIndex:
+    # Inverted file: k-means esférico particiona os vetores em 'n_lists' listas e a
+    # busca só visita as 'nprobe' listas mais próximas da consulta. Inserções novas
+    # entram na lista do centróide mais próximo, sem retreinar.
+    name = "ivf"
+
+    def __init__(self, dim, n_lists=None, nprobe=8, train_iterations=10, seed=0, storage="float32"):
+        self.dim = dim
+        self.storage = storage
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.train_iterations = train_iterations
+        self.seed = seed
+        self.centroids = None
+        self._vectors = QuantizedVectors(dim, storage)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._assignments = np.empty(0, dtype=np.int64)
+        self._lists = None
+        self._trained_size = 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def _assign(self, vectors):
+        # 'vectors' pode ser float32 ou o armazenamento compacto (convertido por trecho)
+        out = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), _ASSIGN_CHUNK_SIZE):
+            if isinstance(vectors, QuantizedVectors):
+                chunk = vectors.to_float(slice(start, start + _ASSIGN_CHUNK_SIZE))
+            else:
+                chunk = vectors[start:start + _ASSIGN_CHUNK_SIZE]
+            out[start:start + len(chunk)] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return out
+
+    def train(self, vectors=None):
+        vectors = self._vectors.to_float() if vectors is None else l2_normalize(vectors)
+        if not len(vectors):
+            return
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+        rng = np.random.default_rng(self.seed)
+        self.centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+        for _ in range(self.train_iterations):
+            assignments = self._assign(vectors)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignments, vectors)
+            empty = np.bincount(assignments, minlength=n_lists) == 0
+            # Listas vazias recebem um ponto aleatório para não degenerarem
+            if empty.any():
+                sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+            self.centroids = l2_normalize(sums)
+        self._assignments = self._assign(self._vectors) if len(self._vectors) else self._assignments
+        self._lists = None
+        self._trained_size = len(vectors)
+
+    def add(self, vectors, ids):
+        vectors = l2_normalize(vectors)
+        self._vectors.append(vectors)
+        self._ids = np.concatenate([self._ids, np.asarray(ids, dtype=np.int64)])
+        # Com n_lists automático, retreina quando a galeria cresce 4x desde o último treino
+        if not self.is_trained or (self.n_lists is None and len(self) > 4 * self._trained_size):
+            self.train()
+        else:
+            self._assignments = np.concatenate([self._assignments, self._assign(vectors)])
+            self._lists = None
+
+    def _inverted_lists(self):
+        if self._lists is None:
+            order = np.argsort(self._assignments, kind='stable')
+            bounds = np.searchsorted(self._assignments[order], np.arange(len(self.centroids) + 1))
+            self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+        return self._lists
+
+    def search(self, queries, k, nprobe=None):
+        queries = l2_normalize(queries)
+        if not len(self) or not self.is_trained:
+            return _empty_result(len(queries), k)
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        lists = self._inverted_lists()
+        _, probes = _top_k(1.0 - queries @ self.centroids.T, nprobe)
+        out_d, out_ids = _empty_result(len(queries), k)
+        for qi, query in enumerate(queries):
+            rows = np.concatenate([lists[p] for p in probes[qi]])
+            if not len(rows):
+                continue
+            distances, local = _top_k((1.0 - self._vectors.dot_rows(rows, query))[np.newaxis, :], k)
+            n = distances.shape[1]
+            out_d[qi, :n] = distances[0]
+            out_ids[qi, :n] = self._ids[rows[local[0]]]
+        return out_d, out_ids
+
+    def to_arrays(self):
+        return dict(
+            self._vectors.to_arrays(),
+            ids=self._ids,
+            assignments=self._assignments,
+            centroids=self.centroids if self.is_trained else np.empty((0, self.dim), dtype=np.float32),
+            params=np.array([self.n_lists or 0, self.nprobe, self.train_iterations, self.seed], dtype=np.int64),
+        )
+
+    @classmethod
+    def from_arrays(cls, data):
+        n_lists, nprobe, train_iterations, seed = (int(v) for v in data["params"])
+        vectors = QuantizedVectors.from_arrays(data["vectors"], data.get("scales"))
+        index = cls(vectors.dim, n_lists=n_lists or None, nprobe=nprobe, train_iterations=train_iterations, seed=seed, storage=vectors.storage)
+        index._vectors, index._ids, index._assignments = vectors, data["ids"], data["assignments"]
+        index.centroids = data["centroids"] if len(data["centroids"]) else None
+        index._trained_size = len(index._ids)
+        return index
+
+
+class HNSWIndex:
+    # Adaptador para o hnswlib (opcional). Mantém uma cópia dos vetores para salvar
+    # tudo no mesmo .npz dos outros backends e reconstruir o grafo no carregamento.
+    # O grafo do hnswlib é sempre float32; 'storage' vale só para essa cópia.
+    name = "hnswlib"
+
+    def __init__(self, dim, ef_construction=200, m=16, ef_search=64, storage="float32"):
+        if not HNSWLIB_AVAILABLE:
+            raise ImportError("hnswlib não está instalado.")
+        self.dim = dim
+        self.storage = storage
+        self.ef_search = ef_search
+        self._index = hnswlib.Index(space='cosine', dim=dim)
+        self._index.init_index(max_elements=1024, ef_construction=ef_construction, M=m)
+        self._index.set_ef(ef_search)
+        self._vectors = QuantizedVectors(dim, storage)
+        self._ids = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, vectors, ids):
+        vectors = l2_normalize(vectors)
+        ids = np.asarray(ids, dtype=np.int64)
+        needed = len(self) + len(ids)
+        if needed > self._index.get_max_elements():
+            self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+        self._index.add_items(vectors, ids)
+        self._vectors.append(vectors)
+        self._ids = np.concatenate([self._ids, ids])
+
+    def search(self, queries, k):
+        queries = l2_normalize(queries)
+        if not len(self):
+            return _empty_result(len(queries), k)
+        k_eff = min(k, len(self))
+        self._index.set_ef(max(self.ef_search, k_eff))
+        labels, distances = self._index.knn_query(queries, k=k_eff)
+        return _pad(distances.astype(np.float32), labels.astype(np.int64), k)
+
+    def to_arrays(self):
+        return dict(self._vectors.to_arrays(), ids=self._ids)
+
+    @classmethod
+    def from_arrays(cls, data):
+        vectors = QuantizedVectors.from_arrays(data["vectors"], data.get("scales"))
+        index = cls(vectors.dim, storage=vectors.storage)
+        if len(data["ids"]):
+            index.add(vectors.to_float(), data["ids"])
+        return index
+
+
+def _pad(distances, ids, k):
+    if distances.shape[1] >= k:
+        return distances, ids
+    out_d, out_ids = _empty_result(distances.shape[0], k)
+    out_d[:, :distances.shape[1]] = distances
+    out_ids[:, :ids.shape[1]] = ids
+    return out_d, out_ids
+
+
+ANN_BACKENDS = {
+    ExactIndex.name: ExactIndex,
+    IVFIndex.name: IVFIndex,
+    HNSWIndex.name: HNSWIndex,
+}
+
+
+def register_backend(name, index_class):
+    ANN_BACKENDS[name] = index_class
+
+
+def create_index(backend, dim, **kwargs):
+    if backend not in ANN_BACKENDS:
+        raise ValueError(f"Backend de índice desconhecido: '{backend}'")
+    return ANN_BACKENDS[backend](dim, **kwargs)
+
+
+def save_index(index, path, metadata=None):
+    # Grava em .npz (sem pickle); 'metadata' vira chaves "meta_<nome>"
+    arrays = {f"meta_{key}": np.asarray(value) for key, value in (metadata or {}).items()}
+    arrays.update(index.to_arrays())
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, backend=index.name, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_index(path):
+    # Retorna (índice, metadata)
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+    backend = str(arrays.pop("backend"))
+    if backend not in ANN_BACKENDS:
+        raise ValueError(f"Backend de índice desconhecido: '{backend}'")
+    metadata = {key[len("meta_"):]: arrays.pop(key) for key in list(arrays) if key.startswith("meta_")}
+    return ANN_BACKENDS[backend].from_arrays(arrays), metadata
+
+
+def load_or_build_index(vectors, backend, path=None, read_only=False, **params):
+    # Reaproveita o índice salvo em 'path' se foi construído sobre exatamente estes
+    # vetores (impressão digital SHA-1); senão constrói, insere e salva de novo.
+    # read_only: só lê 'path' (workers em processos não disputam nem sobrescrevem o arquivo).
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    fingerprint = hashlib.sha1(vectors.tobytes()).hexdigest()
+    if path and os.path.exists(path):
+        try:
+            index, metadata = load_index(path)
+            if index.name == backend and getattr(index, "storage", "float32") == params.get("storage", "float32") and str(metadata.get("fingerprint")) == fingerprint:
+                return index
+        except Exception as e:
+            print(f"[DSC_AVISO] Índice ANN ilegível ({os.path.basename(path)}), será reconstruído: {e}")
+    index = create_index(backend, vectors.shape[1], **params)
+    index.add(vectors, np.arange(len(vectors)))
+    if path and not read_only:
+        try:
+            save_index(index, path, {"fingerprint": fingerprint})
+        except Exception as e:
+            print(f"[DSC_ERRO] Não foi possível salvar o índice ANN: {e}")
+    return index
+
+
+def attach_index(gallery, backend, path=None, min_size=0, read_only=False, **params):
+    # Liga um índice ANN à FaceGallery só quando ela é grande o bastante para compensar.
+    # Menor que isso, a galeria guarda a fábrica e liga o índice sozinha quando crescer (upsert).
+    if not backend:
+        return gallery
+    params = dict(params, storage=gallery.storage)
+    factory = lambda vectors: load_or_build_index(vectors, backend, None, **params)
+    gallery.index_min_size = max(1, min_size)
+    if len(gallery) < gallery.index_min_size:
+        gallery.index_factory = factory
+        return gallery
+    try:
+        gallery.set_index(load_or_build_index(gallery.matrix, backend, path, read_only, **params), factory=factory)
+        print(f"[DSC_INFO] Índice ANN '{backend}' ativo para {len(gallery)} pessoas.")
+    except Exception as e:
+        print(f"[DSC_AVISO] Índice ANN '{backend}' indisponível, usando busca exata: {e}")
+    return gallery
@@ -0,0 +1,64 @@
+#Autoajuste por máquina: mede as opções de detecção no próprio hardware e guarda a escolhida
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import platform
+
+
+def machine_fingerprint(extra=()):
+    # Identifica a máquina e as versões que mudam o desempenho: a pasta do app copiada para
+    # outro computador (ou uma atualização do OpenCV) não reaproveita um perfil que não vale mais
+    parts = [platform.node(), platform.machine(), platform.processor(), str(os.cpu_count()), platform.python_version()]
+    return "|".join(parts + [str(value) for value in extra])
+
+
+def load_profile(path, fingerprint):
+    # Perfil salvo desta máquina ou None (arquivo ausente/corrompido conta como sem perfil)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            profiles = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return profiles.get(fingerprint) if isinstance(profiles, dict) else None
+
+
+def save_profile(path, fingerprint, profile):
+    # Um arquivo para todas as máquinas (a pasta do app pode ficar num compartilhamento de rede);
+    # grava num temporário e troca para nunca deixar um JSON pela metade
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            profiles = json.load(f)
+        if not isinstance(profiles, dict):
+            profiles = {}
+    except (OSError, ValueError):
+        profiles = {}
+    profiles[fingerprint] = profile
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def calibrate(candidates, measure_fn, frame_budget):
+    # candidates vêm em ordem de preferência (melhor qualidade primeiro) e measure_fn(candidato)
+    # devolve segundos por frame, ou None se a opção não existe nesta máquina. Para no primeiro
+    # que cabe em frame_budget; se nenhum couber, fica com o mais rápido.
+    # Retorna (escolhido, segundos, [(candidato, segundos), ...]); escolhido é None se nada rodou.
+    results = []
+    for candidate in candidates:
+        try:
+            seconds = measure_fn(candidate)
+        except Exception as e:
+            print(f"[AUTOTUNE_AVISO] {candidate}: {e}")
+            continue
+        if seconds is None:
+            continue
+        results.append((candidate, seconds))
+        print(f"[AUTOTUNE_INFO] {candidate}: {seconds * 1000.0:.1f} ms por frame")
+        if seconds <= frame_budget:
+            return candidate, seconds, results
+    if not results:
+        return None, None, results
+    candidate, seconds = min(results, key=lambda result: result[1])
+    return candidate, seconds, results
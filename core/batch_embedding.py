@@ -0,0 +1,75 @@
+#Embedding em lote: todos os rostos de um (ou vários) frames numa única passada do modelo
+
+# -*- coding: utf-8 -*-
+import cv2
+import numpy as np
+
+
+def _input_size(client, keras_model):
+    # DeepFace >= 0.0.80 expõe input_shape no cliente; versões antigas devolvem o Model do Keras
+    shape = getattr(client, "input_shape", None)
+    if shape is None:
+        shape = tuple(keras_model.input_shape[1:3])
+    return int(shape[0]), int(shape[1])
+
+
+def prepare_face(face, target_size):
+    # Mesmo pré-processamento do DeepFace.represent para um rosto de extract_faces
+    # (RGB, float em [0, 1]): volta para BGR, reduz mantendo a proporção, completa com
+    # preto até target_size e garante escala [0, 1].
+    img = np.ascontiguousarray(face[:, :, ::-1])
+    target_h, target_w = target_size
+    factor = min(target_h / img.shape[0], target_w / img.shape[1])
+    dsize = (max(1, int(img.shape[1] * factor)), max(1, int(img.shape[0] * factor)))
+    img = cv2.resize(img, dsize)
+    diff_h, diff_w = target_h - img.shape[0], target_w - img.shape[1]
+    img = np.pad(img, ((diff_h // 2, diff_h - diff_h // 2), (diff_w // 2, diff_w - diff_w // 2), (0, 0)), 'constant')
+    if img.shape[:2] != (target_h, target_w):
+        img = cv2.resize(img, (target_w, target_h))
+    img = img.astype(np.float32)
+    if img.max() > 1:
+        img /= 255.0
+    return img
+
+
+class BatchEmbedder:
+    # Empilha os rostos num tensor (N, H, W, 3) e chama o modelo uma vez só.
+    # Se o modelo carregado não aceitar lote (versão do DeepFace incompatível), passa
+    # a usar fallback_fn(rosto) -> embedding, um rosto por vez, como antes.
+    def __init__(self, model_client, fallback_fn=None, max_batch_size=32):
+        self.client = model_client
+        self.fallback_fn = fallback_fn
+        self.max_batch_size = max_batch_size
+        self._keras_model = getattr(model_client, "model", model_client)
+        try:
+            self.input_size = _input_size(model_client, self._keras_model)
+            self.batch_enabled = callable(self._keras_model)
+        except Exception as e:
+            print(f"[DSC_AVISO] Embedding em lote indisponível ({e}); usando um rosto por vez.")
+            self.input_size = None
+            self.batch_enabled = False
+
+    def _forward(self, batch):
+        return np.asarray(self._keras_model(batch, training=False), dtype=np.float32)
+
+    def embed(self, faces):
+        # Retorna uma lista alinhada com 'faces' (None onde o rosto for inválido)
+        embeddings = [None] * len(faces)
+        valid = [i for i, face in enumerate(faces) if face is not None and face.size > 0]
+        if not valid:
+            return embeddings
+        if self.batch_enabled:
+            try:
+                for start in range(0, len(valid), self.max_batch_size):
+                    chunk = valid[start:start + self.max_batch_size]
+                    batch = np.stack([prepare_face(faces[i], self.input_size) for i in chunk])
+                    for i, vector in zip(chunk, self._forward(batch)):
+                        embeddings[i] = vector
+                return embeddings
+            except Exception as e:
+                print(f"[DSC_AVISO] Falha no embedding em lote ({e}); usando um rosto por vez.")
+                self.batch_enabled = False
+        if self.fallback_fn is not None:
+            for i in valid:
+                embeddings[i] = self.fallback_fn(faces[i])
+        return embeddings
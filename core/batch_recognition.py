@@ -0,0 +1,185 @@
+#Reconhecimento em lote, sem interface: vídeo gravado ou pasta de imagens -> JSONL
+#Uso (na raiz do projeto):
+#  python -m core.batch_recognition --user email@exemplo.com --input gravacao.mp4 --output resultados.jsonl --workers 4
+
+# -*- coding: utf-8 -*-
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import cv2
+
+import config
+import utils
+from core import deepscan_logic
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Estado de cada processo do pool (galeria, embedder), criado uma vez no initializer
+_WORKER_STATE = {}
+
+
+def _init_worker(gallery_state, index_path, machine_profile):
+    _WORKER_STATE.update(deepscan_logic._process_worker_init(gallery_state, index_path, machine_profile))
+
+
+def _face_records(faces):
+    records = []
+    for entry, (x, y, w, h) in faces:
+        record = {"box": [int(x), int(y), int(w), int(h)], "person_id": None, "name": None}
+        if entry is not None:
+            record["person_id"] = entry["person_id"]
+            record["name"] = entry["person_data"][0]
+        records.append(record)
+    return records
+
+
+def _process_video_chunk(task):
+    # Um trecho [start, stop) do vídeo, lido em sequência; o rastreador usa o tempo do vídeo
+    # como relógio, então a reverificação periódica segue a filmagem e não o relógio da CPU.
+    video_path, start, stop, stride, use_tracker = task
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    if start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    video_time = [start / fps]
+    tracker = None
+    if use_tracker:
+        tracker = deepscan_logic._create_tracker()
+        tracker.clock = lambda: video_time[0]
+    results = []
+    for frame_index in range(start, stop):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame_index % stride:
+            continue
+        video_time[0] = frame_index / fps
+        faces = deepscan_logic._recognize_faces(frame, _WORKER_STATE["gallery"], tracker, _WORKER_STATE["embedder"])
+        results.append({"source": video_path, "frame": frame_index, "time_s": round(video_time[0], 3), "faces": _face_records(faces)})
+    cap.release()
+    return results
+
+
+def _process_image_chunk(task):
+    image_paths, = task
+    results = []
+    for path in image_paths:
+        frame = cv2.imread(path)
+        if frame is None:
+            results.append({"source": path, "frame": 0, "error": "unreadable"})
+            continue
+        faces = deepscan_logic._recognize_faces(frame, _WORKER_STATE["gallery"], None, _WORKER_STATE["embedder"])
+        results.append({"source": path, "frame": 0, "faces": _face_records(faces)})
+    return results
+
+
+def _build_tasks(input_path, chunk_frames, stride, use_tracker):
+    # Retorna (função, tarefas): trechos de vídeo ou grupos de imagens, na ordem de saída
+    if os.path.isdir(input_path):
+        images = sorted(
+            os.path.join(input_path, name) for name in os.listdir(input_path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        group = max(1, chunk_frames // 10)
+        return _process_image_chunk, [(images[i:i + group],) for i in range(0, len(images), group)]
+    cap = cv2.VideoCapture(input_path)
+    if not cap.isOpened():
+        raise ValueError(f"Não foi possível abrir o vídeo: {input_path}")
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if total <= 0:
+        # Contagem desconhecida (alguns contêineres/streams): um único trecho lido até o fim
+        return _process_video_chunk, [(input_path, 0, sys.maxsize, stride, use_tracker)]
+    return _process_video_chunk, [
+        (input_path, start, min(total, start + chunk_frames), stride, use_tracker)
+        for start in range(0, total, chunk_frames)
+    ]
+
+
+def load_user_gallery(user_email=None, user_dir=None):
+    # Mesmo carregamento da sessão DeepScan (cache de embeddings + templates + índice ANN), sem messagebox.
+    # A galeria é montada aqui uma vez; os workers recebem os vetores já armazenados (export_state)
+    if user_dir:
+        faces_path = os.path.join(user_dir, config.DS_SUBFOLDER_FACES)
+        info_path = os.path.join(user_dir, config.DS_INFO_FILENAME)
+    else:
+        faces_path, info_path = utils.get_user_specific_paths(user_email)
+    # Perfil da máquina antes da galeria: as fotos são embedadas com o mesmo detector dos frames
+    deepscan_logic._ensure_machine_profile()
+    person_info = deepscan_logic._load_person_info(info_path, force_reload=True)
+    entries = deepscan_logic._load_known_faces(faces_path, person_info, force_reload=True)
+    index_path = os.path.join(os.path.dirname(faces_path), config.DSC_ANN_INDEX_FILENAME)
+    return deepscan_logic._build_gallery(entries, index_path), index_path
+
+
+def run_batch(input_path, output, gallery, index_path, workers=1, chunk_frames=300, stride=1, use_tracker=True):
+    # Escreve um JSON por frame processado em 'output' (arquivo texto aberto), na ordem da entrada
+    process_fn, tasks = _build_tasks(input_path, chunk_frames, stride, use_tracker)
+    frames = 0
+    started = time.perf_counter()
+    # Mesma inicialização com um ou vários workers: galeria e perfil da máquina do processo principal
+    initargs = (gallery.export_state(), index_path, deepscan_logic.SESSION_CACHE["machine_profile"])
+    if workers <= 1:
+        _init_worker(*initargs)
+        chunks = map(process_fn, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.get_context("spawn").Pool(workers, initializer=_init_worker, initargs=initargs)
+        chunks = pool.imap(process_fn, tasks)
+    try:
+        for chunk in chunks:
+            for record in chunk:
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            frames += len(chunk)
+            print(f"[DSC_BATCH] {frames} frames processados ({frames / max(1e-6, time.perf_counter() - started):.1f} frames/s)", file=sys.stderr)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DeepScan em lote sobre vídeo ou pasta de imagens, sem interface")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--user", help="Email do usuário (usa UserData/<usuario>)")
+    source.add_argument("--user-dir", help="Pasta com Rostos/ e inforos.txt")
+    parser.add_argument("--input", required=True, help="Arquivo de vídeo ou pasta de imagens")
+    parser.add_argument("--output", default="-", help="Arquivo JSONL de saída ('-' = stdout)")
+    parser.add_argument("--workers", type=int, default=1, help="Processos de inferência")
+    parser.add_argument("--chunk-frames", type=int, default=300, help="Frames de vídeo por tarefa")
+    parser.add_argument("--stride", type=int, default=1, help="Processa 1 a cada N frames do vídeo")
+    parser.add_argument("--no-track", action="store_true", help="Reconhece todos os rostos de todos os frames")
+    args = parser.parse_args()
+
+    if not deepscan_logic.DEEPFACE_AVAILABLE:
+        print("[DSC_ERRO] A biblioteca DeepFace não está instalada.", file=sys.stderr)
+        return 1
+    if not os.path.exists(args.input):
+        print(f"[DSC_ERRO] Entrada não encontrada: {args.input}", file=sys.stderr)
+        return 1
+
+    gallery, index_path = load_user_gallery(args.user, args.user_dir)
+    if not len(gallery):
+        print("[DSC_AVISO] Nenhum rosto conhecido carregado. Todos serão marcados como desconhecidos.", file=sys.stderr)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        frames = run_batch(args.input, output, gallery, index_path, args.workers, max(1, args.chunk_frames), max(1, args.stride), not args.no_track)
+    except ValueError as e:
+        print(f"[DSC_ERRO] {e}", file=sys.stderr)
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"[DSC_BATCH] Concluído: {frames} frames.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
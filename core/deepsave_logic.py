@@ -4,8 +4,14 @@
 import cv2
 import os
 import time
-import re
 import config
+import utils
+from core.face_detection import HaarDetector, get_face_detector
+from core.live_gallery import person_id_from_filename
+from core.metrics import StageMetrics, draw_metrics_overlay, start_exporter
+from core.multires import make_detection_proxy, scale_box
+
+METRICS = StageMetrics(enabled=config.METRICS_ENABLED, window=config.METRICS_WINDOW)
 
 def get_next_person_id(user_faces_path):
     if not os.path.exists(user_faces_path):
@@ -16,12 +22,12 @@ def get_next_person_id(user_faces_path):
     if not jpg_files:
         return "001"
         
-    pattern = re.compile(r"^(\d{3})")
+    # Mesma regra de IDs da galeria (live_gallery): 3 dígitos ou mais, então depois de "999" vem "1000"
     numeric_ids = set()
     for filename in jpg_files:
-        match = pattern.match(filename)
-        if match:
-            numeric_ids.add(int(match.group(1)))
+        person_id = person_id_from_filename(filename)
+        if person_id is not None:
+            numeric_ids.add(int(person_id))
             
     if not numeric_ids:
         return "001"
@@ -48,21 +54,30 @@ def capture_and_save_face(full_image_path_to_save, haar_cascade_path):
         print("[DS_ERRO] Não foi possível abrir a câmera.")
         return False, "camera_error"
 
-    face_cascade = cv2.CascadeClassifier(haar_cascade_path)
+    # Detector nativo compartilhado com o DeepScan; sem o modelo, a cascata Haar de sempre
+    detector = get_face_detector(config.DS_DETECTION_ENGINE) or HaarDetector(haar_cascade_path)
     detection_start_time = None
     face_saved = False
     
     print(f"[DS] Preparando para salvar em: {os.path.basename(full_image_path_to_save)}")
     cv2.namedWindow(config.DS_CAPTURE_WINDOW_NAME)
+    METRICS.reset()
+    exporter = start_exporter(METRICS, utils.get_metrics_export_path(config.DS_METRICS_EXPORT_PATH), config.METRICS_EXPORT_INTERVAL)
 
     while True:
+        started = METRICS.start()
         ret, frame = cap.read()
+        METRICS.stop("capture", started)
         if not ret:
             print("[DS_ERRO] Não foi possível ler o frame da câmera.")
             break
 
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(100, 100))
+        frame_started = METRICS.start()
+        # A detecção roda numa cópia reduzida; as caixas voltam para a resolução da câmera
+        proxy, scale = make_detection_proxy(frame, config.DS_DETECTION_MAX_SIDE)
+        min_side = max(20, int(100 / scale))
+        faces = [scale_box(face.box, scale, frame.shape) for face in detector.detect(proxy, min_size=min_side) if face.score >= config.DS_MIN_FACE_CONFIDENCE]
+        METRICS.stop("detect", frame_started)
         
         display_frame = frame.copy()
         cv2.putText(display_frame, "Pressione Q ou E para Sair", (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1, cv2.LINE_AA)
@@ -92,7 +107,13 @@ def capture_and_save_face(full_image_path_to_save, haar_cascade_path):
             detection_start_time = None
             cv2.putText(display_frame, "Procurando rosto...", (20, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
 
+        if config.METRICS_OVERLAY:
+            draw_metrics_overlay(display_frame, METRICS, ("capture", "detect", "imshow"), origin=(10, 80))
+        started = METRICS.start()
         cv2.imshow(config.DS_CAPTURE_WINDOW_NAME, display_frame)
+        METRICS.stop("imshow", started)
+        METRICS.stop("frame", frame_started)
+        METRICS.tick("display")
         
         key = cv2.waitKey(1) & 0xFF
         if key in [ord('q'), ord('e')]:
@@ -107,6 +128,8 @@ def capture_and_save_face(full_image_path_to_save, haar_cascade_path):
             print("[DS] Janela de captura não encontrada, encerrando.")
             break
 
+    if exporter is not None:
+        exporter.stop()
     cap.release()
     cv2.destroyAllWindows()
     # Garante que a janela feche em todos os sistemas
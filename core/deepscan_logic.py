@@ -3,33 +3,61 @@
 # -*- coding: utf-8 -*-
 import cv2
 import os
-import re
+import time
 import numpy as np
-from tkinter import messagebox
-
-# Tenta importar dependências pesadas
-try:
-    from deepface import DeepFace
-    DEEPFACE_AVAILABLE = True
-except ImportError:
-    DEEPFACE_AVAILABLE = False
-
 try:
-    from PIL import Image, ImageDraw, ImageFont
-    PIL_AVAILABLE = True
+    from tkinter import messagebox
 except ImportError:
-    PIL_AVAILABLE = False
+    # Modo headless (servidor sem Tk): só as funções de interface usam o messagebox
+    messagebox = None
 
 import config
 import utils
+from core.lazy_imports import LazyModule, module_available
+from core.embedding_store import EmbeddingStore
+from core.gallery import FaceGallery
+from core.ann_index import attach_index
+from core.pipeline import RecognitionPipeline
+from core.multi_camera import MultiCameraPipeline
+from core.tracking import FaceTracker
+from core.batch_embedding import BatchEmbedder
+from core.process_workers import ProcessRecognitionPipeline
+from core.templates import build_person_template
+from core.warmup import WarmupWorker
+from core.scheduler import FrameScheduler
+from core.motion import MotionGate, gated, low_power_switch
+from core.presence_sensor import PresenceGate, PresenceSensor
+from core.autotune import calibrate, load_profile, machine_fingerprint, save_profile
+from core.live_gallery import GalleryUpdater, GalleryWatcher, PHOTO_EXTENSIONS, person_id_from_filename
+from core.frame_buffers import FrameBuffer, MosaicCanvas
+from core.metrics import StageMetrics, TimedCapture, draw_metrics_overlay, start_exporter
+from core.overlay import LabelSpriteCache, blend_sprite
+from core.face_detection import get_face_detector
+from core.multires import make_detection_proxy, scale_box, scale_point, crop_face, to_face_input
+
+# Dependências pesadas só são importadas no primeiro uso (DeepFace traz o TensorFlow junto):
+# no app, isso acontece no pré-carregamento após o login, fora da thread da interface
+DeepFace = LazyModule("deepface.DeepFace")
+DEEPFACE_AVAILABLE = module_available("deepface")
+ImageFont = LazyModule("PIL.ImageFont")
+PIL_AVAILABLE = module_available("PIL")
 
 # --- Variáveis de Cache da Sessão ---
 SESSION_CACHE = {
     "embeddings": [],
     "person_info": {},
     "pillow_font": None,
-    "models_loaded": False
+    "embedding_store": None,
+    "gallery": None,
+    "embedder": None,
+    "models_loaded": False,
+    "gallery_watcher": None,
+    "warmup": None,
+    "prepared": None,
+    "machine_profile": None
 }
+LABEL_SPRITES = LabelSpriteCache(max_entries=config.DSC_LABEL_SPRITE_CACHE_SIZE)
+METRICS = StageMetrics(enabled=config.METRICS_ENABLED, window=config.METRICS_WINDOW)
 
 def _load_person_info(info_file_path, force_reload=False):
     if not force_reload and SESSION_CACHE["person_info"]:
@@ -53,12 +81,96 @@ def _load_person_info(info_file_path, force_reload=False):
         print(f"[DSC_ERRO] Ao ler informações: {e}")
     return SESSION_CACHE["person_info"]
 
+def _detection_settings():
+    # (detector, lado máximo, confiança mínima) do perfil desta máquina, ou do config sem perfil.
+    # Vão como parâmetros até _detect_faces: a calibração mede candidatos sem tocar no config global
+    profile = SESSION_CACHE["machine_profile"]
+    if profile is None:
+        return config.DSC_DETECTION_ENGINE, config.DSC_DETECTION_MAX_SIDE, config.DSC_MIN_FACE_CONFIDENCE
+    return profile["engine"], profile["max_side"], profile["min_face_confidence"]
+
+def _enrollment_detector_key():
+    # As fotos cadastradas passam pelo mesmo detector e recorte dos frames ao vivo; a chave entra
+    # no cache de embeddings, então trocar de detector reprocessa as fotos em vez de misturar recortes
+    engine = _detection_settings()[0]
+    return f"native-{engine}" if get_face_detector(engine) is not None else config.DSC_DETECTION_MODEL
+
+def _get_embedding_store(faces_path):
+    # O cache fica em UserData/<usuario>/, ao lado da pasta de rostos
+    store_path = os.path.join(os.path.dirname(faces_path), config.DSC_EMBEDDING_CACHE_FILENAME)
+    detector_key = _enrollment_detector_key()
+    store = SESSION_CACHE["embedding_store"]
+    if store is None or store.store_path != store_path or store.detector_backend != detector_key:
+        store = EmbeddingStore(store_path, config.DSC_RECOGNITION_MODEL, detector_key)
+        SESSION_CACHE["embedding_store"] = store
+    return store
+
+def _read_photo(path):
+    # imdecode em vez de imread: aceita caminhos com acentos no Windows
+    data = np.fromfile(path, dtype=np.uint8)
+    return cv2.imdecode(data, cv2.IMREAD_COLOR) if data.size else None
+
+def _represent_photo(path):
+    engine, max_side, min_confidence = _detection_settings()
+    detector = get_face_detector(engine)
+    if detector is not None:
+        return _represent_photo_native(path, detector, max_side, min_confidence)
+    representation = DeepFace.represent(
+        img_path=path,
+        model_name=config.DSC_RECOGNITION_MODEL,
+        detector_backend=config.DSC_DETECTION_MODEL,
+        enforce_detection=True,
+        align=True
+    )
+    if representation and 'embedding' in representation[0]:
+        return representation[0]['embedding']
+    return None
+
+def _represent_photo_native(path, detector, max_side, min_confidence):
+    # Mesmo caminho das consultas ao vivo (_detect_faces_native + embedder), para galeria e frames
+    # virem da mesma distribuição de recortes. O DeepSave salva o rosto já recortado: a borda
+    # preta devolve ao detector o contexto em volta do rosto que ele espera.
+    image = _read_photo(path)
+    if image is None:
+        raise ValueError("imagem ilegível")
+    pad = max(image.shape[:2]) // 2
+    image = cv2.copyMakeBorder(image, pad, pad, pad, pad, cv2.BORDER_CONSTANT, value=(0, 0, 0))
+    detections = _detect_faces_native(image, detector, max_side, min_confidence)
+    if not detections:
+        raise ValueError("nenhum rosto detectado na foto")
+    _box, face = max(detections, key=lambda detection: detection[0][2] * detection[0][3])
+    return _get_embedder().embed([face])[0]
+
+def _build_person_entry(person_id, photo_paths, person_data, store):
+    # Todas as fotos da pessoa entram no template (centróide + representantes)
+    embeddings = []
+    for path in photo_paths:
+        try:
+            embedding = store.get_or_compute(path, _represent_photo)
+            if embedding is not None:
+                embeddings.append(embedding)
+        except Exception as e:
+            print(f"[DSC_ERRO] Processando '{os.path.basename(path)}' (ID: {person_id}): {e}")
+    if not embeddings:
+        return None
+    centroid, representatives = build_person_template(
+        embeddings,
+        max_representatives=config.DSC_TEMPLATE_MAX_REPRESENTATIVES,
+        outlier_distance=config.DSC_SIMILARITY_THRESHOLD
+    )
+    return {
+        "person_id": person_id,
+        "embedding": centroid,
+        "representatives": representatives,
+        "photo_count": len(embeddings),
+        "person_data": person_data
+    }
+
 def _load_known_faces(faces_path, person_info, force_reload=False):
     if not DEEPFACE_AVAILABLE: return []
     if SESSION_CACHE["embeddings"] and not force_reload:
         return SESSION_CACHE["embeddings"]
 
-    known_faces_data = []
     if not os.path.exists(faces_path):
         print(f"[DSC_ERRO] Pasta de rostos não encontrada: {os.path.basename(faces_path)}")
         return []
@@ -66,44 +178,479 @@ def _load_known_faces(faces_path, person_info, force_reload=False):
     images_by_id = {}
     for filename in os.listdir(faces_path):
         full_path = os.path.join(faces_path, filename)
-        if os.path.isfile(full_path) and filename.lower().endswith(('.jpg', '.jpeg', '.png')):
-            match = re.match(r"(\d{3})", os.path.splitext(filename)[0])
-            if not match: continue
-            
-            base_id = match.group(1).upper()
-            if base_id not in person_info: continue
-            
-            # Pega a primeira foto de cada pessoa para representação
-            if base_id not in images_by_id:
-                 images_by_id[base_id] = {'path': full_path, 'filename': filename}
+        if os.path.isfile(full_path) and filename.lower().endswith(PHOTO_EXTENSIONS):
+            base_id = person_id_from_filename(filename)
+            if base_id is None or base_id not in person_info: continue
+            images_by_id.setdefault(base_id, []).append(full_path)
 
     if not images_by_id: return []
 
-    for person_id, img_data in images_by_id.items():
-        try:
-            representation = DeepFace.represent(
-                img_path=img_data['path'],
-                model_name=config.DSC_RECOGNITION_MODEL,
-                detector_backend=config.DSC_DETECTION_MODEL,
-                enforce_detection=True,
-                align=True
-            )
-            if representation and 'embedding' in representation[0]:
-                known_faces_data.append({
-                    "person_id": person_id,
-                    "embedding": representation[0]['embedding'],
-                    "person_data": person_info[person_id]
-                })
-        except Exception as e:
-            print(f"[DSC_ERRO] Processando '{img_data['filename']}' (ID: {person_id}): {e}")
-    
+    store = _get_embedding_store(faces_path)
+    known_faces_data = []
+    for person_id, photo_paths in images_by_id.items():
+        entry = _build_person_entry(person_id, photo_paths, person_info[person_id], store)
+        if entry is not None:
+            known_faces_data.append(entry)
+
+    store.prune(path for photo_paths in images_by_id.values() for path in photo_paths)
+    store.save()
     SESSION_CACHE["embeddings"] = known_faces_data
     if known_faces_data:
-        print(f"[DSC_INFO] {len(known_faces_data)} representações de rostos carregadas.")
+        print(f"[DSC_INFO] {len(known_faces_data)} pessoas carregadas ({sum(f['photo_count'] for f in known_faces_data)} fotos).")
     return known_faces_data
 
+def _detect_faces(frame, engine, max_side, min_confidence):
+    # Retorna [((x, y, w, h), rosto recortado)] acima de min_confidence.
+    # Frames maiores que max_side são detectados numa cópia reduzida;
+    # caixas e olhos voltam para a escala original e o recorte sai do frame completo.
+    # engine 'deepface' (ou detector nativo indisponível) usa DeepFace.extract_faces.
+    detector = get_face_detector(engine)
+    if detector is not None:
+        return _detect_faces_native(frame, detector, max_side, min_confidence)
+    proxy, scale = make_detection_proxy(frame, max_side)
+    faces_info = DeepFace.extract_faces(
+        img_path=proxy,
+        detector_backend=config.DSC_DETECTION_MODEL,
+        enforce_detection=False,
+        align=scale == 1.0
+    )
+    detections = []
+    for face_info in faces_info:
+        if face_info['confidence'] < min_confidence:
+            continue
+        area = face_info['facial_area']
+        box = (area['x'], area['y'], area['w'], area['h'])
+        if scale == 1.0:
+            detections.append((box, face_info['face']))
+            continue
+        box = scale_box(box, scale, frame.shape)
+        crop = crop_face(frame, box, scale_point(area.get('left_eye'), scale), scale_point(area.get('right_eye'), scale))
+        if crop.size > 0:
+            detections.append((box, to_face_input(crop)))
+    return detections
+
+def _detect_faces_native(frame, detector, max_side, min_confidence):
+    # Mesmo resultado de _detect_faces direto no OpenCV (YuNet/SSD/Haar), sem as conversões do
+    # extract_faces; com os landmarks do YuNet o recorte sai alinhado pelos olhos
+    proxy, scale = make_detection_proxy(frame, max_side)
+    detections = []
+    for face in detector.detect(proxy):
+        if face.score < min_confidence:
+            continue
+        box = scale_box(face.box, scale, frame.shape)
+        left_eye, right_eye = face.eyes()
+        crop = crop_face(frame, box, scale_point(left_eye, scale), scale_point(right_eye, scale))
+        if crop.size > 0:
+            detections.append((box, to_face_input(crop)))
+    return detections
+
+def _embed_face(face_crop):
+    if face_crop.size == 0:
+        return None
+    try:
+        representation = DeepFace.represent(
+            img_path=face_crop,
+            model_name=config.DSC_RECOGNITION_MODEL,
+            detector_backend='skip',
+            enforce_detection=False,
+            align=False
+        )
+        if representation and representation[0].get('embedding'):
+            return representation[0]['embedding']
+    except Exception as e:
+        print(f"[DSC_ERRO_REP] {e}")
+    return None
+
+def _get_embedder():
+    if SESSION_CACHE["embedder"] is None:
+        SESSION_CACHE["embedder"] = BatchEmbedder(
+            DeepFace.build_model(config.DSC_RECOGNITION_MODEL),
+            fallback_fn=_embed_face,
+            max_batch_size=config.DSC_EMBEDDING_BATCH_SIZE
+        )
+    return SESSION_CACHE["embedder"]
+
+def _create_tracker():
+    return FaceTracker(
+        iou_threshold=config.DSC_TRACK_IOU_THRESHOLD,
+        max_misses=config.DSC_TRACK_MAX_MISSES,
+        confidence_decay=config.DSC_TRACK_CONFIDENCE_DECAY,
+        min_confidence=config.DSC_TRACK_MIN_CONFIDENCE,
+        reverify_seconds=config.DSC_TRACK_REVERIFY_SECONDS,
+        vote_window=config.DSC_TRACK_VOTE_WINDOW
+    )
+
+def _create_scheduler():
+    budget_ms = config.DSC_SCHEDULER_FRAME_BUDGET_MS
+    if budget_ms == 0 and config.DSC_SCHEDULER_TARGET_FPS > 0:
+        budget_ms = 1000.0 / config.DSC_SCHEDULER_TARGET_FPS
+    return FrameScheduler(
+        target_fps=config.DSC_SCHEDULER_TARGET_FPS,
+        max_staleness=config.DSC_SCHEDULER_MAX_STALENESS,
+        frame_budget=budget_ms / 1000.0 if budget_ms else None
+    )
+
+def _create_motion_gate():
+    # Um portão por câmera; o modo de baixo consumo é ligado ao grabber com _attach_low_power
+    return MotionGate(
+        width=config.DSC_MOTION_WIDTH,
+        pixel_threshold=config.DSC_MOTION_PIXEL_THRESHOLD,
+        min_changed=config.DSC_MOTION_MIN_AREA,
+        idle_after=config.DSC_IDLE_AFTER_SECONDS,
+        recheck_seconds=config.DSC_MOTION_RECHECK_SECONDS
+    )
+
+def _create_presence_gate():
+    # Portão guiado pelo HC-SR04; None sem PRESENCE_SENSOR_PORT configurada
+    if not config.PRESENCE_SENSOR_PORT:
+        return None
+    sensor = PresenceSensor(
+        config.PRESENCE_SENSOR_PORT,
+        baudrate=config.PRESENCE_SENSOR_BAUDRATE,
+        presence_distance=config.PRESENCE_DISTANCE_CM,
+        enter_samples=config.PRESENCE_ENTER_SAMPLES,
+        leave_samples=config.PRESENCE_LEAVE_SAMPLES,
+        hold_seconds=config.PRESENCE_HOLD_SECONDS,
+        stale_after=config.PRESENCE_STALE_SECONDS
+    )
+    return PresenceGate(sensor)
+
+def _create_session_gate():
+    # O sensor de presença, quando configurado, substitui o portão de movimento
+    gate = _create_presence_gate()
+    if gate is None and config.DSC_MOTION_GATE:
+        gate = _create_motion_gate()
+    return gate
+
+def _attach_low_power(gate, *grabbers):
+    # Um portão pode comandar vários grabbers (sensor de presença compartilhado pelas câmeras)
+    switches = [low_power_switch(grabber, config.DSC_IDLE_CAPTURE_FPS, config.DSC_IDLE_CAPTURE_SIZE, log=i == 0) for i, grabber in enumerate(grabbers)]
+    if len(switches) == 1:
+        gate.on_idle, gate.on_wake = switches[0]
+        return
+    def on_idle():
+        for switch_idle, _switch_wake in switches:
+            switch_idle()
+    def on_wake():
+        for _switch_idle, switch_wake in switches:
+            switch_wake()
+    gate.on_idle, gate.on_wake = on_idle, on_wake
+
+def _recognition_priority(track, box):
+    # Trilhas ainda sem reconhecimento primeiro, depois os rostos maiores (mais perto da câmera)
+    return (track.last_verified is not None, -(box[2] * box[3]))
+
+def _recognize_faces(frame, gallery, tracker=None, embedder=None, scheduler=None):
+    # Retorna [(entrada da galeria ou None, (x, y, w, h))] para os rostos do frame.
+    # Com um FaceTracker, só trilhas novas/incertas passam por embedding + matching
+    # e a identidade exibida é a mais votada da trilha.
+    return _recognize_frames([frame], gallery, [tracker], embedder, scheduler)[0]
+
+def _recognize_frames(frames, gallery, trackers, embedder=None, scheduler=None):
+    # Mesmo que _recognize_faces para vários frames (um por câmera, cada um com seu rastreador):
+    # a detecção é por frame, mas os rostos pendentes de todos vão numa única passada do
+    # modelo e num único matching contra a galeria. Retorna uma lista de resultados por frame.
+    # Com um FrameScheduler e rastreadores, só os rostos que cabem no orçamento do frame são
+    # embedados; os demais continuam pendentes na trilha e entram nos frames seguintes.
+    frame_started = time.monotonic()
+    detection_settings = _detection_settings()
+    detections_per_frame, tracks_per_frame, targets = [], [], []
+    for f, (frame, tracker) in enumerate(zip(frames, trackers)):
+        try:
+            started = METRICS.start()
+            detections = _detect_faces(frame, *detection_settings)
+            METRICS.stop("detect", started)
+        except Exception as e:
+            print(f"[DSC_ERRO_EXTRACT] {e}")
+            detections = []
+        detections_per_frame.append(detections)
+
+        if tracker is None:
+            tracks = None
+            frame_targets = [(i, None, crop) for i, (_box, crop) in enumerate(detections)]
+        else:
+            with tracker.lock:
+                tracks = tracker.update([box for box, _ in detections])
+            frame_targets = [(i, track, crop) for i, (track, (_box, crop)) in enumerate(zip(tracks, detections)) if tracker.needs_recognition(track)]
+        tracks_per_frame.append(tracks)
+        targets.extend((f, i, track, crop) for i, track, crop in frame_targets if gallery and detections[i][0][2] > 0 and detections[i][0][3] > 0)
+
+    if scheduler is not None and len(targets) > 1 and all(track is not None for _f, _i, track, _crop in targets):
+        targets.sort(key=lambda t: _recognition_priority(t[2], detections_per_frame[t[0]][t[1]][0]))
+        targets = targets[:scheduler.face_quota(frame_started, len(targets))]
+
+    crops = [crop for _f, _i, _track, crop in targets]
+    # Todos os rostos pendentes numa única passada do modelo
+    started = METRICS.start()
+    embed_started = time.monotonic()
+    face_embeddings = embedder.embed(crops) if embedder is not None else [_embed_face(crop) for crop in crops]
+    if scheduler is not None:
+        scheduler.record_faces(len(crops), time.monotonic() - embed_started)
+    METRICS.stop("embed", started)
+    pending, embeddings = [], []
+    for (f, i, track, _crop), embedding in zip(targets, face_embeddings):
+        if embedding is not None:
+            pending.append((f, i, track))
+            embeddings.append(embedding)
+    started = METRICS.start()
+    matches = gallery.match(embeddings, config.DSC_SIMILARITY_THRESHOLD) if gallery else []
+    METRICS.stop("match", started)
+
+    results = []
+    for f, (detections, tracks, tracker) in enumerate(zip(detections_per_frame, tracks_per_frame, trackers)):
+        frame_matches = [(i, track, match, distance) for (pf, i, track), (match, distance) in zip(pending, matches) if pf == f]
+        if tracker is None:
+            matched = {i: match for i, _track, match, _distance in frame_matches}
+            results.append([(matched.get(i), box) for i, (box, _crop) in enumerate(detections)])
+            continue
+        with tracker.lock:
+            for _i, track, match, distance in frame_matches:
+                tracker.record_identity(track, match, distance, config.DSC_SIMILARITY_THRESHOLD)
+        results.append([(track.identity, track.box) for track in tracks])
+    return results
+
+def _build_gallery(known_faces, index_path):
+    gallery = FaceGallery(known_faces, rerank_top_k=config.DSC_TEMPLATE_RERANK_TOP_K, storage=config.DSC_GALLERY_STORAGE)
+    return _attach_gallery_index(gallery, index_path)
+
+def _attach_gallery_index(gallery, index_path, read_only=False):
+    attach_index(
+        gallery,
+        config.DSC_ANN_BACKEND,
+        index_path,
+        min_size=config.DSC_ANN_MIN_GALLERY_SIZE,
+        read_only=read_only,
+        **config.DSC_ANN_PARAMS
+    )
+    return gallery
+
+# --- Backend de inferência em processos (executado dentro de cada worker) ---
+def _process_worker_init(gallery_state, index_path, machine_profile=None):
+    # O processo novo reimporta o config com os padrões: aplica o perfil da máquina recebido.
+    # Sem perfil vale o que já estiver na sessão (no mesmo processo) ou os padrões do config.
+    if machine_profile is not None:
+        apply_machine_profile(machine_profile)
+    DeepFace.build_model(config.DSC_RECOGNITION_MODEL)
+    # Mesmos vetores do processo principal (sem requantizar): o índice salvo por ele é só lido
+    gallery = _attach_gallery_index(FaceGallery.from_state(gallery_state), index_path, read_only=True)
+    return {
+        "gallery": gallery,
+        "embedder": _get_embedder(),
+        "index_of": {id(entry): i for i, entry in enumerate(gallery.entries)}
+    }
+
+def _process_worker_frame(frame, state):
+    # Devolve índices da galeria em vez das entradas para o resultado ser pequeno ao serializar
+    faces = _recognize_faces(frame, state["gallery"], None, state["embedder"])
+    return [(state["index_of"][id(match)] if match is not None else None, tuple(int(v) for v in box)) for match, box in faces]
+
+# --- Atualização da galeria com a sessão rodando ---
+def _make_gallery_updater(gallery, faces_path, info_path, person_info):
+    store = _get_embedding_store(faces_path)
+
+    def build_entry(person_id, photo_paths, person_data):
+        entry = _build_person_entry(person_id, photo_paths, person_data, store)
+        store.save()
+        return entry
+
+    updater = GalleryUpdater(gallery, faces_path, info_path, lambda path: _load_person_info(path, force_reload=True), build_entry)
+    updater.prime(person_info)
+    return updater
+
+def _start_gallery_watcher(updater, trackers):
+    def on_change():
+        # Trilhas antigas podem votar em versões substituídas/removidas: recomeça o rastreio
+        for tracker in trackers:
+            with tracker.lock:
+                tracker.reset()
+
+    watcher = GalleryWatcher(updater, interval=config.DSC_GALLERY_WATCH_INTERVAL, on_change=on_change)
+    watcher.start()
+    SESSION_CACHE["gallery_watcher"] = watcher
+
+def _stop_gallery_watcher():
+    watcher = SESSION_CACHE["gallery_watcher"]
+    SESSION_CACHE["gallery_watcher"] = None
+    if watcher is not None:
+        watcher.stop()
+
+def notify_gallery_change(person_id=None):
+    # Chamado pelo DeepSave após salvar uma foto: a sessão DeepScan aberta (se houver)
+    # embeda só essa pessoa e a reconhece em seguida, sem reiniciar
+    watcher = SESSION_CACHE["gallery_watcher"]
+    if watcher is not None:
+        watcher.notify(person_id)
+
+# --- Pré-aquecimento em segundo plano (disparado no login) ---
+def _warm_recognition_model():
+    DeepFace.build_model(config.DSC_RECOGNITION_MODEL)
+    SESSION_CACHE["models_loaded"] = True
+    # Uma passada com um rosto vazio inicializa o grafo do modelo antes do primeiro frame real
+    _get_embedder().embed([np.zeros((64, 64, 3), dtype=np.float32)])
+
+def _warm_detector():
+    # Carrega (e na primeira execução baixa) os pesos do detector com um frame preto
+    detector = get_face_detector(_detection_settings()[0])
+    if detector is not None:
+        detector.detect(np.zeros((config.DSC_WINDOW_HEIGHT // 4, config.DSC_WINDOW_WIDTH // 4, 3), dtype=np.uint8))
+        return
+    DeepFace.extract_faces(
+        img_path=np.zeros((config.DSC_WINDOW_HEIGHT // 4, config.DSC_WINDOW_WIDTH // 4, 3), dtype=np.uint8),
+        detector_backend=config.DSC_DETECTION_MODEL,
+        enforce_detection=False
+    )
+
+# --- Autoajuste do detector por máquina ---
+def _autotune_frames():
+    # Ruído no tamanho da janela: o custo do YuNet/SSD quase não depende do conteúdo, e assim a
+    # calibração não precisa abrir a câmera
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (config.DSC_WINDOW_HEIGHT, config.DSC_WINDOW_WIDTH, 3), dtype=np.uint8) for _ in range(3)]
+
+def _measure_detection(candidate, frames):
+    # Mediana em segundos de _detect_faces com o detector/resolução do candidato; None se indisponível
+    engine = candidate["engine"]
+    if (engine == "deepface" and not DEEPFACE_AVAILABLE) or (engine != "deepface" and get_face_detector(engine) is None):
+        return None
+    settings = (engine, candidate["max_side"], _candidate_confidence(engine))
+    _detect_faces(frames[0], *settings)
+    timings = []
+    for i in range(config.AUTOTUNE_FRAMES):
+        started = time.perf_counter()
+        _detect_faces(frames[i % len(frames)], *settings)
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings))
+
+def _candidate_confidence(engine):
+    return config.AUTOTUNE_MIN_FACE_CONFIDENCE.get(engine, config.DSC_MIN_FACE_CONFIDENCE)
+
+def apply_machine_profile(profile):
+    # O perfil vale para a sessão (SESSION_CACHE); o config fica com os padrões
+    SESSION_CACHE["machine_profile"] = profile
+    print(f"[DSC_INFO] Perfil da máquina: detector '{profile['engine']}' a {profile['max_side']}px ({profile['detect_ms']:.1f} ms por frame).")
+
+def calibrate_machine(force=False):
+    # Aplica o perfil salvo desta máquina; sem perfil (ou com force) mede os detectores e
+    # resoluções de AUTOTUNE_* contra AUTOTUNE_TARGET_FPS e grava o escolhido
+    path = utils.get_resource_path(config.AUTOTUNE_PROFILE_FILENAME)
+    fingerprint = machine_fingerprint(extra=(cv2.__version__,))
+    profile = None if force else load_profile(path, fingerprint)
+    if profile is None:
+        print("[DSC_INFO] Calibrando o detector para esta máquina...")
+        budget = config.AUTOTUNE_DETECTION_BUDGET / config.AUTOTUNE_TARGET_FPS
+        candidates = [{"engine": engine, "max_side": max_side} for engine in config.AUTOTUNE_ENGINES for max_side in config.AUTOTUNE_MAX_SIDES]
+        frames = _autotune_frames()
+        chosen, seconds, results = calibrate(candidates, lambda candidate: _measure_detection(candidate, frames), budget)
+        if chosen is None:
+            print("[DSC_AVISO] Autoajuste: nenhum detector disponível; mantendo a configuração padrão.")
+            return None
+        if seconds > budget:
+            print(f"[DSC_AVISO] Nenhuma opção atinge {config.AUTOTUNE_TARGET_FPS} FPS nesta máquina; usando a mais rápida.")
+        profile = {
+            **chosen,
+            "min_face_confidence": _candidate_confidence(chosen["engine"]),
+            "detect_ms": seconds * 1000.0,
+            "target_fps": config.AUTOTUNE_TARGET_FPS,
+            "measured": [{**candidate, "detect_ms": round(s * 1000.0, 2)} for candidate, s in results],
+            "calibrated_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        try:
+            save_profile(path, fingerprint, profile)
+        except OSError as e:
+            print(f"[DSC_AVISO] Não foi possível salvar o perfil da máquina: {e}")
+    apply_machine_profile(profile)
+    return profile
+
+def recalibrate_machine():
+    # Configurações > Calibrar desempenho. O aquecimento do login também calibra: espera ele
+    # terminar para as duas medições não disputarem a CPU nem o perfil da sessão
+    warmup = SESSION_CACHE["warmup"]
+    if warmup is not None and not warmup.is_done():
+        print("[DSC_INFO] Aguardando o pré-carregamento terminar antes de calibrar...")
+        warmup.wait()
+    detector_key = _enrollment_detector_key()
+    profile = calibrate_machine(force=True)
+    if _enrollment_detector_key() != detector_key:
+        # A galeria foi embedada com o detector anterior: a próxima sessão a recarrega
+        SESSION_CACHE["prepared"] = None
+        SESSION_CACHE["embeddings"] = []
+    return profile
+
+def _ensure_machine_profile():
+    if config.AUTOTUNE_ENABLED and SESSION_CACHE["machine_profile"] is None:
+        calibrate_machine()
+
+def _prepare_gallery(user_email):
+    # Carrega a galeria do usuário e a guarda (com o atualizador) para as sessões seguintes
+    faces_path, info_path = utils.get_user_specific_paths(user_email)
+    person_info = _load_person_info(info_path, force_reload=True)
+    entries = _load_known_faces(faces_path, person_info, force_reload=True)
+    index_path = os.path.join(os.path.dirname(faces_path), config.DSC_ANN_INDEX_FILENAME)
+    gallery = _build_gallery(entries, index_path)
+    # Os vetores passam a existir só no armazenamento compacto da galeria
+    SESSION_CACHE["embeddings"] = []
+    SESSION_CACHE["prepared"] = {
+        "user_email": user_email,
+        "gallery": gallery,
+        "index_path": index_path,
+        "updater": _make_gallery_updater(gallery, faces_path, info_path, person_info)
+    }
+
+def start_warmup(user_email):
+    # Chamado logo após o login. Não faz nada sem DeepFace ou se já está aquecendo para o mesmo usuário.
+    if not DEEPFACE_AVAILABLE or not user_email:
+        return None
+    warmup = SESSION_CACHE["warmup"]
+    if warmup is not None and warmup.user_email == user_email and (warmup.is_alive() or not warmup.errors):
+        return warmup
+    warmup = WarmupWorker([
+        ("Modelo de reconhecimento", _warm_recognition_model),
+        ("Calibração do detector", _ensure_machine_profile),
+        ("Detector de rostos", _warm_detector),
+        ("Galeria de rostos", lambda: _prepare_gallery(user_email))
+    ], name="deepscan_warmup")
+    warmup.user_email = user_email
+    SESSION_CACHE["warmup"] = warmup
+    warmup.start()
+    return warmup
+
+def warmup_status():
+    # (fração 0..1, etapa atual ou None, concluído) para a interface; None se não há aquecimento
+    warmup = SESSION_CACHE["warmup"]
+    if warmup is None:
+        return None
+    fraction, step = warmup.progress()
+    return fraction, step, warmup.is_done()
+
+def is_warm(user_email):
+    warmup = SESSION_CACHE["warmup"]
+    return warmup is not None and warmup.user_email == user_email and warmup.is_done() and not warmup.errors
+
+def _get_prepared_gallery(user_email):
+    # Espera o aquecimento em andamento e devolve a galeria pronta do usuário. Ela é mantida
+    # entre sessões: cada nova sessão só sincroniza as mudanças em Rostos/ e inforos.txt.
+    warmup = SESSION_CACHE["warmup"]
+    if warmup is not None and warmup.user_email == user_email and not warmup.is_done():
+        print("[DSC_INFO] Aguardando o pré-carregamento terminar...")
+        warmup.wait()
+    prepared = SESSION_CACHE["prepared"]
+    if prepared is None or prepared["user_email"] != user_email:
+        return None
+    return prepared
+
+def _get_label_font():
+    # Fonte TTF carregada uma vez por sessão; False quando indisponível (usa cv2.putText)
+    if SESSION_CACHE["pillow_font"] is None:
+        SESSION_CACHE["pillow_font"] = False
+        font_path = utils.get_resource_path(os.path.join(config.DSC_SUBFOLDER_FONTS, config.DSC_FONT_FILENAME))
+        if PIL_AVAILABLE and os.path.exists(font_path):
+            try:
+                SESSION_CACHE["pillow_font"] = ImageFont.truetype(font_path, config.DSC_LABEL_FONT_SIZE)
+            except Exception as e:
+                print(f"[DSC_AVISO] Falha ao carregar fonte TTF: {e}")
+    return SESSION_CACHE["pillow_font"]
+
 def _draw_face_info(frame, face_data, x, y, w, h, is_identified):
-    # ... (Lógica de desenho mantida, mas simplificada para focar na estrutura)
     # Esta função desenha o retângulo e o nome na imagem
     name_display = "Desconhecido"
     box_color = (0, 0, 255) # Vermelho para desconhecido
@@ -116,12 +663,187 @@ def _draw_face_info(frame, face_data, x, y, w, h, is_identified):
         text_color = (0, 255, 0)
 
     cv2.rectangle(frame, (x, y), (x + w, y + h), box_color, 2)
-    
-    # Lógica para desenhar texto com Pillow (melhor para acentos) ou OpenCV
+
+    # Pillow (melhor para acentos) via sprite em cache, mesclado só na região do texto
+    font = _get_label_font()
+    if font:
+        sprite = LABEL_SPRITES.get(name_display, font, text_color)
+        y_text = y - sprite.height - config.DSC_LABEL_PADDING
+        if y_text <= config.DSC_LABEL_PADDING:
+            y_text = y + h + config.DSC_LABEL_PADDING
+        blend_sprite(frame, sprite, x, y_text)
+        return
     y_text = y - 10 if y - 10 > 10 else y + h + 20
     cv2.putText(frame, name_display, (x, y_text), cv2.FONT_HERSHEY_SIMPLEX, 0.6, text_color, 2)
 
 
+def _draw_source_label(frame, name, alive=True):
+    # Nome da câmera no canto da imagem; "SEM SINAL" quando a fonte parou de entregar frames
+    text = name if alive else f"{name} - SEM SINAL"
+    color = (255, 255, 255) if alive else (0, 0, 255)
+    cv2.putText(frame, text, (8, 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 4)
+    cv2.putText(frame, text, (8, 22), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+
+def _camera_sources():
+    # [(nome, fonte)] de DSC_CAMERA_SOURCES; fontes sem nome viram "cam1", "cam2", ...
+    sources = []
+    for i, source in enumerate(config.DSC_CAMERA_SOURCES or [0]):
+        name, source = source if isinstance(source, (tuple, list)) else (f"cam{i + 1}", source)
+        sources.append((str(name), source))
+    return sources
+
+def _run_multi_camera_session(user_email, sources, gallery, updater):
+    # Uma sessão, várias câmeras: um grabber por fonte, um rastreador por fonte e uma única
+    # inferência em lote sobre o modelo e a galeria já carregados. A exibição é um mosaico
+    # (DSC_MULTI_CAMERA_VIEW = 'tiled') ou uma janela por câmera ('windows').
+    captures, names = [], []
+    for name, source in sources:
+        cap = cv2.VideoCapture(source)
+        if cap.isOpened():
+            captures.append(cap)
+            names.append(name)
+        else:
+            print(f"[DSC_AVISO] Câmera '{name}' ({source}) não abriu; a sessão segue sem ela.")
+    if not captures:
+        messagebox.showerror("DeepScan - Erro", "Não foi possível abrir nenhuma das câmeras configuradas.")
+        return
+    if config.DSC_INFERENCE_BACKEND == "processes":
+        print("[DSC_AVISO] Multicâmera usa o backend 'threads' (um modelo compartilhado por todas as câmeras).")
+
+    tiled = config.DSC_MULTI_CAMERA_VIEW != "windows"
+    windows = [config.DSC_APP_WINDOW_NAME] if tiled else [f"{config.DSC_APP_WINDOW_NAME} - {name}" for name in names]
+    for window in windows:
+        cv2.namedWindow(window, cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(window, config.DSC_WINDOW_WIDTH, config.DSC_WINDOW_HEIGHT)
+    print(f"\n[DSC_INFO] {len(captures)} câmeras: {', '.join(names)}. Pressione Q ou E para sair.")
+
+    METRICS.reset()
+    exporter = start_exporter(METRICS, utils.get_metrics_export_path(config.DSC_METRICS_EXPORT_PATH), config.METRICS_EXPORT_INTERVAL)
+    trackers = [_create_tracker() for _ in captures]
+    embedder = _get_embedder()
+    if config.DSC_GALLERY_LIVE_UPDATES:
+        _start_gallery_watcher(updater, trackers)
+
+    scheduler = _create_scheduler()
+    presence = _create_presence_gate()
+    if presence is not None:
+        # Um sensor na porta vale para todas as câmeras: um só portão, que põe todas em baixo consumo
+        gates = [presence] * len(captures)
+    else:
+        gates = [_create_motion_gate() if config.DSC_MOTION_GATE else None for _ in captures]
+    present = [set() for _ in captures]
+    face_counts = [0] * len(captures)
+    def process(batch):
+        # Câmeras sem movimento nem rostos ficam fora do lote: resultado vazio e trilhas envelhecendo
+        active = []
+        for i, frame in batch:
+            if gates[i] is None or gates[i].should_detect(frame, faces_present=face_counts[i] > 0):
+                active.append((i, frame))
+            else:
+                with trackers[i].lock:
+                    trackers[i].update([])
+        recognized = _recognize_frames([frame for _, frame in active], gallery, [trackers[i] for i, _ in active], embedder, scheduler) if active else []
+        faces_by_source = {i: faces for (i, _frame), faces in zip(active, recognized)}
+        results = []
+        for i, _frame in batch:
+            faces = faces_by_source.get(i, [])
+            face_counts[i] = len(faces)
+            # Registro por câmera de quem acabou de aparecer nela
+            identified = {face_data["person_id"]: face_data for face_data, _box in faces if face_data is not None}
+            for person_id in identified.keys() - present[i]:
+                print(f"[DSC_INFO] [{names[i]}] {identified[person_id]['person_data'][0].strip()} ({person_id}) identificado.")
+            present[i] = set(identified)
+            results.append(faces)
+        return results
+
+    pipeline = MultiCameraPipeline([TimedCapture(cap, METRICS) for cap in captures], process, scheduler=scheduler)
+    if presence is not None:
+        _attach_low_power(presence, *pipeline.grabbers)
+        presence.start()
+    else:
+        for gate, grabber in zip(gates, pipeline.grabbers):
+            if gate is not None:
+                _attach_low_power(gate, grabber)
+    pipeline.start()
+
+    mosaic = MosaicCanvas(config.DSC_WINDOW_WIDTH, config.DSC_WINDOW_HEIGHT, len(captures), config.DSC_MULTI_CAMERA_COLUMNS) if tiled else None
+    display_buffers = [FrameBuffer() for _ in captures]
+    last_result_ids = [0] * len(captures)
+    views = [None] * len(captures)
+    lost = set()
+    running = True
+    while running and pipeline.is_running:
+        updates = pipeline.wait_frames()
+        # Câmera que caiu: a última imagem fica na tela com o aviso
+        newly_lost = [i for i in range(len(captures)) if i not in lost and views[i] is not None and not pipeline.source_alive(i)]
+        for i in newly_lost:
+            lost.add(i)
+            print(f"[DSC_AVISO] Câmera '{names[i]}' sem sinal.")
+            _draw_source_label(views[i], names[i], alive=False)
+            if not tiled:
+                cv2.imshow(windows[i], views[i])
+        if updates:
+            frame_started = METRICS.start()
+            for i, _frame_id, frame in updates:
+                result_id, faces = pipeline.latest_results(i)
+                if result_id != last_result_ids[i]:
+                    last_result_ids[i] = result_id
+                    METRICS.tick("inference")
+                started = METRICS.start()
+                if tiled:
+                    # Os rostos vêm nas coordenadas do frame: escala para a célula do mosaico
+                    tile = mosaic.tiles[i]
+                    view = tile.render(frame)
+                    sx, sy = tile.scale
+                    for face_data, (x, y, w, h) in faces or []:
+                        _draw_face_info(view, face_data, int(x * sx), int(y * sy), int(w * sx), int(h * sy), is_identified=face_data is not None)
+                else:
+                    view = display_buffers[i].copy(frame)
+                    for face_data, (x, y, w, h) in faces or []:
+                        _draw_face_info(view, face_data, x, y, w, h, is_identified=face_data is not None)
+                _draw_source_label(view, names[i])
+                views[i] = view
+                METRICS.stop("draw", started)
+                if not tiled:
+                    started = METRICS.start()
+                    cv2.imshow(windows[i], view)
+                    METRICS.stop("imshow", started)
+            if tiled:
+                if config.METRICS_OVERLAY:
+                    draw_metrics_overlay(mosaic.canvas, METRICS, ("capture", "detect", "embed", "match", "imshow"), ("display", "inference"))
+                started = METRICS.start()
+                cv2.imshow(windows[0], mosaic.canvas)
+                METRICS.stop("imshow", started)
+            METRICS.stop("frame", frame_started)
+            METRICS.tick("display")
+        elif tiled and newly_lost:
+            cv2.imshow(windows[0], mosaic.canvas)
+
+        key = cv2.waitKey(1) & 0xFF
+        if key in [ord('q'), ord('e')]:
+            running = False
+        try:
+            if any(cv2.getWindowProperty(window, cv2.WND_PROP_VISIBLE) < 1 for window in windows):
+                running = False
+        except cv2.error:
+            running = False
+
+    pipeline.stop()
+    if exporter is not None:
+        exporter.stop()
+    _stop_gallery_watcher()
+    for cap in captures:
+        cap.release()
+    cv2.destroyAllWindows()
+    for _ in range(5): cv2.waitKey(1)
+    print(f"[DSC_INFO] Agendador: {scheduler.summary()}.")
+    if presence is not None:
+        presence.close()
+        print(f"[DSC_INFO] Sensor de presença: {presence.skipped} detecções evitadas.")
+    elif any(gates):
+        print(f"[DSC_INFO] Portão de movimento: {sum(gate.skipped for gate in gates if gate is not None)} detecções evitadas.")
+    print(f"[DSC_INFO] Sessão DeepScan multicâmera encerrada para '{user_email}'.")
+
 def execute_recognition_session(user_email):
     if not DEEPFACE_AVAILABLE:
         messagebox.showerror("DeepScan - Erro", "A biblioteca DeepFace não está instalada.")
@@ -133,6 +855,11 @@ def execute_recognition_session(user_email):
     faces_path, info_path = utils.get_user_specific_paths(user_email)
     print(f"[DeepScan] Iniciando para: {user_email}")
 
+    # Galeria e modelos já carregados pelo aquecimento do login: só aplica o que mudou desde então
+    prepared = _get_prepared_gallery(user_email)
+    # Detector e resolução do perfil desta máquina (calibra agora se for a primeira execução)
+    _ensure_machine_profile()
+
     # Pré-carregamento de modelos
     if not SESSION_CACHE["models_loaded"]:
         try:
@@ -144,16 +871,31 @@ def execute_recognition_session(user_email):
             messagebox.showerror("DeepScan - Erro", f"Erro ao carregar modelos: {e}")
             return
 
-    # Carregar dados do usuário (forçando recarregamento a cada sessão)
-    person_info = _load_person_info(info_path, force_reload=True)
-    known_embeddings = _load_known_faces(faces_path, person_info, force_reload=True)
+    if prepared is not None:
+        gallery, updater = prepared["gallery"], prepared["updater"]
+        updater.sync()
+        known_embeddings = gallery.entries
+        index_path = prepared["index_path"]
+    else:
+        # Sem aquecimento: carrega agora e guarda a galeria para as próximas sessões
+        _prepare_gallery(user_email)
+        prepared = SESSION_CACHE["prepared"]
+        gallery, updater = prepared["gallery"], prepared["updater"]
+        known_embeddings = gallery.entries
+        index_path = prepared["index_path"]
 
     if not known_embeddings:
         msg = "Nenhum rosto conhecido foi carregado. Todos serão marcados como 'Desconhecido'."
         messagebox.showwarning("DeepScan - Sem Dados", msg)
         print(f"[DSC_AVISO] {msg}")
+    SESSION_CACHE["gallery"] = gallery
+
+    sources = _camera_sources()
+    if len(sources) > 1:
+        _run_multi_camera_session(user_email, sources, gallery, updater)
+        return
 
-    cap = cv2.VideoCapture(0)
+    cap = cv2.VideoCapture(sources[0][1])
     if not cap.isOpened():
         messagebox.showerror("DeepScan - Erro", "Não foi possível abrir a webcam.")
         return
@@ -162,47 +904,81 @@ def execute_recognition_session(user_email):
     cv2.resizeWindow(config.DSC_APP_WINDOW_NAME, config.DSC_WINDOW_WIDTH, config.DSC_WINDOW_HEIGHT)
     
     print(f"\n[DSC_INFO] Pressione Q ou E para sair.")
-    
-    running = True
-    while running:
-        ret, frame = cap.read()
-        if not ret: break
 
-        try:
-            # Usa a função find para uma abordagem mais direta e otimizada
-            found_faces = DeepFace.find(
-                img_path=frame,
-                db_path=faces_path,
-                model_name=config.DSC_RECOGNITION_MODEL,
-                detector_backend=config.DSC_DETECTION_MODEL,
-                distance_metric='cosine',
-                enforce_detection=False,
-                silent=True
-            )
-
-            # DeepFace.find retorna uma lista de DataFrames, um para cada rosto detectado
-            for df in found_faces:
-                if not df.empty:
-                    # Pega a melhor correspondência (menor distância)
-                    best_match = df.iloc[0]
-                    identity_path = best_match['identity']
-                    
-                    # Extrai o ID do arquivo (ex: '.../Rostos/001.jpg' -> '001')
-                    match_id = re.search(r"(\d{3})", os.path.basename(identity_path))
-                    if match_id:
-                        person_id = match_id.group(1).upper()
-                        person_data = {"person_data": person_info.get(person_id, ("Desconhecido", ""))}
-                        
-                        # Pega as coordenadas do rosto detectado
-                        x, y, w, h = best_match['source_x'], best_match['source_y'], best_match['source_w'], best_match['source_h']
-                        _draw_face_info(frame, person_data, x, y, w, h, is_identified=True)
+    METRICS.reset()
+    exporter = start_exporter(METRICS, utils.get_metrics_export_path(config.DSC_METRICS_EXPORT_PATH), config.METRICS_EXPORT_INTERVAL)
+    timed_cap = TimedCapture(cap, METRICS)
 
-        except Exception as e:
-            # Se DeepFace.find falhar (ex: nenhum rosto detectado), apenas continue
-            pass
+    # Captura, inferência e exibição em estágios: a janela segue na taxa da câmera
+    # enquanto o reconhecimento roda na velocidade que a CPU permitir
+    gate = None
+    if config.DSC_INFERENCE_BACKEND == "processes":
+        # Cada processo carrega o próprio modelo; os frames chegam por memória compartilhada.
+        # Portão e ritmo ficam neste processo, na entrada do pool, como no backend de threads
+        gate = _create_session_gate()
+        pipeline = ProcessRecognitionPipeline(
+            timed_cap,
+            _process_worker_init,
+            _process_worker_frame,
+            init_args=(gallery.export_state(), index_path, SESSION_CACHE["machine_profile"]),
+            num_workers=config.DSC_PROCESS_WORKERS,
+            decode_fn=lambda result: [(gallery.entries[i] if i is not None else None, box) for i, box in result],
+            gate=gate,
+            scheduler=_create_scheduler()
+        )
+        if gate is not None:
+            _attach_low_power(gate, pipeline.grabber)
+            if isinstance(gate, PresenceGate):
+                gate.start()
+        pipeline.start()
+    else:
+        tracker = _create_tracker()
+        embedder = _get_embedder()
+        scheduler = _create_scheduler()
+        if config.DSC_GALLERY_LIVE_UPDATES:
+            _start_gallery_watcher(updater, [tracker])
+        recognize = lambda frame: _recognize_faces(frame, gallery, tracker, embedder, scheduler)
+        # Portão (sensor de presença ou movimento) na frente da detecção; o modo ocioso age sobre o grabber do pipeline
+        gate = _create_session_gate()
+        pipeline = RecognitionPipeline(
+            timed_cap,
+            gated(recognize, gate, tracker) if gate is not None else recognize,
+            num_workers=config.DSC_PIPELINE_WORKERS,
+            queue_size=config.DSC_PIPELINE_QUEUE_SIZE,
+            scheduler=scheduler
+        )
+        if gate is not None:
+            _attach_low_power(gate, pipeline.grabber)
+            if isinstance(gate, PresenceGate):
+                gate.start()
+        pipeline.start()
+
+    display_buffer = FrameBuffer()
+    last_result_id = 0
+    running = True
+    while running and pipeline.is_running:
+        item = pipeline.wait_frame()
+        if item is not None:
+            frame_started = METRICS.start()
+            _frame_id, frame = item
+            # O frame é compartilhado com o worker de inferência: desenha numa cópia reaproveitada
+            display_frame = display_buffer.copy(frame)
+            result_id, faces = pipeline.latest_results()
+            if result_id != last_result_id:
+                last_result_id = result_id
+                METRICS.tick("inference")
+            started = METRICS.start()
+            for face_data, (x, y, w, h) in faces or []:
+                _draw_face_info(display_frame, face_data, x, y, w, h, is_identified=face_data is not None)
+            METRICS.stop("draw", started)
+            if config.METRICS_OVERLAY:
+                draw_metrics_overlay(display_frame, METRICS, ("capture", "detect", "embed", "match", "imshow"), ("display", "inference"))
+            started = METRICS.start()
+            cv2.imshow(config.DSC_APP_WINDOW_NAME, display_frame)
+            METRICS.stop("imshow", started)
+            METRICS.stop("frame", frame_started)
+            METRICS.tick("display")
 
-        cv2.imshow(config.DSC_APP_WINDOW_NAME, frame)
-        
         key = cv2.waitKey(1) & 0xFF
         if key in [ord('q'), ord('e')]:
             running = False
@@ -212,6 +988,20 @@ def execute_recognition_session(user_email):
         except cv2.error:
             running = False
 
+    pipeline.stop()
+    pool = getattr(pipeline, "pool", None)
+    if pool is not None and pool.failed:
+        messagebox.showerror("DeepScan - Erro", f"Os processos de reconhecimento não puderam iniciar:\n{pool.error}")
+    if getattr(pipeline, "scheduler", None) is not None:
+        print(f"[DSC_INFO] Agendador: {pipeline.scheduler.summary()}.")
+    if isinstance(gate, PresenceGate):
+        gate.close()
+        print(f"[DSC_INFO] Sensor de presença: {gate.skipped} detecções evitadas.")
+    elif gate is not None:
+        print(f"[DSC_INFO] Portão de movimento: {gate.skipped} detecções evitadas.")
+    if exporter is not None:
+        exporter.stop()
+    _stop_gallery_watcher()
     cap.release()
     cv2.destroyAllWindows()
     for _ in range(5): cv2.waitKey(1)
@@ -0,0 +1,104 @@
+#Cache persistente de embeddings da galeria do DeepScan
+
+# -*- coding: utf-8 -*-
+import os
+import hashlib
+import pickle
+
+import numpy as np
+
+STORE_VERSION = 1
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_content_hash(file_path):
+    sha = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class EmbeddingStore:
+    # Guarda um embedding por (hash do conteúdo da foto, modelo, detector).
+    # Fotos inalteradas não são reprocessadas; o índice por stat (tamanho, mtime)
+    # evita até a releitura dos arquivos quando nada mudou no disco.
+    def __init__(self, store_path, model_name, detector_backend):
+        self.store_path = store_path
+        self.model_name = model_name
+        self.detector_backend = detector_backend
+        self._entries = {}
+        self._stat_index = {}
+        self._dirty = False
+        self._load()
+
+    def _key(self, content_hash):
+        return (content_hash, self.model_name, self.detector_backend)
+
+    def _load(self):
+        if not os.path.exists(self.store_path):
+            return
+        try:
+            with open(self.store_path, 'rb') as f:
+                data = pickle.load(f)
+            if data.get("version") != STORE_VERSION:
+                print("[DSC_AVISO] Cache de embeddings em versão antiga, será reconstruído.")
+                return
+            # Caches antigos guardavam listas de floats (~16 KB por foto de 512 dims): viram arrays float32
+            self._entries = {key: np.asarray(value, dtype=np.float32) for key, value in data.get("entries", {}).items()}
+            self._stat_index = data.get("stat_index", {})
+        except Exception as e:
+            print(f"[DSC_AVISO] Cache de embeddings ilegível ({os.path.basename(self.store_path)}): {e}")
+            self._entries, self._stat_index = {}, {}
+
+    def hash_for_path(self, file_path):
+        stat = os.stat(file_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self._stat_index.get(file_path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        content_hash = file_content_hash(file_path)
+        self._stat_index[file_path] = (signature, content_hash)
+        self._dirty = True
+        return content_hash
+
+    def get(self, content_hash):
+        return self._entries.get(self._key(content_hash))
+
+    def put(self, content_hash, embedding):
+        self._entries[self._key(content_hash)] = np.asarray(embedding, dtype=np.float32)
+        self._dirty = True
+
+    def get_or_compute(self, file_path, compute_fn):
+        # compute_fn(file_path) -> embedding ou None; só é chamada em caso de falta no cache
+        content_hash = self.hash_for_path(file_path)
+        embedding = self.get(content_hash)
+        if embedding is None:
+            embedding = compute_fn(file_path)
+            if embedding is not None:
+                self.put(content_hash, embedding)
+        return embedding
+
+    def prune(self, valid_paths):
+        # Remove entradas de fotos apagadas (apenas do modelo/detector atuais)
+        valid_paths = set(valid_paths)
+        for path in [p for p in self._stat_index if p not in valid_paths]:
+            del self._stat_index[path]
+            self._dirty = True
+        valid_hashes = {h for _, h in self._stat_index.values()}
+        for key in list(self._entries):
+            if key[1:] == (self.model_name, self.detector_backend) and key[0] not in valid_hashes:
+                del self._entries[key]
+                self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        tmp_path = self.store_path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({"version": STORE_VERSION, "entries": self._entries, "stat_index": self._stat_index}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.store_path)
+            self._dirty = False
+        except Exception as e:
+            print(f"[DSC_ERRO] Não foi possível salvar o cache de embeddings: {e}")
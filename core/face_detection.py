@@ -0,0 +1,165 @@
+#Detectores de rosto nativos do OpenCV (YuNet, DNN SSD, Haar) com a mesma interface, sem DeepFace
+
+# -*- coding: utf-8 -*-
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+
+import config
+import utils
+
+DETECTION_ENGINES = ("yunet", "ssd", "haar")
+# Média BGR do treino do res10 (SSD)
+_SSD_MEAN = (104.0, 177.0, 123.0)
+_SSD_INPUT_SIZE = (300, 300)
+
+
+class FaceDetection:
+    # Um rosto: caixa (x, y, w, h) em pixels da imagem, confiança e, quando o detector dá,
+    # os 5 pontos do YuNet (olho direito, olho esquerdo, nariz, boca dir., boca esq.) como array 5 x 2
+    __slots__ = ("box", "score", "landmarks")
+
+    def __init__(self, box, score, landmarks=None):
+        self.box = box
+        self.score = score
+        self.landmarks = landmarks
+
+    def eyes(self):
+        # (left_eye, right_eye) na convenção do DeepFace usada por crop_face: o olho esquerdo
+        # da pessoa aparece à direita na imagem. (None, None) sem landmarks.
+        if self.landmarks is None:
+            return None, None
+        return tuple(map(float, self.landmarks[1])), tuple(map(float, self.landmarks[0]))
+
+
+def _clip_box(x, y, w, h, shape):
+    img_h, img_w = shape[:2]
+    x0, y0 = max(0, int(round(x))), max(0, int(round(y)))
+    x1, y1 = min(img_w, int(round(x + w))), min(img_h, int(round(y + h)))
+    return x0, y0, max(0, x1 - x0), max(0, y1 - y0)
+
+
+class YuNetDetector:
+    # cv2.FaceDetectorYN (ONNX de ~230 KB): caixas + 5 landmarks numa passada só.
+    # O detector é montado para um tamanho de entrada fixo, então mantém uma instância por
+    # tamanho (as câmeras/proxies usam poucos tamanhos) e descarta a menos usada além de max_sizes.
+    # As instâncias não são thread-safe: detect() serializa pelo lock.
+    def __init__(self, model_path, score_threshold=0.5, nms_threshold=0.3, top_k=50, max_sizes=4):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(model_path)
+        self.model_path = model_path
+        self.score_threshold = score_threshold
+        self.nms_threshold = nms_threshold
+        self.top_k = top_k
+        self.max_sizes = max_sizes
+        self._instances = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _instance(self, size):
+        detector = self._instances.get(size)
+        if detector is None:
+            detector = cv2.FaceDetectorYN.create(self.model_path, "", size, self.score_threshold, self.nms_threshold, self.top_k)
+            self._instances[size] = detector
+            while len(self._instances) > self.max_sizes:
+                self._instances.popitem(last=False)
+        else:
+            self._instances.move_to_end(size)
+        return detector
+
+    def detect(self, image, min_size=0):
+        size = (image.shape[1], image.shape[0])
+        with self._lock:
+            _, faces = self._instance(size).detect(image)
+        detections = []
+        for row in faces if faces is not None else ():
+            box = _clip_box(row[0], row[1], row[2], row[3], image.shape)
+            if box[2] < max(1, min_size) or box[3] < max(1, min_size):
+                continue
+            detections.append(FaceDetection(box, float(row[14]), row[4:14].reshape(5, 2).copy()))
+        return detections
+
+
+class SSDDetector:
+    # Rede res10 300x300 (Caffe) do módulo DNN: só caixas, sem landmarks (recorte sem alinhamento)
+    def __init__(self, prototxt_path, model_path):
+        for path in (prototxt_path, model_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+        self.net = cv2.dnn.readNetFromCaffe(prototxt_path, model_path)
+        self._lock = threading.Lock()
+
+    def detect(self, image, min_size=0):
+        img_h, img_w = image.shape[:2]
+        blob = cv2.dnn.blobFromImage(cv2.resize(image, _SSD_INPUT_SIZE), 1.0, _SSD_INPUT_SIZE, _SSD_MEAN)
+        with self._lock:
+            self.net.setInput(blob)
+            output = self.net.forward()
+        detections = []
+        for row in output[0, 0]:
+            x0, y0, x1, y1 = row[3:7] * (img_w, img_h, img_w, img_h)
+            box = _clip_box(x0, y0, x1 - x0, y1 - y0, image.shape)
+            if box[2] < max(1, min_size) or box[3] < max(1, min_size):
+                continue
+            detections.append(FaceDetection(box, float(row[2])))
+        return detections
+
+
+class HaarDetector:
+    # Cascata Haar (vem com o OpenCV, sem download): rápida, sem confiança nem landmarks
+    def __init__(self, cascade_path, scale_factor=1.1, min_neighbors=5):
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise FileNotFoundError(cascade_path)
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self._lock = threading.Lock()
+
+    def detect(self, image, min_size=0):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        side = max(20, min_size)
+        with self._lock:
+            boxes = self.cascade.detectMultiScale(gray, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors, minSize=(side, side))
+        return [FaceDetection(tuple(int(v) for v in box), 1.0) for box in boxes]
+
+
+def default_haar_cascade_path():
+    return os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml')
+
+
+def create_face_detector(engine):
+    # Monta o detector pedido com os modelos de Modelos/. Levanta FileNotFoundError se o modelo faltar.
+    models_dir = utils.get_resource_path(config.DET_SUBFOLDER_MODELS)
+    if engine == "yunet":
+        return YuNetDetector(
+            os.path.join(models_dir, config.DET_YUNET_MODEL_FILENAME),
+            score_threshold=config.DET_SCORE_THRESHOLD,
+            nms_threshold=config.DET_NMS_THRESHOLD
+        )
+    if engine == "ssd":
+        return SSDDetector(os.path.join(models_dir, config.DET_SSD_PROTOTXT_FILENAME), os.path.join(models_dir, config.DET_SSD_MODEL_FILENAME))
+    if engine == "haar":
+        return HaarDetector(default_haar_cascade_path())
+    raise ValueError(f"Detector de rostos desconhecido: '{engine}'")
+
+
+_DETECTORS = {}
+_DETECTORS_LOCK = threading.Lock()
+
+
+def get_face_detector(engine):
+    # Instância única por engine no processo (DeepSave e DeepScan compartilham).
+    # None para 'deepface' ou quando o modelo (ou a classe, em builds do OpenCV sem ela) não está
+    # disponível: quem chama usa o caminho antigo.
+    if engine not in DETECTION_ENGINES:
+        return None
+    with _DETECTORS_LOCK:
+        if engine not in _DETECTORS:
+            try:
+                _DETECTORS[engine] = create_face_detector(engine)
+                print(f"[DET_INFO] Detector de rostos '{engine}' carregado.")
+            except (FileNotFoundError, AttributeError, cv2.error) as e:
+                _DETECTORS[engine] = None
+                print(f"[DET_AVISO] Detector '{engine}' indisponível ({e}); usando o detector padrão.")
+        return _DETECTORS[engine]
@@ -0,0 +1,90 @@
+#Buffers de frame pré-alocados e reaproveitados pelo laço de exibição
+
+# -*- coding: utf-8 -*-
+import cv2
+import numpy as np
+
+
+def letterbox_layout(frame_shape, width, height):
+    # (largura, altura, off_x, off_y) do frame redimensionado dentro da janela, mantendo a proporção.
+    # Proporções quase iguais (< 1%) ocupam a janela inteira.
+    frame_h, frame_w = frame_shape[:2]
+    frame_ratio = frame_w / frame_h if frame_h > 0 else 1.0
+    window_ratio = width / height if height > 0 else 1.0
+    if abs(frame_ratio - window_ratio) < 0.01:
+        return width, height, 0, 0
+    if frame_ratio > window_ratio:
+        new_h = int(width / frame_ratio)
+        return width, new_h, 0, (height - new_h) // 2
+    new_w = int(height * frame_ratio)
+    return new_w, height, (width - new_w) // 2, 0
+
+
+class LetterboxCanvas:
+    # Tela fixa do tamanho da janela. render() redimensiona o frame direto para a view
+    # da área útil (cv2.resize com dst), sem criar arrays novos por frame; as barras
+    # pretas só são zeradas quando o formato de entrada muda. canvas permite desenhar
+    # numa fatia de uma tela maior (células do MosaicCanvas).
+    def __init__(self, width, height, canvas=None):
+        self.width = width
+        self.height = height
+        self.canvas = canvas if canvas is not None else np.zeros((height, width, 3), dtype=np.uint8)
+        self.view = self.canvas
+        self.offset = (0, 0)
+        self.scale = (1.0, 1.0)
+        self._input_shape = None
+
+    def _set_layout(self, frame_shape):
+        view_w, view_h, off_x, off_y = letterbox_layout(frame_shape, self.width, self.height)
+        self.canvas.fill(0)
+        self.view = self.canvas[off_y:off_y + view_h, off_x:off_x + view_w]
+        self.offset = (off_x, off_y)
+        self.scale = (view_w / float(frame_shape[1]), view_h / float(frame_shape[0]))
+        self._input_shape = frame_shape
+
+    def render(self, frame):
+        # Retorna a view da área útil (para desenhar); a tela inteira fica em self.canvas
+        if frame.shape != self._input_shape:
+            self._set_layout(frame.shape)
+        cv2.resize(frame, (self.view.shape[1], self.view.shape[0]), dst=self.view)
+        return self.view
+
+
+class MosaicCanvas:
+    # Várias câmeras numa janela só: uma tela pré-alocada dividida em grade, em que cada célula
+    # é um LetterboxCanvas sobre a sua fatia. O mosaico sai montado sem cópia extra por frame.
+    def __init__(self, width, height, count, columns=0):
+        self.columns = columns if columns > 0 else int(np.ceil(np.sqrt(count)))
+        self.rows = int(np.ceil(count / self.columns))
+        self.canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        tile_w, tile_h = width // self.columns, height // self.rows
+        self.tiles = []
+        for i in range(count):
+            row, col = divmod(i, self.columns)
+            cell = self.canvas[row * tile_h:(row + 1) * tile_h, col * tile_w:(col + 1) * tile_w]
+            self.tiles.append(LetterboxCanvas(tile_w, tile_h, canvas=cell))
+
+
+class FrameBuffer:
+    # Cópia de trabalho reaproveitada: substitui frame.copy() a cada iteração
+    def __init__(self):
+        self.buffer = None
+
+    def copy(self, frame):
+        if self.buffer is None or self.buffer.shape != frame.shape or self.buffer.dtype != frame.dtype:
+            self.buffer = np.empty_like(frame)
+        np.copyto(self.buffer, frame)
+        return self.buffer
+
+
+class FaceRecord:
+    # Registro compacto de um rosto entregue pela inferência à exibição
+    __slots__ = ("info", "x", "y", "w", "h", "identified")
+
+    def __init__(self, info, x, y, w, h, identified):
+        self.info = info
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.identified = identified
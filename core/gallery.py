@@ -0,0 +1,249 @@
+#Galeria de rostos conhecidos em memória (matching vetorizado)
+
+# -*- coding: utf-8 -*-
+import threading
+
+import numpy as np
+
+from core.quantization import QuantizedVectors
+
+# Chaves com vetores: ficam só no armazenamento compacto, não nas entradas (tabela de metadados)
+_VECTOR_KEYS = ("embedding", "representatives")
+
+
+def l2_normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class FaceGallery:
+    # Mantém todos os embeddings conhecidos numa única matriz normalizada (N x D).
+    # A distância cosseno de todos os rostos do frame contra toda a galeria sai de
+    # um só produto matricial, equivalente a DeepFace.verify(distance_metric='cosine').
+    # Entradas com "representatives" (templates multi-foto) continuam ocupando uma
+    # linha (o centróide); os representantes só refinam os melhores candidatos.
+    # Com um índice ANN (core.ann_index) os candidatos vêm do índice em vez da
+    # varredura completa. upsert()/remove() alteram pessoas com a sessão rodando;
+    # como o índice não apaga vetores, cada linha tem um id de índice próprio e ids
+    # de versões antigas viram "mortos" até a próxima reconstrução.
+    # 'storage' (float32/float16/int8, ver core.quantization) define como centróides e
+    # representantes ficam na memória; as entradas guardam só id e dados da pessoa.
+    def __init__(self, entries=(), rerank_top_k=3, index=None, id_key="person_id", storage="float32"):
+        entries = [e for e in entries if e.get("embedding") is not None]
+        self.rerank_top_k = rerank_top_k
+        self.id_key = id_key
+        self.storage = storage
+        if entries:
+            self.vectors = QuantizedVectors.from_float(l2_normalize([e["embedding"] for e in entries]), storage)
+        else:
+            self.vectors = QuantizedVectors(0, storage)
+        self._representatives = [self._encode_representatives(e.get("representatives")) for e in entries]
+        self._has_representatives = any(r is not None for r in self._representatives)
+        self.entries = [self._metadata(e) for e in entries]
+        self._rows = {e.get(id_key): i for i, e in enumerate(self.entries)}
+        self._lock = threading.Lock()
+        # Reconstrói o índice a partir da matriz quando há ids mortos demais, ou o liga de novo quando
+        # a galeria volta a ter index_min_size pessoas (ambos definidos por attach_index)
+        self.index_factory = None
+        self.index_min_size = 1
+        self.set_index(index)
+
+    def set_index(self, index, factory=None):
+        # O índice recém-construído usa as posições atuais como ids
+        self.index = index
+        if factory is not None:
+            self.index_factory = factory
+        self._row_ids = np.arange(len(self.entries), dtype=np.int64)
+        self._id_rows = {i: i for i in range(len(self.entries))}
+        self._next_index_id = len(self.entries)
+        self._dead_index_ids = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _metadata(self, entry):
+        return {key: value for key, value in entry.items() if key not in _VECTOR_KEYS}
+
+    def _encode_representatives(self, representatives):
+        if representatives is None or not len(representatives):
+            return None
+        return QuantizedVectors.from_float(l2_normalize(representatives), self.storage)
+
+    @property
+    def matrix(self):
+        # Centróides em float32 (cópia), para construir ou reconstruir o índice ANN
+        return self.vectors.to_float()
+
+    @property
+    def nbytes(self):
+        return self.vectors.nbytes + sum(r.nbytes for r in self._representatives if r is not None)
+
+    def export_state(self):
+        # Metadados e vetores exatamente como armazenados, para montar a mesma galeria em outro
+        # processo (ver from_state) sem normalizar e quantizar de novo: a matriz fica idêntica
+        # e a impressão digital do índice ANN salvo continua valendo
+        with self._lock:
+            return {
+                "entries": [dict(entry) for entry in self.entries],
+                "vectors": self.vectors.to_arrays(),
+                "representatives": [reps.to_arrays() if reps is not None else None for reps in self._representatives],
+                "rerank_top_k": self.rerank_top_k,
+                "id_key": self.id_key,
+                "storage": self.storage
+            }
+
+    @classmethod
+    def from_state(cls, state, index=None):
+        gallery = cls(rerank_top_k=state["rerank_top_k"], id_key=state["id_key"], storage=state["storage"])
+        arrays = state["vectors"]
+        gallery.vectors = QuantizedVectors.from_arrays(arrays["vectors"], arrays.get("scales"))
+        gallery._representatives = [
+            QuantizedVectors.from_arrays(reps["vectors"], reps.get("scales")) if reps is not None else None
+            for reps in state["representatives"]
+        ]
+        gallery._has_representatives = any(r is not None for r in gallery._representatives)
+        gallery.entries = list(state["entries"])
+        gallery._rows = {e.get(gallery.id_key): i for i, e in enumerate(gallery.entries)}
+        gallery.set_index(index)
+        return gallery
+
+    def distances(self, embeddings):
+        queries = l2_normalize(embeddings)
+        distances = 1.0 - self.vectors.dot(queries)
+        if self._has_representatives:
+            self._rerank_with_representatives(queries, distances)
+        return distances
+
+    def _rerank_with_representatives(self, queries, distances):
+        k = min(self.rerank_top_k, distances.shape[1])
+        if k <= 0:
+            return
+        candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        for qi, query in enumerate(queries):
+            for person_idx in candidates[qi]:
+                rep_distance = self._representative_distance(person_idx, query)
+                if rep_distance < distances[qi, person_idx]:
+                    distances[qi, person_idx] = rep_distance
+
+    def _representative_distance(self, person_idx, query):
+        reps = self._representatives[person_idx]
+        if reps is None:
+            return float('inf')
+        return float(np.min(1.0 - reps.dot_rows(slice(None), query)))
+
+    def _match_with_index(self, embeddings):
+        queries = l2_normalize(embeddings)
+        # Pede alguns candidatos a mais quando há ids mortos para não perder os vivos
+        k = max(1, self.rerank_top_k) + min(self._dead_index_ids, 16)
+        cand_dist, cand_ids = self.index.search(queries, k)
+        best_idx = np.zeros(len(queries), dtype=np.int64)
+        best_dist = np.full(len(queries), np.inf, dtype=np.float32)
+        for qi, query in enumerate(queries):
+            for dist, index_id in zip(cand_dist[qi], cand_ids[qi]):
+                row = self._id_rows.get(int(index_id), -1)
+                if row < 0:
+                    continue
+                if self._has_representatives:
+                    dist = min(dist, self._representative_distance(row, query))
+                if dist < best_dist[qi]:
+                    best_idx[qi], best_dist[qi] = row, dist
+        return best_idx, best_dist
+
+    def match(self, embeddings, threshold):
+        # Retorna [(entrada ou None, distância)] na mesma ordem de 'embeddings'
+        if len(embeddings) == 0:
+            return []
+        with self._lock:
+            if not self.entries:
+                return [(None, float('inf')) for _ in range(len(embeddings))]
+            if self.index is not None:
+                best_idx, best_dist = self._match_with_index(embeddings)
+            else:
+                distances = self.distances(embeddings)
+                best_idx = np.argmin(distances, axis=1)
+                best_dist = distances[np.arange(len(best_idx)), best_idx]
+            return [(self.entries[i] if d < threshold else None, float(d)) for i, d in zip(best_idx, best_dist)]
+
+    def get(self, person_id):
+        row = self._rows.get(person_id)
+        return self.entries[row] if row is not None else None
+
+    def upsert(self, entry):
+        # Adiciona a pessoa ou substitui a versão atual (mesmo id); retorna "added" ou "replaced"
+        vector = l2_normalize(entry["embedding"])
+        key = entry.get(self.id_key)
+        reps = self._encode_representatives(entry.get("representatives"))
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                row = len(self.entries)
+                self.entries.append(self._metadata(entry))
+                self._representatives.append(reps)
+                self.vectors.append(vector)
+                self._row_ids = np.append(self._row_ids, -1)
+                self._rows[key] = row
+                status = "added"
+            else:
+                self.entries[row] = self._metadata(entry)
+                self._representatives[row] = reps
+                self.vectors.set_row(row, vector)
+                self._forget_index_id(row)
+                status = "replaced"
+            self._has_representatives = self._has_representatives or reps is not None
+            if self.index is not None:
+                index_id = self._next_index_id
+                self._next_index_id += 1
+                self.index.add(vector, [index_id])
+                self._row_ids[row] = index_id
+                self._id_rows[index_id] = row
+            self._maybe_rebuild_index()
+            return status
+
+    def remove(self, person_id):
+        # Remove a pessoa trocando sua linha pela última (sem deslocar a matriz inteira)
+        with self._lock:
+            row = self._rows.pop(person_id, None)
+            if row is None:
+                return False
+            self._forget_index_id(row)
+            last = len(self.entries) - 1
+            if row != last:
+                self.entries[row] = self.entries[last]
+                self._representatives[row] = self._representatives[last]
+                self.vectors.copy_row(row, last)
+                self._row_ids[row] = self._row_ids[last]
+                self._rows[self.entries[row].get(self.id_key)] = row
+                if self._row_ids[row] >= 0:
+                    self._id_rows[int(self._row_ids[row])] = row
+            self.entries.pop()
+            self._representatives.pop()
+            self.vectors.truncate(last)
+            self._row_ids = self._row_ids[:last]
+            self._maybe_rebuild_index()
+            return True
+
+    def _forget_index_id(self, row):
+        index_id = int(self._row_ids[row])
+        if index_id >= 0 and self._id_rows.pop(index_id, None) is not None:
+            self._dead_index_ids += 1
+        self._row_ids[row] = -1
+
+    def _maybe_rebuild_index(self):
+        if self.index_factory is None:
+            return
+        if self.index is None:
+            # Galeria que esvaziou (ou começou pequena demais): o índice volta ao passar do mínimo
+            if len(self.entries) >= self.index_min_size:
+                try:
+                    self.set_index(self.index_factory(self.matrix))
+                    print(f"[DSC_INFO] Índice ANN religado para {len(self.entries)} pessoas.")
+                except Exception as e:
+                    print(f"[DSC_AVISO] Índice ANN indisponível, usando busca exata: {e}")
+                    self.index_factory = None
+            return
+        if self._dead_index_ids > max(64, len(self.entries) // 4):
+            self.set_index(self.index_factory(self.matrix) if len(self.entries) else None)
@@ -0,0 +1,59 @@
+#Importação sob demanda: dependências pesadas (deepface/TensorFlow, PIL, google-genai) só são
+#carregadas no primeiro uso, para a tela de login abrir sem esperar por elas
+
+# -*- coding: utf-8 -*-
+import importlib
+import importlib.util
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    # Nunca executado: deixa visíveis para o PyInstaller os módulos que o LazyModule importa por
+    # nome (via importlib, que a análise estática do executável congelado não enxerga)
+    import deepface.DeepFace
+    import google.genai
+    import PIL.Image
+    import PIL.ImageDraw
+    import PIL.ImageFont
+    import PIL.ImageTk
+    import serial
+
+_AVAILABLE = {}
+
+
+def module_available(name):
+    # Procura o pacote sem importá-lo (find_spec do nível de cima: não executa o __init__)
+    top_level = name.partition(".")[0]
+    if top_level not in _AVAILABLE:
+        try:
+            _AVAILABLE[top_level] = importlib.util.find_spec(top_level) is not None
+        except (ImportError, ValueError):
+            _AVAILABLE[top_level] = False
+    return _AVAILABLE[top_level]
+
+
+class LazyModule:
+    # Fica no lugar do módulo (ex.: DeepFace = LazyModule("deepface.DeepFace")) e o importa no
+    # primeiro acesso a um atributo. Depois da carga os atributos são copiados para o próprio
+    # proxy: os acessos seguintes, inclusive nos laços por frame, não passam mais por __getattr__.
+    # Um ImportError aparece no primeiro uso, não na importação de quem declarou o proxy.
+    def __init__(self, name):
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_lock"] = threading.RLock()
+
+    def _lazy_load(self):
+        with self._lazy_lock:
+            module = self.__dict__.get("_lazy_module")
+            if module is None:
+                module = importlib.import_module(self._lazy_name)
+                self.__dict__.update(vars(module))
+                self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        # Só é chamado para atributos que ainda não estão no __dict__ do proxy
+        return getattr(self._lazy_load(), attr)
+
+    def __repr__(self):
+        state = "carregado" if "_lazy_module" in self.__dict__ else "não carregado"
+        return f"<LazyModule {self._lazy_name} ({state})>"
@@ -0,0 +1,135 @@
+#Atualização incremental da galeria com a sessão rodando (DeepSave + observador de Rostos/inforos.txt)
+
+# -*- coding: utf-8 -*-
+import os
+import re
+import threading
+
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+# IDs de pessoa: 3 dígitos ou mais ("001" ... "999", "1000", ...). Regra única do app modular
+# (DeepSave, carga e atualização da galeria); o Deepapp.py segue o mesmo padrão
+_ID_PATTERN = re.compile(r"(\d{3,})")
+
+
+def person_id_from_filename(filename):
+    # "007.jpg" e "007 (2).jpg" -> "007"; None para arquivos fora do padrão
+    match = _ID_PATTERN.match(os.path.splitext(filename)[0])
+    return match.group(1).upper() if match else None
+
+
+def scan_faces_folder(faces_path):
+    # {id: ((caminho, tamanho, mtime_ns), ...)} só com os.scandir: barato o bastante para polling
+    photos = {}
+    try:
+        with os.scandir(faces_path) as it:
+            for item in it:
+                if not item.is_file() or not item.name.lower().endswith(PHOTO_EXTENSIONS):
+                    continue
+                person_id = person_id_from_filename(item.name)
+                if person_id is None:
+                    continue
+                stat = item.stat()
+                photos.setdefault(person_id, []).append((item.path, stat.st_size, stat.st_mtime_ns))
+    except FileNotFoundError:
+        return {}
+    return {person_id: tuple(sorted(items)) for person_id, items in photos.items()}
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+        return (stat.st_size, stat.st_mtime_ns)
+    except FileNotFoundError:
+        return None
+
+
+class GalleryUpdater:
+    # Compara o estado atual de Rostos/ e inforos.txt com o último visto e aplica na
+    # FaceGallery só as pessoas que mudaram: novas (upsert), com fotos/nome alterados
+    # (upsert = substituição) ou que sumiram (remove).
+    #   load_info_fn(info_path) -> {id: dados da pessoa}
+    #   build_entry_fn(id, [caminhos das fotos], dados da pessoa) -> entrada da galeria ou None
+    def __init__(self, gallery, faces_path, info_path, load_info_fn, build_entry_fn):
+        self.gallery = gallery
+        self.faces_path = faces_path
+        self.info_path = info_path
+        self.load_info_fn = load_info_fn
+        self.build_entry_fn = build_entry_fn
+        self._photos = {}
+        self._info = {}
+        self._info_signature = None
+
+    def prime(self, person_info=None):
+        # Estado de partida = o que acabou de ser carregado na galeria
+        self._photos = scan_faces_folder(self.faces_path)
+        self._info_signature = _file_signature(self.info_path)
+        self._info = dict(person_info) if person_info is not None else dict(self.load_info_fn(self.info_path))
+
+    def sync(self, force_ids=()):
+        # Retorna {"added": n, "replaced": n, "removed": n}
+        photos = scan_faces_folder(self.faces_path)
+        info = self._info
+        info_signature = _file_signature(self.info_path)
+        if info_signature != self._info_signature or force_ids:
+            info = dict(self.load_info_fn(self.info_path))
+        changed = {pid for pid in set(photos) | set(self._photos) if photos.get(pid) != self._photos.get(pid)}
+        changed |= {pid for pid in set(info) | set(self._info) if info.get(pid) != self._info.get(pid)}
+        changed |= set(force_ids)
+        counts = {"added": 0, "replaced": 0, "removed": 0}
+        for person_id in sorted(changed):
+            entry = None
+            if person_id in info and photos.get(person_id):
+                try:
+                    entry = self.build_entry_fn(person_id, [p for p, _size, _mtime in photos[person_id]], info[person_id])
+                except Exception as e:
+                    print(f"[DSC_ERRO] Atualizando a pessoa {person_id}: {e}")
+                    continue
+            if entry is not None:
+                counts[self.gallery.upsert(entry)] += 1
+            elif self.gallery.remove(person_id):
+                counts["removed"] += 1
+        self._photos, self._info, self._info_signature = photos, info, info_signature
+        return counts
+
+
+class GalleryWatcher(threading.Thread):
+    # Roda o GalleryUpdater a cada 'interval' segundos ou na hora, via notify()
+    # (o DeepSave avisa assim que salva uma foto). on_change() é chamado após mudanças.
+    def __init__(self, updater, interval=2.0, on_change=None):
+        super().__init__(daemon=True)
+        self.updater = updater
+        self.interval = interval
+        self.on_change = on_change
+        self.stop_event = threading.Event()
+        self._wake = threading.Event()
+        self._pending_lock = threading.Lock()
+        self._pending = set()
+
+    def notify(self, person_id=None):
+        if person_id is not None:
+            with self._pending_lock:
+                self._pending.add(str(person_id).upper())
+        self._wake.set()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self.stop_event.is_set():
+                break
+            with self._pending_lock:
+                force_ids, self._pending = self._pending, set()
+            try:
+                counts = self.updater.sync(force_ids)
+            except Exception as e:
+                print(f"[DSC_ERRO] Observador da galeria: {e}")
+                continue
+            if any(counts.values()):
+                print(f"[DSC_INFO] Galeria atualizada: {counts['added']} nova(s), {counts['replaced']} alterada(s), {counts['removed']} removida(s).")
+                if self.on_change is not None:
+                    self.on_change()
+
+    def stop(self):
+        self.stop_event.set()
+        self._wake.set()
+        self.join(timeout=2.0)
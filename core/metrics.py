@@ -0,0 +1,212 @@
+#Métricas de latência por estágio, taxa de frames, overlay na tela e exportação periódica
+
+# -*- coding: utf-8 -*-
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+# Limites (em segundos) dos buckets do histograma exportado, no estilo Prometheus
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class _Stage:
+    __slots__ = ("window", "buckets", "count", "total")
+
+    def __init__(self, window):
+        self.window = deque(maxlen=window)
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+
+class StageMetrics:
+    # Uso nos laços:  t = metrics.start(); ...; metrics.stop("detect", t)
+    # Desativado, start() devolve 0 e stop()/tick() retornam na hora: custo de duas chamadas vazias.
+    # Guarda uma janela móvel por estágio (percentis) e um histograma acumulado (exportação).
+    def __init__(self, enabled=True, window=512):
+        self.enabled = enabled
+        self.window = window
+        self.stages = {}
+        self.rates = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.rates = {}
+            self.started_at = time.time()
+
+    def start(self):
+        return time.perf_counter() if self.enabled else 0
+
+    def stop(self, stage, started):
+        if not self.enabled:
+            return
+        self.observe(stage, time.perf_counter() - started)
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            data = self.stages.get(stage)
+            if data is None:
+                data = self.stages[stage] = _Stage(self.window)
+            data.window.append(seconds)
+            data.count += 1
+            data.total += seconds
+            for i, limit in enumerate(LATENCY_BUCKETS):
+                if seconds <= limit:
+                    data.buckets[i] += 1
+                    break
+            else:
+                data.buckets[-1] += 1
+
+    def tick(self, name):
+        # Marca um evento (frame exibido, resultado de inferência) para calcular a taxa por segundo
+        if not self.enabled:
+            return
+        with self._lock:
+            ticks = self.rates.get(name)
+            if ticks is None:
+                ticks = self.rates[name] = deque(maxlen=self.window)
+            ticks.append(time.perf_counter())
+
+    def wrap(self, stage, fn):
+        # Desativado, devolve a própria função (custo zero)
+        if not self.enabled:
+            return fn
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.observe(stage, time.perf_counter() - started)
+        return timed
+
+    def rate(self, name):
+        ticks = self.rates.get(name)
+        if not ticks or len(ticks) < 2:
+            return 0.0
+        span = ticks[-1] - ticks[0]
+        return (len(ticks) - 1) / span if span > 0 else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            stages = {name: (list(data.window), data.count, data.total, list(data.buckets)) for name, data in self.stages.items()}
+            rates = {name: self.rate(name) for name in self.rates}
+        report = {"uptime_s": round(time.time() - self.started_at, 1), "rates": {k: round(v, 2) for k, v in rates.items()}, "stages": {}}
+        for name, (window, count, total, buckets) in stages.items():
+            if not window:
+                continue
+            p50, p95, p99 = np.percentile(window, [50, 95, 99]) * 1000.0
+            report["stages"][name] = {
+                "count": count, "sum_s": round(total, 6), "mean_ms": round(total / count * 1000.0, 3),
+                "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3),
+                "max_ms": round(max(window) * 1000.0, 3), "buckets": buckets
+            }
+        return report
+
+
+def to_prometheus(snapshot, prefix="pyargus"):
+    lines = [
+        f"# HELP {prefix}_stage_latency_seconds Latência por estágio do laço de reconhecimento/captura.",
+        f"# TYPE {prefix}_stage_latency_seconds histogram"
+    ]
+    for stage, data in snapshot["stages"].items():
+        cumulative = 0
+        for limit, count in zip(LATENCY_BUCKETS, data["buckets"]):
+            cumulative += count
+            lines.append(f'{prefix}_stage_latency_seconds_bucket{{stage="{stage}",le="{limit}"}} {cumulative}')
+        lines.append(f'{prefix}_stage_latency_seconds_bucket{{stage="{stage}",le="+Inf"}} {data["count"]}')
+        lines.append(f'{prefix}_stage_latency_seconds_sum{{stage="{stage}"}} {data["sum_s"]}')
+        lines.append(f'{prefix}_stage_latency_seconds_count{{stage="{stage}"}} {data["count"]}')
+    lines.append(f"# TYPE {prefix}_stage_latency_window_seconds gauge")
+    for stage, data in snapshot["stages"].items():
+        for quantile in ("p50", "p95", "p99"):
+            lines.append(f'{prefix}_stage_latency_window_seconds{{stage="{stage}",quantile="{quantile}"}} {data[quantile + "_ms"] / 1000.0:.6f}')
+    lines.append(f"# TYPE {prefix}_rate_per_second gauge")
+    for name, value in snapshot["rates"].items():
+        lines.append(f'{prefix}_rate_per_second{{event="{name}"}} {value}')
+    lines.append(f"# TYPE {prefix}_uptime_seconds gauge")
+    lines.append(f"{prefix}_uptime_seconds {snapshot['uptime_s']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(metrics, path):
+    # Formato pela extensão: .json ou texto do Prometheus (.prom/.txt). Escrita atômica.
+    snapshot = metrics.snapshot()
+    content = json.dumps(snapshot, indent=2) if path.lower().endswith(".json") else to_prometheus(snapshot)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class MetricsExporter(threading.Thread):
+    # Grava o arquivo de métricas a cada 'interval' segundos e uma última vez no stop()
+    def __init__(self, metrics, path, interval=5.0):
+        super().__init__(daemon=True)
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self._write()
+
+    def _write(self):
+        try:
+            write_metrics(self.metrics, self.path)
+        except Exception as e:
+            print(f"[METRICAS_ERRO] Falha ao exportar métricas: {e}")
+
+    def stop(self):
+        self.stop_event.set()
+        self.join(timeout=1.0)
+        self._write()
+
+
+def start_exporter(metrics, path, interval=5.0):
+    # Nada é criado sem métricas ativas ou sem caminho configurado
+    if not metrics.enabled or not path:
+        return None
+    exporter = MetricsExporter(metrics, path, interval)
+    exporter.start()
+    return exporter
+
+
+def draw_metrics_overlay(frame, metrics, stages=(), rates=("display",), origin=(10, 40)):
+    # Texto pequeno com cv2.putText: FPS e p50/p95 dos estágios pedidos
+    if not metrics.enabled:
+        return
+    snapshot_stages = {}
+    with metrics._lock:
+        for name in stages:
+            data = metrics.stages.get(name)
+            if data is not None and data.window:
+                snapshot_stages[name] = np.percentile(data.window, [50, 95]) * 1000.0
+    lines = [" | ".join(f"{name} {metrics.rate(name):.1f}/s" for name in rates)]
+    lines += [f"{name}: p50 {p50:.1f} ms  p95 {p95:.1f} ms" for name, (p50, p95) in snapshot_stages.items()]
+    x, y = origin
+    for line in lines:
+        cv2.putText(frame, line, (x + 1, y + 1), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 0, 0), 2, cv2.LINE_AA)
+        cv2.putText(frame, line, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1, cv2.LINE_AA)
+        y += 18
+
+
+class TimedCapture:
+    # Embrulha um cv2.VideoCapture para medir o read() no estágio "capture"
+    def __init__(self, capture, metrics, stage="capture"):
+        self.capture = capture
+        self.read = metrics.wrap(stage, capture.read)
+
+    def __getattr__(self, name):
+        return getattr(self.capture, name)
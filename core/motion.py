@@ -0,0 +1,123 @@
+#Portão de movimento na frente da detecção de rostos e modo ocioso de baixo consumo
+
+# -*- coding: utf-8 -*-
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    # Diferença contra um fundo de média móvel numa miniatura em cinza (~160 px de largura):
+    # custa uma fração de milissegundo e decide se vale rodar a detecção de rostos.
+    # Sem movimento nem rostos por idle_after segundos entra em modo ocioso (on_idle) e volta
+    # no primeiro movimento (on_wake). Mesmo parado, detecta a cada recheck_seconds para não
+    # perder uma mudança lenta da cena (alguém que entrou devagar, luz).
+    def __init__(self, width=160, pixel_threshold=25, min_changed=0.01, learning_rate=0.05,
+                 idle_after=30.0, recheck_seconds=5.0, on_idle=None, on_wake=None, clock=time.monotonic):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.learning_rate = learning_rate
+        self.idle_after = idle_after
+        self.recheck_seconds = recheck_seconds
+        self.on_idle = on_idle
+        self.on_wake = on_wake
+        self.clock = clock
+        self.idle = False
+        self.skipped = 0
+        self._background = None
+        self._small = None
+        self._diff = None
+        now = clock()
+        self._last_activity = now
+        self._last_detection = now
+
+    def has_motion(self, frame):
+        h, w = frame.shape[:2]
+        size = (self.width, max(1, int(round(h * self.width / float(w)))))
+        gray = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+        if self._background is None or self._background.shape != gray.shape:
+            # Primeiro frame ou resolução trocada (modo ocioso): recomeça o fundo sem acusar movimento
+            self._background = gray.astype(np.float32)
+            self._small = np.empty_like(gray)
+            self._diff = np.empty_like(gray)
+            return False
+        cv2.convertScaleAbs(self._background, dst=self._small)
+        cv2.absdiff(gray, self._small, dst=self._diff)
+        changed = np.count_nonzero(self._diff > self.pixel_threshold) / float(self._diff.size)
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+        return changed >= self.min_changed
+
+    def should_detect(self, frame, faces_present=False):
+        now = self.clock()
+        motion = self.has_motion(frame)
+        if motion or faces_present:
+            self._last_activity = now
+            if self.idle:
+                self.idle = False
+                if self.on_wake is not None:
+                    self.on_wake()
+        elif not self.idle and now - self._last_activity >= self.idle_after:
+            self.idle = True
+            if self.on_idle is not None:
+                self.on_idle()
+        detect = motion or faces_present or now - self._last_detection >= self.recheck_seconds
+        if detect:
+            self._last_detection = now
+        else:
+            self.skipped += 1
+        return detect
+
+
+def gated(process_fn, gate, tracker=None):
+    # Envolve process_fn(frame): sem movimento nem rostos no último resultado devolve [] sem
+    # detectar. As trilhas do rastreador envelhecem normalmente enquanto a detecção está parada.
+    last = {"faces": False}
+    def process(frame):
+        if gate.should_detect(frame, faces_present=last["faces"]):
+            result = process_fn(frame)
+        else:
+            if tracker is not None:
+                with tracker.lock:
+                    tracker.update([])
+            result = []
+        last["faces"] = bool(result)
+        return result
+    return process
+
+
+def low_power_switch(grabber, idle_fps, idle_size=None, log=True):
+    # (on_idle, on_wake) para o MotionGate: no ocioso o grabber lê a idle_fps e pede à câmera essa
+    # taxa, buffer de 1 frame e, com idle_size, essa resolução (assim o driver não enfileira frames
+    # velhos entre as leituras); ao acordar volta à taxa máxima e às propriedades originais.
+    # Backends que ignoram essas propriedades são cobertos pelo descarte da fila no FrameGrabber.
+    # log=False silencia as mensagens (várias câmeras trocando de modo juntas avisam uma vez só).
+    capture = grabber.capture
+    full_size = (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    full_fps = capture.get(cv2.CAP_PROP_FPS)
+    full_buffer = capture.get(cv2.CAP_PROP_BUFFERSIZE)
+
+    def configure_to(size, fps, buffer_size):
+        def configure(cap):
+            if size and all(size):
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+            if fps and fps > 0:
+                cap.set(cv2.CAP_PROP_FPS, fps)
+            if buffer_size and buffer_size > 0:
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+        return configure
+
+    def on_idle():
+        if log:
+            print(f"[DSC_INFO] Cena vazia: modo de baixo consumo ({idle_fps} FPS).")
+        grabber.set_capture_mode(1.0 / idle_fps if idle_fps > 0 else 0.0, configure_to(idle_size, idle_fps, 1))
+
+    def on_wake():
+        if log:
+            print("[DSC_INFO] Atividade na porta: velocidade normal.")
+        grabber.set_capture_mode(0.0, configure_to(full_size if idle_size else None, full_fps, full_buffer))
+
+    return on_idle, on_wake
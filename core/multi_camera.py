@@ -0,0 +1,114 @@
+#Várias câmeras numa mesma sessão do DeepScan: um FrameGrabber por fonte e uma inferência em lote
+
+# -*- coding: utf-8 -*-
+import threading
+
+from core.pipeline import FrameGrabber
+
+
+class _FrameSignal:
+    # Saída comum dos grabbers: cada frame novo só acorda quem espera; o frame em si
+    # fica no próprio grabber (latest()), então nada se acumula
+    def __init__(self, cond):
+        self._cond = cond
+
+    def put(self, _item):
+        with self._cond:
+            self._cond.notify_all()
+
+
+class MultiCameraPipeline:
+    # N câmeras, um modelo: cada fonte tem o seu FrameGrabber, e uma única thread de inferência
+    # junta o frame mais novo ainda não processado de cada câmera e chama
+    # process_fn([(índice da fonte, frame), ...]) -> [resultado, ...] na mesma ordem.
+    # Assim o modelo e a galeria são compartilhados e os rostos de todas as câmeras vão no
+    # mesmo lote. Uma câmera que cai não derruba as outras; a exibição é de quem chama.
+    # Com um FrameScheduler, cada lote espera a vez dada pelo ritmo alvo.
+    def __init__(self, captures, process_fn, scheduler=None):
+        self._cond = threading.Condition()
+        signal = _FrameSignal(self._cond)
+        self.grabbers = [FrameGrabber(capture, outputs=(signal,)) for capture in captures]
+        self.process_fn = process_fn
+        self.scheduler = scheduler
+        self.stop_event = threading.Event()
+        self.worker = threading.Thread(target=self._inference_loop, daemon=True, name="multicam-inference")
+        self._results_lock = threading.Lock()
+        self._results = [(0, None)] * len(self.grabbers)
+        self._displayed = [0] * len(self.grabbers)
+        self.results_count = 0
+        self.batches_count = 0
+
+    def _pending(self, seen):
+        return [
+            (i, frame_id, frame) for i, (frame_id, frame) in enumerate(g.latest() for g in self.grabbers)
+            if frame_id > seen[i]
+        ]
+
+    def _inference_loop(self):
+        processed = [0] * len(self.grabbers)
+        while not self.stop_event.is_set():
+            if self.scheduler is not None:
+                wait = self.scheduler.time_until_next()
+                if wait > 0:
+                    self.stop_event.wait(min(wait, 0.1))
+                    continue
+            with self._cond:
+                self._cond.wait_for(lambda: self.stop_event.is_set() or self._pending(processed), timeout=0.1)
+            batch = self._pending(processed)
+            if not batch:
+                continue
+            for i, frame_id, _frame in batch:
+                processed[i] = frame_id
+            started = self.scheduler.begin() if self.scheduler is not None else None
+            try:
+                results = self.process_fn([(i, frame) for i, _frame_id, frame in batch])
+            except Exception as e:
+                print(f"[DSC_ERRO_PIPELINE] {e}")
+                continue
+            finally:
+                if started is not None:
+                    self.scheduler.end(started)
+            with self._results_lock:
+                for (i, frame_id, _frame), result in zip(batch, results):
+                    self._results[i] = (frame_id, result)
+                self.results_count += len(batch)
+                self.batches_count += 1
+
+    def start(self):
+        for grabber in self.grabbers:
+            grabber.start()
+        self.worker.start()
+        return self
+
+    def source_alive(self, index):
+        grabber = self.grabbers[index]
+        return grabber.is_alive() and not grabber.failed
+
+    @property
+    def is_running(self):
+        # Segue enquanto pelo menos uma câmera estiver entregando frames
+        return any(self.source_alive(i) for i in range(len(self.grabbers)))
+
+    def wait_frames(self, timeout=0.1):
+        # [(índice da fonte, frame_id, frame)] das câmeras com frame novo desde a última chamada
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending(self._displayed), timeout)
+        updates = self._pending(self._displayed)
+        for i, frame_id, _frame in updates:
+            self._displayed[i] = frame_id
+        return updates
+
+    def latest_results(self, index):
+        # (frame_id, resultado) mais recente da câmera; o frame_id pode ser anterior ao exibido
+        with self._results_lock:
+            return self._results[index]
+
+    def stop(self):
+        self.stop_event.set()
+        for grabber in self.grabbers:
+            grabber.stop()
+        with self._cond:
+            self._cond.notify_all()
+        for grabber in self.grabbers:
+            grabber.join(timeout=1.0)
+        self.worker.join(timeout=2.0)
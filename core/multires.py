@@ -0,0 +1,63 @@
+#Detecção multi-resolução: detecta numa cópia reduzida e recorta do frame original
+
+# -*- coding: utf-8 -*-
+import math
+
+import cv2
+import numpy as np
+
+
+def make_detection_proxy(frame, max_side):
+    # Retorna (proxy, escala proxy -> original). Sem redução (max_side 0/None ou frame
+    # já pequeno) o próprio frame é devolvido com escala 1.0.
+    h, w = frame.shape[:2]
+    longest = max(h, w)
+    if not max_side or longest <= max_side:
+        return frame, 1.0
+    factor = max_side / float(longest)
+    size = (max(1, int(round(w * factor))), max(1, int(round(h * factor))))
+    proxy = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    return proxy, w / float(size[0])
+
+
+def scale_box(box, scale, frame_shape=None):
+    # Leva (x, y, w, h) do proxy para o original, limitando às bordas do frame
+    x, y, w, h = [int(round(v * scale)) for v in box]
+    if frame_shape is not None:
+        frame_h, frame_w = frame_shape[:2]
+        x, y = max(0, min(x, frame_w - 1)), max(0, min(y, frame_h - 1))
+        w, h = max(0, min(w, frame_w - x)), max(0, min(h, frame_h - y))
+    return x, y, w, h
+
+
+def scale_point(point, scale):
+    if point is None:
+        return None
+    return (point[0] * scale, point[1] * scale)
+
+
+def crop_face(frame, box, left_eye=None, right_eye=None):
+    # Recorte em resolução total. Com os olhos, alinha como o DeepFace (rotação que
+    # nivela os olhos), mas girando só uma região em volta da caixa, não o frame inteiro.
+    x, y, w, h = box
+    if w <= 0 or h <= 0:
+        return frame[0:0, 0:0]
+    if left_eye is None or right_eye is None:
+        return frame[y:y + h, x:x + w]
+    angle = math.degrees(math.atan2(left_eye[1] - right_eye[1], left_eye[0] - right_eye[0]))
+    if abs(angle) < 0.5:
+        return frame[y:y + h, x:x + w]
+    frame_h, frame_w = frame.shape[:2]
+    pad = max(w, h) // 2
+    rx0, ry0 = max(0, x - pad), max(0, y - pad)
+    rx1, ry1 = min(frame_w, x + w + pad), min(frame_h, y + h + pad)
+    region = frame[ry0:ry1, rx0:rx1]
+    center = (x + w / 2.0 - rx0, y + h / 2.0 - ry0)
+    matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
+    rotated = cv2.warpAffine(region, matrix, (region.shape[1], region.shape[0]), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+    return rotated[y - ry0:y - ry0 + h, x - rx0:x - rx0 + w]
+
+
+def to_face_input(crop_bgr):
+    # Mesmo formato do 'face' devolvido por DeepFace.extract_faces: RGB float em [0, 1]
+    return crop_bgr[:, :, ::-1].astype(np.float32) / 255.0
@@ -0,0 +1,92 @@
+#Sprites de rótulos em cache (Pillow) mesclados só na região do texto
+
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+
+import numpy as np
+
+from core.lazy_imports import LazyModule, module_available
+
+# Pillow só é importado quando o primeiro rótulo é renderizado
+Image = LazyModule("PIL.Image")
+ImageDraw = LazyModule("PIL.ImageDraw")
+PIL_AVAILABLE = module_available("PIL")
+
+
+class LabelSprite:
+    # bgr/alpha cobrem só os pixels com tinta; offset_x/offset_y são a posição da tinta
+    # em relação à origem de draw.text() e width/height o tamanho do textbbox original
+    __slots__ = ("bgr", "alpha", "offset_x", "offset_y", "width", "height")
+
+    def __init__(self, bgr, alpha, offset_x, offset_y, width, height):
+        self.bgr = bgr
+        self.alpha = alpha
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.width = width
+        self.height = height
+
+
+def _text_bbox(font, text):
+    try:
+        return font.getbbox(text)
+    except AttributeError:
+        # Pillow < 8
+        w, h = font.getsize(text)
+        return (0, 0, w, h)
+
+
+def render_label(text, font, color_bgr):
+    left, top, right, bottom = _text_bbox(font, text)
+    size = (max(1, right - left), max(1, bottom - top))
+    mask = Image.new("L", size, 0)
+    ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255)
+    alpha = np.asarray(mask, dtype=np.uint16)[:, :, None]
+    bgr = np.empty((size[1], size[0], 3), dtype=np.uint16)
+    bgr[:] = color_bgr
+    # Cor já multiplicada pelo alpha: a mescla fica em uma soma e uma divisão
+    return LabelSprite(bgr * alpha, 255 - alpha, left, top, right - left, bottom - top)
+
+
+class LabelSpriteCache:
+    # LRU de sprites por (texto, fonte, cor): cada nome é rasterizado uma vez por sessão
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._sprites = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text, font, color_bgr):
+        key = (text, getattr(font, "path", None), getattr(font, "size", None), id(font), tuple(color_bgr))
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            self.hits += 1
+            return sprite
+        self.misses += 1
+        sprite = render_label(text, font, color_bgr)
+        self._sprites[key] = sprite
+        if len(self._sprites) > self.max_entries:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    def clear(self):
+        self._sprites.clear()
+
+    def __len__(self):
+        return len(self._sprites)
+
+
+def blend_sprite(frame, sprite, x, y):
+    # Mescla o sprite com origem de texto em (x, y); só a ROI do rótulo é tocada
+    x0, y0 = x + sprite.offset_x, y + sprite.offset_y
+    sh, sw = sprite.alpha.shape[:2]
+    fx0, fy0 = max(0, x0), max(0, y0)
+    fx1, fy1 = min(frame.shape[1], x0 + sw), min(frame.shape[0], y0 + sh)
+    if fx1 <= fx0 or fy1 <= fy0:
+        return
+    sx0, sy0 = fx0 - x0, fy0 - y0
+    sx1, sy1 = sx0 + (fx1 - fx0), sy0 + (fy1 - fy0)
+    roi = frame[fy0:fy1, fx0:fx1]
+    blended = roi * sprite.alpha[sy0:sy1, sx0:sx1] + sprite.bgr[sy0:sy1, sx0:sx1]
+    roi[:] = blended // 255
@@ -0,0 +1,214 @@
+#Pipeline em estágios do DeepScan: captura -> inferência -> exibição
+
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+# Descarte da fila do driver no modo de leituras espaçadas: um grab() mais rápido que isso veio
+# da fila; no máximo _MAX_DRAINED_FRAMES por leitura (em arquivos de vídeo todo grab() é rápido)
+_QUEUED_GRAB_SECONDS = 0.005
+_MAX_DRAINED_FRAMES = 8
+
+
+class DropOldestQueue:
+    # Fila limitada em que put() nunca bloqueia: quando cheia, descarta o item mais antigo.
+    # Assim nenhum estágio trabalha sobre frames velhos acumulados.
+    def __init__(self, maxsize=1):
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        # Retorna None se nada chegar dentro do timeout
+        with self._cond:
+            if not self._items and not self._cond.wait_for(lambda: self._items, timeout):
+                return None
+            return self._items.popleft()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class FrameGrabber(threading.Thread):
+    # Lê a câmera sem parar para esvaziar o buffer do driver e mantém só o frame mais novo.
+    # Guarda o instante de captura dos últimos frames para a idade ser medida mais adiante.
+    # frame_interval > 0 espaça as leituras (modo de baixo consumo, ver set_capture_mode).
+    def __init__(self, capture, outputs=(), history=256):
+        super().__init__(daemon=True)
+        self.capture = capture
+        self.outputs = list(outputs)
+        self.stop_event = threading.Event()
+        self.failed = False
+        self.frame_interval = 0.0
+        self._lock = threading.Lock()
+        self._latest = (0, None)
+        self._history = history
+        self._captured_at = OrderedDict()
+        self._pending_mode = None
+
+    def set_capture_mode(self, frame_interval=0.0, configure_fn=None):
+        # Chamado de outra thread: o próprio grabber aplica o intervalo e configure_fn(capture)
+        # (ex.: trocar a resolução) antes da próxima leitura, nunca no meio de um read()
+        with self._lock:
+            self._pending_mode = (frame_interval, configure_fn)
+
+    def _apply_pending_mode(self):
+        with self._lock:
+            mode, self._pending_mode = self._pending_mode, None
+        if mode is None:
+            return
+        self.frame_interval, configure_fn = mode
+        if configure_fn is not None:
+            try:
+                configure_fn(self.capture)
+            except Exception as e:
+                print(f"[DSC_AVISO] Falha ao reconfigurar a câmera: {e}")
+
+    def run(self):
+        frame_id = 0
+        while not self.stop_event.is_set():
+            self._apply_pending_mode()
+            if self.frame_interval > 0 and self.stop_event.wait(self.frame_interval):
+                break
+            ret, frame = self._read_latest() if self.frame_interval > 0 else self.capture.read()
+            if not ret:
+                self.failed = True
+                break
+            frame_id += 1
+            with self._lock:
+                self._latest = (frame_id, frame)
+                self._captured_at[frame_id] = time.monotonic()
+                if len(self._captured_at) > self._history:
+                    self._captured_at.popitem(last=False)
+            for queue in self.outputs:
+                queue.put((frame_id, frame))
+
+    def _read_latest(self):
+        # Leituras espaçadas: o driver segue enfileirando frames no intervalo. grab() descarta os
+        # que já estavam na fila (voltam na hora) sem decodificar e só o último é decodificado,
+        # para a exibição e o despertar não ficarem vários intervalos atrasados
+        for _ in range(_MAX_DRAINED_FRAMES):
+            started = time.monotonic()
+            if not self.capture.grab():
+                return False, None
+            if time.monotonic() - started > _QUEUED_GRAB_SECONDS:
+                # Esperou a câmera: este frame é novo e a fila está vazia
+                break
+        return self.capture.retrieve()
+
+    def latest(self):
+        with self._lock:
+            return self._latest
+
+    def frame_age(self, frame_id):
+        # Segundos desde a captura (0.0 se o frame já saiu do histórico)
+        with self._lock:
+            captured_at = self._captured_at.get(frame_id)
+        return time.monotonic() - captured_at if captured_at is not None else 0.0
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class InferenceWorker(threading.Thread):
+    # Consome o frame mais recente, roda process_fn(frame) e publica (frame_id, resultado).
+    # Com um FrameScheduler, espera a vez do próximo frame (enquanto isso a fila troca o frame
+    # pelo mais novo) e pula frames que sairiam velhos demais; frame_age(frame_id) dá a idade.
+    def __init__(self, inputs, process_fn, on_result, scheduler=None, frame_age=None):
+        super().__init__(daemon=True)
+        self.inputs = inputs
+        self.process_fn = process_fn
+        self.on_result = on_result
+        self.scheduler = scheduler
+        self.frame_age = frame_age
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            if self.scheduler is not None:
+                wait = self.scheduler.time_until_next()
+                if wait > 0:
+                    self.stop_event.wait(min(wait, 0.1))
+                    continue
+            item = self.inputs.get(timeout=0.1)
+            if item is None:
+                continue
+            frame_id, frame = item
+            if self.scheduler is not None and self.frame_age is not None and self.scheduler.is_stale(self.frame_age(frame_id), len(self.inputs) > 0):
+                continue
+            started = self.scheduler.begin() if self.scheduler is not None else None
+            try:
+                result = self.process_fn(frame)
+            except Exception as e:
+                print(f"[DSC_ERRO_PIPELINE] {e}")
+                continue
+            finally:
+                if started is not None:
+                    self.scheduler.end(started)
+            self.on_result(frame_id, result)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class RecognitionPipeline:
+    # Liga um FrameGrabber a N InferenceWorkers por filas "drop-oldest".
+    # O estágio de exibição fica com quem chama (cv2.imshow precisa de uma única thread):
+    # wait_frame() entrega cada frame novo na taxa da câmera e latest_results() o
+    # resultado de inferência mais recente, que pode ser de um frame um pouco anterior.
+    # O scheduler (opcional, FrameScheduler) é compartilhado pelos workers.
+    def __init__(self, capture, process_fn, num_workers=1, queue_size=1, scheduler=None):
+        self.inference_queue = DropOldestQueue(queue_size)
+        self.display_queue = DropOldestQueue(1)
+        self.grabber = FrameGrabber(capture, outputs=(self.inference_queue, self.display_queue))
+        self.scheduler = scheduler
+        # Sem process_fn nenhum worker é criado: a inferência fica a cargo de quem estende o pipeline
+        self.workers = [
+            InferenceWorker(self.inference_queue, process_fn, self._on_result, scheduler=scheduler, frame_age=self.grabber.frame_age)
+            for _ in range(max(1, num_workers))
+        ] if process_fn is not None else []
+        self._results_lock = threading.Lock()
+        self._results = (0, None)
+        self.results_count = 0
+
+    def _on_result(self, frame_id, result):
+        with self._results_lock:
+            # Com vários workers um resultado pode chegar fora de ordem; o mais velho é descartado
+            if frame_id > self._results[0]:
+                self._results = (frame_id, result)
+                self.results_count += 1
+
+    def start(self):
+        self.grabber.start()
+        for worker in self.workers:
+            worker.start()
+        return self
+
+    @property
+    def is_running(self):
+        return self.grabber.is_alive() and not self.grabber.failed
+
+    def wait_frame(self, timeout=0.1):
+        # Retorna (frame_id, frame) ou None se nenhum frame novo chegou no timeout
+        return self.display_queue.get(timeout=timeout)
+
+    def latest_results(self):
+        with self._results_lock:
+            return self._results
+
+    def stop(self):
+        self.grabber.stop()
+        for worker in self.workers:
+            worker.stop()
+        self.grabber.join(timeout=1.0)
+        for worker in self.workers:
+            worker.join(timeout=2.0)
@@ -0,0 +1,235 @@
+#Sensor de presença HC-SR04 (Arduino/DeepHCSR04arduino) lido pela serial numa thread
+
+# -*- coding: utf-8 -*-
+import os
+import threading
+import time
+from collections import deque
+
+from core.lazy_imports import LazyModule, module_available
+
+try:
+    import select
+    import termios
+    import tty
+except ImportError:
+    # Windows: só com pyserial
+    termios = None
+
+serial = LazyModule("serial")
+
+# Alcance útil do HC-SR04 (cm); pulseIn sem eco devolve 0, que conta como "ninguém perto"
+_MIN_VALID_CM = 2.0
+_MAX_VALID_CM = 400.0
+
+
+class _PosixSerial:
+    # Porta serial só com a biblioteca padrão (termios), para Linux/macOS sem pyserial.
+    # Também abre o pseudo-terminal do simulador. readline() devolve b"" no timeout, como o pyserial.
+    def __init__(self, port, baudrate=9600, timeout=1.0):
+        self.fd = os.open(port, os.O_RDONLY | os.O_NOCTTY | os.O_NONBLOCK)
+        tty.setraw(self.fd)
+        speed = getattr(termios, f"B{baudrate}", None)
+        if speed is not None:
+            attrs = termios.tcgetattr(self.fd)
+            attrs[4] = attrs[5] = speed
+            termios.tcsetattr(self.fd, termios.TCSANOW, attrs)
+        self.timeout = timeout
+        self._buffer = bytearray()
+
+    def readline(self):
+        deadline = time.monotonic() + self.timeout
+        while b"\n" not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([self.fd], [], [], remaining)[0]:
+                return b""
+            chunk = os.read(self.fd, 256)
+            if not chunk:
+                raise OSError("porta serial fechada")
+            self._buffer.extend(chunk)
+        line, _, rest = bytes(self._buffer).partition(b"\n")
+        self._buffer = bytearray(rest)
+        return line + b"\n"
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_serial_port(port, baudrate=9600, timeout=1.0):
+    # pyserial quando instalado (obrigatório no Windows); senão termios
+    if module_available("serial"):
+        return serial.Serial(port, baudrate, timeout=timeout)
+    if termios is not None:
+        return _PosixSerial(port, baudrate, timeout)
+    raise RuntimeError("pyserial não está instalado (pip install pyserial).")
+
+
+def parse_distance(line):
+    # Uma linha do sketch ("123.45\r\n") em cm; None para lixo (ex.: meia linha após o reset do Arduino)
+    try:
+        distance = float(line.decode("ascii", errors="ignore").strip())
+    except ValueError:
+        return None
+    return distance if 0.0 <= distance < 10000.0 else None
+
+
+class PresenceSensor(threading.Thread):
+    # Lê as distâncias do HC-SR04 (uma linha a cada ~500 ms) e transforma em eventos de presença:
+    # presente após enter_samples leituras seguidas até presence_distance; ausente após
+    # leave_samples leituras seguidas longe e hold_seconds desde a última leitura perto (uma
+    # pessoa parada que "some" numa leitura não derruba a sessão). Reconecta se a porta cair.
+    # Sem leituras há stale_after segundos (cabo solto, Arduino reiniciando) is_present fica
+    # True: sem sensor o DeepScan volta a funcionar como se não houvesse portão.
+    def __init__(self, port, baudrate=9600, presence_distance=80.0, enter_samples=2, leave_samples=4,
+                 hold_seconds=3.0, stale_after=5.0, reconnect_seconds=2.0, opener=open_serial_port,
+                 on_presence=None, on_absence=None, clock=time.monotonic):
+        super().__init__(daemon=True, name="presence_sensor")
+        self.port = port
+        self.baudrate = baudrate
+        self.presence_distance = presence_distance
+        self.enter_samples = enter_samples
+        self.leave_samples = leave_samples
+        self.hold_seconds = hold_seconds
+        self.stale_after = stale_after
+        self.reconnect_seconds = reconnect_seconds
+        self.opener = opener
+        self.on_presence = on_presence
+        self.on_absence = on_absence
+        self.clock = clock
+        self.present = None
+        self.last_distance = None
+        self.last_reading_at = None
+        self.events = deque(maxlen=100)
+        self.stop_event = threading.Event()
+        self._present_event = threading.Event()
+        self._near_count = 0
+        self._far_count = 0
+        self._last_near = float("-inf")
+        self._lock = threading.Lock()
+
+    @property
+    def is_present(self):
+        with self._lock:
+            if self.present is None or self.last_reading_at is None:
+                return True
+            if self.clock() - self.last_reading_at > self.stale_after:
+                return True
+            return self.present
+
+    def wait_for_presence(self, timeout=None):
+        return self._present_event.wait(timeout)
+
+    def feed(self, distance):
+        # Aplica uma leitura em cm (chamado pela thread; exposto para testes e outras fontes)
+        now = self.clock()
+        near = _MIN_VALID_CM <= distance <= min(self.presence_distance, _MAX_VALID_CM)
+        if distance != 0.0 and distance < _MIN_VALID_CM:
+            return
+        changed = None
+        with self._lock:
+            self.last_distance = distance
+            self.last_reading_at = now
+            if near:
+                self._near_count += 1
+                self._far_count = 0
+                self._last_near = now
+            else:
+                self._far_count += 1
+                self._near_count = 0
+            if self.present is not True and self._near_count >= self.enter_samples:
+                self.present = changed = True
+            elif self.present is not False and self._far_count >= self.leave_samples and now - self._last_near >= self.hold_seconds:
+                self.present = changed = False
+            if changed is not None:
+                self.events.append((time.time(), changed, distance))
+        if changed is True:
+            self._present_event.set()
+            print(f"[SENSOR_INFO] Presença a {distance:.0f} cm.")
+            if self.on_presence is not None:
+                self.on_presence(distance)
+        elif changed is False:
+            self._present_event.clear()
+            print("[SENSOR_INFO] Ninguém na porta.")
+            if self.on_absence is not None:
+                self.on_absence(distance)
+
+    def run(self):
+        failures = 0
+        while not self.stop_event.is_set():
+            try:
+                port = self.opener(self.port, self.baudrate)
+            except Exception as e:
+                # Só a primeira falha seguida vai para o log; as tentativas continuam em silêncio
+                if failures == 0:
+                    print(f"[SENSOR_ERRO] Não foi possível abrir '{self.port}': {e}. Tentando de novo a cada {self.reconnect_seconds:g}s.")
+                failures += 1
+                self.stop_event.wait(self.reconnect_seconds)
+                continue
+            failures = 0
+            print(f"[SENSOR_INFO] Lendo o HC-SR04 em '{self.port}'.")
+            try:
+                while not self.stop_event.is_set():
+                    line = port.readline()
+                    if not line:
+                        continue
+                    distance = parse_distance(line)
+                    if distance is not None:
+                        self.feed(distance)
+            except Exception as e:
+                print(f"[SENSOR_ERRO] Leitura interrompida: {e}")
+                self.stop_event.wait(self.reconnect_seconds)
+            finally:
+                try:
+                    port.close()
+                except Exception:
+                    pass
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class PresenceGate:
+    # Mesma interface do MotionGate (should_detect, idle, on_idle/on_wake, skipped), guiada pelo
+    # sensor: detecção e reconhecimento só com alguém perto da porta. As trocas de modo partem
+    # da thread do sensor, então a câmera acorda assim que a pessoa chega, sem esperar um frame.
+    # A thread de inferência também acorda o portão (sensor mudo): o lock garante uma troca por vez.
+    def __init__(self, sensor):
+        self.sensor = sensor
+        self.on_idle = None
+        self.on_wake = None
+        self.idle = False
+        self.skipped = 0
+        self._lock = threading.Lock()
+        sensor.on_presence = self._on_presence
+        sensor.on_absence = self._on_absence
+
+    def _on_presence(self, _distance):
+        with self._lock:
+            if self.idle:
+                self.idle = False
+                if self.on_wake is not None:
+                    self.on_wake()
+
+    def _on_absence(self, _distance):
+        with self._lock:
+            if not self.idle:
+                self.idle = True
+                if self.on_idle is not None:
+                    self.on_idle()
+
+    def should_detect(self, frame, faces_present=False):
+        if self.sensor.is_present:
+            # Também cobre o sensor mudo (is_present por falta de leituras): a câmera volta ao normal
+            if self.idle:
+                self._on_presence(None)
+            return True
+        self.skipped += 1
+        return False
+
+    def start(self):
+        self.sensor.start()
+        return self
+
+    def close(self):
+        self.sensor.stop()
+        self.sensor.join(timeout=2.0)
@@ -0,0 +1,278 @@
+#Inferência em processos separados com frames entregues por memória compartilhada
+
+# -*- coding: utf-8 -*-
+import multiprocessing
+import queue
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core.pipeline import RecognitionPipeline
+
+
+class SharedFrameRing:
+    # Anel de 'slots' frames do mesmo formato num único bloco de shared_memory.
+    # Os processos recebem só (slot, formato) pela fila; o frame em si nunca é serializado.
+    def __init__(self, frame_shape, dtype=np.uint8, slots=4):
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        self.frame_nbytes = int(np.prod(self.frame_shape)) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(create=True, size=self.frame_nbytes * slots)
+        self.frames = np.ndarray((slots,) + self.frame_shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, slot, frame):
+        np.copyto(self.frames[slot], frame)
+
+    def close(self):
+        self.frames = None
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def attach_frame(shm_cache, shm_name, slot, shape, dtype):
+    # Lado do worker: abre o bloco uma vez e devolve uma view do slot (sem cópia)
+    shm = shm_cache.get(shm_name)
+    if shm is None:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        shm_cache[shm_name] = shm
+    dtype = np.dtype(dtype)
+    offset = slot * int(np.prod(shape)) * dtype.itemsize
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+
+
+def _worker_main(worker_index, init_fn, init_args, process_fn, tasks, results):
+    # Cada processo carrega o próprio modelo uma vez (init_fn) e processa frames até receber None.
+    # Se a carga falhar (modelo, dependência ausente, memória) o erro volta ao processo principal.
+    try:
+        state = init_fn(*init_args)
+    except Exception as e:
+        results.put(("init_error", worker_index, f"{type(e).__name__}: {e}"))
+        return
+    shm_cache = {}
+    results.put(("ready", worker_index, None))
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, frame_id, shm_name, shape, dtype = task
+            try:
+                frame = attach_frame(shm_cache, shm_name, slot, shape, dtype)
+                result = process_fn(frame, state)
+            except Exception as e:
+                print(f"[DSC_ERRO_WORKER] {e}")
+                result = None
+            results.put((slot, frame_id, result))
+    finally:
+        for shm in shm_cache.values():
+            shm.close()
+
+
+class ProcessRecognitionPool:
+    # Pool de processos de inferência. put((frame_id, frame)) segue a interface das filas
+    # do FrameGrabber: copia o frame para um slot livre do anel, ou o descarta se todos
+    # os workers estiverem ocupados (nunca acumula frames velhos); retorna se o frame foi aceito.
+    # Cada worker tem a própria fila de tarefas, então os slots de um worker que morre
+    # voltam ao anel; quando nenhum worker resta, failed fica True e error guarda o motivo.
+    def __init__(self, init_fn, process_fn, init_args=(), num_workers=2, slots_per_worker=2, on_result=None):
+        self.init_fn = init_fn
+        self.process_fn = process_fn
+        self.init_args = init_args
+        self.num_workers = max(1, num_workers)
+        self.slots = self.num_workers * max(1, slots_per_worker)
+        self.on_result = on_result
+        self.dropped = 0
+        self.failed = False
+        self.error = None
+        self._ctx = multiprocessing.get_context("spawn")
+        self._tasks = [self._ctx.Queue() for _ in range(self.num_workers)]
+        self._results = self._ctx.Queue()
+        self._free_slots = queue.Queue()
+        self._lock = threading.Lock()
+        self._ready = [False] * self.num_workers
+        self._dead = [False] * self.num_workers
+        self._slot_owner = {}
+        self._ring = None
+        self._processes = []
+        self._collector = None
+        self._closing = False
+        self._stop_event = threading.Event()
+
+    @property
+    def ready_workers(self):
+        with self._lock:
+            return sum(1 for ready, dead in zip(self._ready, self._dead) if ready and not dead)
+
+    def start(self):
+        for worker_index in range(self.num_workers):
+            process = self._ctx.Process(target=_worker_main, args=(worker_index, self.init_fn, self.init_args, self.process_fn, self._tasks[worker_index], self._results), daemon=True)
+            process.start()
+            self._processes.append(process)
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        return self
+
+    def _pick_worker(self):
+        # Worker pronto e vivo com menos frames pendentes (chamado com _lock)
+        load = [0] * self.num_workers
+        for owner in self._slot_owner.values():
+            load[owner] += 1
+        candidates = [i for i in range(self.num_workers) if self._ready[i] and not self._dead[i]]
+        return min(candidates, key=lambda i: load[i]) if candidates else None
+
+    def put(self, item):
+        frame_id, frame = item
+        if self._ring is None:
+            self._ring = SharedFrameRing(frame.shape, frame.dtype, self.slots)
+            for slot in range(self.slots):
+                self._free_slots.put(slot)
+        if frame.shape != self._ring.frame_shape:
+            self.dropped += 1
+            return False
+        with self._lock:
+            worker_index = self._pick_worker()
+            if worker_index is None:
+                self.dropped += 1
+                return False
+            try:
+                slot = self._free_slots.get_nowait()
+            except queue.Empty:
+                self.dropped += 1
+                return False
+            self._slot_owner[slot] = worker_index
+        self._ring.write(slot, frame)
+        self._tasks[worker_index].put((slot, frame_id, self._ring.name, self._ring.frame_shape, self._ring.dtype.str))
+        return True
+
+    def _mark_dead(self, worker_index, error, overwrite=False):
+        with self._lock:
+            if not self._dead[worker_index]:
+                self._dead[worker_index] = True
+                # Slots entregues ao worker morto nunca voltariam: devolve ao anel
+                for slot in [slot for slot, owner in self._slot_owner.items() if owner == worker_index]:
+                    del self._slot_owner[slot]
+                    self._free_slots.put(slot)
+                print(f"[DSC_ERRO] Processo de inferência {worker_index} parou: {error}")
+            # O erro de init (mais informativo) vence o "processo encerrado" visto antes dele
+            if self.error is None or overwrite:
+                self.error = error
+            if all(self._dead):
+                self.failed = True
+
+    def _reap_dead_workers(self):
+        if self._closing:
+            return
+        for worker_index, process in enumerate(self._processes):
+            if not self._dead[worker_index] and not process.is_alive():
+                self._mark_dead(worker_index, f"processo encerrado (código {process.exitcode})")
+
+    def _collect(self):
+        last_reap = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                slot, frame_id, result = self._results.get(timeout=0.1)
+            except queue.Empty:
+                # Só com a fila vazia: uma mensagem init_error pendente chega antes da morte do processo
+                self._reap_dead_workers()
+                last_reap = time.monotonic()
+                continue
+            if slot == "ready":
+                with self._lock:
+                    self._ready[frame_id] = True
+                continue
+            if slot == "init_error":
+                self._mark_dead(frame_id, result, overwrite=True)
+                continue
+            with self._lock:
+                owned = self._slot_owner.pop(slot, None) is not None
+            if owned:
+                self._free_slots.put(slot)
+            if result is not None and self.on_result is not None:
+                self.on_result(frame_id, result)
+            if time.monotonic() - last_reap > 1.0:
+                self._reap_dead_workers()
+                last_reap = time.monotonic()
+
+    def stop(self):
+        self._closing = True
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        self._stop_event.set()
+        if self._collector is not None:
+            self._collector.join(timeout=1.0)
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+
+
+class ProcessRecognitionPipeline(RecognitionPipeline):
+    # Mesma interface do RecognitionPipeline (wait_frame/latest_results), mas a inferência
+    # roda em processos: o GIL fica livre para o Tk e a vazão escala com os núcleos.
+    # decode_fn(resultado do worker) converte o resultado serializável para o formato da exibição.
+    # O portão (MotionGate/PresenceGate) e o FrameScheduler agem no processo principal, antes de o
+    # frame ir para a memória compartilhada: frame sem atividade vira resultado vazio sem ocupar
+    # worker, e o ritmo alvo vale como no backend de threads.
+    def __init__(self, capture, init_fn, process_fn, init_args=(), num_workers=2, decode_fn=None, gate=None, scheduler=None):
+        super().__init__(capture, None, scheduler=scheduler)
+        self.decode_fn = decode_fn
+        self.gate = gate
+        self.pool = ProcessRecognitionPool(init_fn, process_fn, init_args, num_workers, on_result=self._on_pool_result)
+        self.grabber.outputs = [self, self.display_queue]
+        self._faces_present = False
+        self._started = OrderedDict()
+        self._started_lock = threading.Lock()
+
+    def put(self, item):
+        # Saída do grabber para o pool (mesma interface das filas)
+        frame_id, frame = item
+        if self.scheduler is not None and self.scheduler.time_until_next() > 0:
+            # Ainda não é a vez: o próximo frame da câmera toma o lugar deste
+            return
+        if self.gate is not None and not self.gate.should_detect(frame, faces_present=self._faces_present):
+            self._faces_present = False
+            self._on_result(frame_id, [])
+            return
+        started = self.scheduler.begin() if self.scheduler is not None else None
+        if self.pool.put(item) and started is not None:
+            with self._started_lock:
+                self._started[frame_id] = started
+                # Frames perdidos com um worker morto nunca voltam: o registro não cresce sem limite
+                while len(self._started) > self.pool.slots * 4:
+                    self._started.popitem(last=False)
+
+    def _on_pool_result(self, frame_id, result):
+        if self.scheduler is not None:
+            with self._started_lock:
+                started = self._started.pop(frame_id, None)
+            if started is not None:
+                self.scheduler.end(started)
+        faces = self.decode_fn(result) if self.decode_fn else result
+        self._faces_present = bool(faces)
+        self._on_result(frame_id, faces)
+
+    @property
+    def is_running(self):
+        return super().is_running and not self.pool.failed
+
+    def start(self):
+        self.pool.start()
+        return super().start()
+
+    def stop(self):
+        super().stop()
+        self.pool.stop()
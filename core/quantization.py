@@ -0,0 +1,120 @@
+#Armazenamento compacto de embeddings normalizados: float32, float16 ou int8 com escala por linha
+
+# -*- coding: utf-8 -*-
+import numpy as np
+
+STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+_INT8_MAX = 127.0
+# Linhas convertidas por vez em dot(): a memória temporária fica em ~4 MB (512 dims), nunca a matriz toda
+_DOT_BLOCK_ROWS = 2048
+
+
+class QuantizedVectors:
+    # Matriz N x D contígua no tipo escolhido, sem um objeto Python por embedding.
+    # int8: cada linha guarda round(v * 127 / max|v|) e a escala max|v| / 127 em float32
+    # (erro de até meia escala por componente); float16 guarda os valores direto.
+    # dot() compara consultas float32 com os dados compactos convertendo bloco a bloco
+    # num buffer reaproveitado. No NumPy a conversão int8 -> float32 é vetorizada e a
+    # float16 -> float32 não: int8 fica perto da velocidade do float32, float16 bem atrás.
+    def __init__(self, dim, storage="float32"):
+        if storage not in STORAGE_DTYPES:
+            raise ValueError(f"Armazenamento de embeddings desconhecido: '{storage}'")
+        self.dim = dim
+        self.storage = storage
+        self.data = np.empty((0, dim), dtype=STORAGE_DTYPES[storage])
+        self.scales = np.empty(0, dtype=np.float32) if storage == "int8" else None
+
+    @classmethod
+    def from_float(cls, vectors, storage="float32"):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[np.newaxis, :]
+        quantized = cls(vectors.shape[1], storage)
+        quantized.data, scales = quantized._encode(vectors)
+        if scales is not None:
+            quantized.scales = scales
+        return quantized
+
+    @classmethod
+    def from_arrays(cls, data, scales=None):
+        # Inverso de to_arrays(): o tipo do array salvo define o armazenamento
+        storage = {np.dtype(dtype): name for name, dtype in STORAGE_DTYPES.items()}[data.dtype]
+        quantized = cls(int(data.shape[1]), storage)
+        quantized.data = data
+        if storage == "int8":
+            quantized.scales = np.asarray(scales, dtype=np.float32)
+        return quantized
+
+    def to_arrays(self):
+        arrays = {"vectors": self.data}
+        if self.scales is not None:
+            arrays["scales"] = self.scales
+        return arrays
+
+    def _encode(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if self.storage != "int8":
+            return vectors.astype(self.data.dtype), None
+        peaks = np.abs(vectors).max(axis=1)
+        peaks[peaks == 0] = 1.0
+        data = np.rint(vectors * (_INT8_MAX / peaks)[:, np.newaxis]).astype(np.int8)
+        return data, (peaks / _INT8_MAX).astype(np.float32)
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def append(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(self) and vectors.shape[-1] != self.dim:
+            # Galeria criada vazia: a dimensão vem do primeiro embedding
+            self.__init__(vectors.shape[-1], self.storage)
+        data, scales = self._encode(vectors)
+        self.data = np.concatenate([self.data, data])
+        if scales is not None:
+            self.scales = np.concatenate([self.scales, scales])
+
+    def set_row(self, row, vector):
+        data, scales = self._encode(vector)
+        self.data[row] = data[0]
+        if scales is not None:
+            self.scales[row] = scales[0]
+
+    def copy_row(self, dst, src):
+        self.data[dst] = self.data[src]
+        if self.scales is not None:
+            self.scales[dst] = self.scales[src]
+
+    def truncate(self, size):
+        self.data = self.data[:size]
+        if self.scales is not None:
+            self.scales = self.scales[:size]
+
+    def to_float(self, rows=slice(None)):
+        vectors = self.data[rows].astype(np.float32)
+        if self.scales is not None:
+            vectors *= self.scales[rows][..., np.newaxis]
+        return vectors
+
+    def dot(self, queries):
+        # (Q x N) produtos internos das consultas float32 com todas as linhas
+        queries = np.asarray(queries, dtype=np.float32)
+        if self.storage == "float32":
+            return queries @ self.data.T
+        out = np.empty((len(queries), len(self)), dtype=np.float32)
+        buffer = np.empty((min(_DOT_BLOCK_ROWS, len(self)), self.dim), dtype=np.float32)
+        for start in range(0, len(self), _DOT_BLOCK_ROWS):
+            stop = min(start + _DOT_BLOCK_ROWS, len(self))
+            block = buffer[:stop - start]
+            np.copyto(block, self.data[start:stop])
+            np.matmul(queries, block.T, out=out[:, start:stop])
+        if self.scales is not None:
+            out *= self.scales
+        return out
+
+    def dot_rows(self, rows, query):
+        # Produto interno de uma consulta só com as linhas pedidas (listas do IVF, representantes)
+        return self.to_float(rows) @ np.asarray(query, dtype=np.float32)
@@ -0,0 +1,88 @@
+#Agendamento adaptativo da inferência: ritmo alvo, frescor máximo do frame e orçamento de rostos
+
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import deque
+
+
+def _median(values):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2.0
+
+
+class FrameScheduler:
+    # Mede a latência real da inferência (mediana numa janela móvel) e decide:
+    #  - quando o próximo frame pode começar: no máximo target_fps reconhecimentos por segundo
+    #    (0 = sem limite), sem frames fixos pulados e sem fila crescendo numa máquina lenta;
+    #  - se um frame está velho demais: havendo um mais novo à espera, ele é pulado quando
+    #    idade + latência prevista passa de max_staleness (o mais novo nunca é pulado);
+    #  - quantos rostos cabem no orçamento do frame pelo custo medido de cada embedding
+    #    (frame_budget None = todos). Os que não couberem ficam para os frames seguintes.
+    # Compartilhado entre workers: todo estado muda sob o lock.
+    def __init__(self, target_fps=15.0, max_staleness=0.5, frame_budget=None, window=30, clock=time.monotonic):
+        self.min_interval = 1.0 / target_fps if target_fps and target_fps > 0 else 0.0
+        self.max_staleness = max_staleness
+        self.frame_budget = frame_budget
+        self.clock = clock
+        self.skipped_stale = 0
+        self.deferred_faces = 0
+        self._latencies = deque(maxlen=window)
+        self._face_costs = deque(maxlen=window)
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def expected_latency(self):
+        with self._lock:
+            return _median(self._latencies)
+
+    @property
+    def face_cost(self):
+        with self._lock:
+            return _median(self._face_costs)
+
+    def time_until_next(self):
+        with self._lock:
+            return max(0.0, self._next_start - self.clock())
+
+    def is_stale(self, age, newer_available):
+        if not newer_available or age + self.expected_latency <= self.max_staleness:
+            return False
+        with self._lock:
+            self.skipped_stale += 1
+        return True
+
+    def begin(self):
+        now = self.clock()
+        with self._lock:
+            self._next_start = now + self.min_interval
+        return now
+
+    def end(self, started):
+        elapsed = self.clock() - started
+        with self._lock:
+            self._latencies.append(elapsed)
+        return elapsed
+
+    def record_faces(self, count, seconds):
+        if count > 0:
+            with self._lock:
+                self._face_costs.append(seconds / count)
+
+    def face_quota(self, frame_started, pending):
+        # Quantos dos 'pending' rostos ainda cabem no frame; pelo menos 1, para nenhum rosto esperar para sempre
+        cost = self.face_cost
+        if self.frame_budget is None or pending <= 1 or cost <= 0:
+            return pending
+        remaining = self.frame_budget - (self.clock() - frame_started)
+        quota = max(1, min(pending, int(remaining / cost)))
+        with self._lock:
+            self.deferred_faces += pending - quota
+        return quota
+
+    def summary(self):
+        return f"latência p50 {self.expected_latency * 1000.0:.1f} ms, {self.skipped_stale} frames velhos pulados, {self.deferred_faces} rostos adiados"
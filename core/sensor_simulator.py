@@ -0,0 +1,89 @@
+#Simulador do HC-SR04 num pseudo-terminal (pty): testa o sensor de presença sem o Arduino
+#Uso (na raiz do projeto, Linux/macOS): python -m core.sensor_simulator --script 10:300 5:40 10:300 --loop
+#e aponte PRESENCE_SENSOR_PORT para a porta impressa.
+
+# -*- coding: utf-8 -*-
+import argparse
+import os
+import pty
+import threading
+import time
+import tty
+
+
+def scripted_distances(segments, loop=False):
+    # [(segundos, cm), ...] -> distance_fn(t); sem loop fica na última distância
+    total = sum(duration for duration, _ in segments)
+
+    def distance_at(t):
+        if loop and total > 0:
+            t %= total
+        for duration, distance in segments:
+            if t < duration:
+                return distance
+            t -= duration
+        return segments[-1][1]
+    return distance_at
+
+
+class SimulatedHCSR04(threading.Thread):
+    # Escreve no lado mestre do pty o mesmo que o sketch DeepHCSR04arduino (Serial.println de um
+    # float a cada interval s); o PresenceSensor abre self.port como se fosse a porta do Arduino.
+    # distance_fn(t) dá a distância em cm t segundos após o start.
+    def __init__(self, distance_fn, interval=0.5):
+        super().__init__(daemon=True, name="hcsr04_simulator")
+        self.distance_fn = distance_fn
+        self.interval = interval
+        self.master_fd, self.slave_fd = pty.openpty()
+        # Sem eco nem tradução de fim de linha: o lado mestre nunca enche com o eco do que escreve
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+        self.stop_event = threading.Event()
+        self.lines_written = 0
+
+    def run(self):
+        started = time.monotonic()
+        while not self.stop_event.is_set():
+            distance = self.distance_fn(time.monotonic() - started)
+            try:
+                os.write(self.master_fd, f"{distance:.2f}\r\n".encode("ascii"))
+            except OSError:
+                break
+            self.lines_written += 1
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+        self.join(timeout=2.0)
+        for fd in (self.master_fd, self.slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def _parse_segment(text):
+    duration, distance = text.split(":")
+    return float(duration), float(distance)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HC-SR04 simulado num pseudo-terminal")
+    parser.add_argument("--script", nargs="+", type=_parse_segment, default=[(10.0, 300.0), (5.0, 40.0)], help="Trechos segundos:cm em sequência")
+    parser.add_argument("--interval", type=float, default=0.5, help="Segundos entre leituras (o sketch usa 500 ms)")
+    parser.add_argument("--loop", action="store_true", help="Repete o roteiro")
+    args = parser.parse_args()
+
+    simulator = SimulatedHCSR04(scripted_distances(args.script, loop=args.loop), interval=args.interval)
+    simulator.start()
+    print(f"Porta simulada: {simulator.port}  (Ctrl+C para sair)")
+    try:
+        while simulator.is_alive():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+#Templates por pessoa a partir de várias fotos (centróide + representantes)
+
+# -*- coding: utf-8 -*-
+import numpy as np
+
+from core.gallery import l2_normalize
+
+
+def build_person_template(embeddings, max_representatives=2, outlier_distance=None):
+    # Reduz os embeddings de todas as fotos de uma pessoa a um centróide normalizado
+    # e a até 'max_representatives' fotos que cobrem a variação (pose, luz) em torno dele.
+    # Fotos muito distantes do centróide (detecção ruim) são descartadas se sobrar alguma.
+    vectors = l2_normalize(embeddings)
+    centroid = l2_normalize(vectors.mean(axis=0))[0]
+    if outlier_distance is not None and len(vectors) >= 3:
+        keep = (1.0 - vectors @ centroid) <= outlier_distance
+        if keep.any() and not keep.all():
+            vectors = vectors[keep]
+            centroid = l2_normalize(vectors.mean(axis=0))[0]
+
+    if len(vectors) < 2 or max_representatives <= 0:
+        return centroid, None
+
+    # Amostragem do ponto mais distante: começa pela foto mais longe do centróide
+    chosen = []
+    closest = 1.0 - vectors @ centroid
+    for _ in range(min(max_representatives, len(vectors))):
+        idx = int(np.argmax(closest))
+        if closest[idx] <= 0:
+            break
+        chosen.append(idx)
+        closest = np.minimum(closest, 1.0 - vectors @ vectors[idx])
+    return centroid, (vectors[chosen] if chosen else None)
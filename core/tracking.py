@@ -0,0 +1,138 @@
+#Rastreamento de rostos entre detecções (IoU/centróide) com votação de identidade
+
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import Counter, deque
+
+
+def box_iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    inter_w = min(ax + aw, bx + bw) - max(ax, bx)
+    inter_h = min(ay + ah, by + bh) - max(ay, by)
+    if inter_w <= 0 or inter_h <= 0:
+        return 0.0
+    inter = inter_w * inter_h
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+def _centroid_distance(a, b):
+    # Distância entre centros, normalizada pelo tamanho médio das caixas
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    dx = (ax + aw / 2.0) - (bx + bw / 2.0)
+    dy = (ay + ah / 2.0) - (by + bh / 2.0)
+    scale = max(1.0, (aw + ah + bw + bh) / 4.0)
+    return (dx * dx + dy * dy) ** 0.5 / scale
+
+
+class FaceTrack:
+    __slots__ = ("track_id", "box", "misses", "confidence", "last_verified", "votes", "entries", "is_new")
+
+    def __init__(self, track_id, box, vote_window):
+        self.track_id = track_id
+        self.box = box
+        self.misses = 0
+        self.confidence = 0.0
+        self.last_verified = None
+        self.votes = deque(maxlen=vote_window)
+        self.entries = {}
+        self.is_new = True
+
+    @property
+    def identity(self):
+        # Identidade mais votada na janela recente (None = desconhecido); empate fica com a mais recente
+        if not self.votes:
+            return None
+        counts = Counter(self.votes)
+        best = max(counts.values())
+        for key in reversed(self.votes):
+            if counts[key] == best:
+                return self.entries.get(key)
+        return None
+
+
+class FaceTracker:
+    # Mantém trilhas de rostos entre frames para que DeepFace.represent + matching rodem
+    # só em trilhas novas, com confiança decaída ou vencidas para reverificação periódica.
+    # update() e record_identity() devem ser chamados sob 'lock' quando há vários workers.
+    def __init__(self, iou_threshold=0.3, max_centroid_distance=1.0, max_misses=5,
+                 confidence_decay=0.9, min_confidence=0.5, reverify_seconds=2.0,
+                 vote_window=5, clock=time.monotonic):
+        self.iou_threshold = iou_threshold
+        self.max_centroid_distance = max_centroid_distance
+        self.max_misses = max_misses
+        self.confidence_decay = confidence_decay
+        self.min_confidence = min_confidence
+        self.reverify_seconds = reverify_seconds
+        self.vote_window = vote_window
+        self.clock = clock
+        self.tracks = []
+        self.lock = threading.Lock()
+        self._next_id = 1
+
+    def reset(self):
+        self.tracks = []
+
+    def _associate(self, boxes):
+        # Associação gulosa: pares por IoU decrescente, depois centróide para movimentos rápidos
+        pairs = []
+        for ti, track in enumerate(self.tracks):
+            for di, box in enumerate(boxes):
+                iou = box_iou(track.box, box)
+                if iou >= self.iou_threshold:
+                    pairs.append((1.0 + iou, ti, di, False))
+                else:
+                    dist = _centroid_distance(track.box, box)
+                    if dist <= self.max_centroid_distance:
+                        pairs.append((1.0 - dist / (self.max_centroid_distance + 1e-6), ti, di, True))
+        pairs.sort(reverse=True)
+        used_tracks, assigned = set(), {}
+        for _score, ti, di, weak in pairs:
+            if ti in used_tracks or di in assigned:
+                continue
+            used_tracks.add(ti)
+            assigned[di] = (self.tracks[ti], weak)
+        return assigned
+
+    def update(self, boxes):
+        # Retorna a trilha de cada caixa, na ordem de 'boxes'
+        assigned = self._associate(boxes)
+        matched_tracks = set()
+        result = []
+        for di, box in enumerate(boxes):
+            if di in assigned:
+                track, weak = assigned[di]
+                track.box = box
+                track.misses = 0
+                track.is_new = False
+                track.confidence *= self.confidence_decay * (0.5 if weak else 1.0)
+            else:
+                track = FaceTrack(self._next_id, box, self.vote_window)
+                self._next_id += 1
+                self.tracks.append(track)
+            matched_tracks.add(track.track_id)
+            result.append(track)
+        for track in self.tracks:
+            if track.track_id not in matched_tracks:
+                track.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+        return result
+
+    def needs_recognition(self, track):
+        if track.is_new or track.last_verified is None or track.confidence < self.min_confidence:
+            return True
+        return self.clock() - track.last_verified >= self.reverify_seconds
+
+    def record_identity(self, track, entry, distance=None, threshold=None):
+        key = id(entry) if entry is not None else None
+        if entry is not None:
+            track.entries[key] = entry
+        track.votes.append(key)
+        track.last_verified = self.clock()
+        # Confiança inicial proporcional à margem até o limiar (1.0 sem distância conhecida)
+        if entry is not None and distance is not None and threshold:
+            track.confidence = max(self.min_confidence, min(1.0, 1.0 - distance / threshold + self.min_confidence))
+        else:
+            track.confidence = 1.0
@@ -0,0 +1,51 @@
+#Pré-aquecimento em segundo plano: carrega modelos e galeria logo após o login
+
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+
+class WarmupWorker(threading.Thread):
+    # Executa as etapas [(descrição, função)] em ordem numa thread daemon.
+    # A interface consulta progress()/is_done() periodicamente (nada de Tk fora da thread principal);
+    # quem precisa do resultado chama wait(). Uma etapa com erro não impede as seguintes.
+    def __init__(self, steps, name="warmup"):
+        super().__init__(daemon=True, name=name)
+        self.steps = list(steps)
+        self.errors = {}
+        self.durations = {}
+        self._completed = 0
+        self._current = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self):
+        try:
+            for label, fn in self.steps:
+                with self._lock:
+                    self._current = label
+                started = time.perf_counter()
+                try:
+                    fn()
+                except Exception as e:
+                    self.errors[label] = e
+                    print(f"[WARMUP_ERRO] {label}: {e}")
+                self.durations[label] = time.perf_counter() - started
+                with self._lock:
+                    self._completed += 1
+            print("[WARMUP_INFO] Concluído: " + ", ".join(f"{label} {seconds:.1f}s" for label, seconds in self.durations.items()))
+        finally:
+            with self._lock:
+                self._current = None
+            self._done.set()
+
+    def progress(self):
+        # (fração concluída 0..1, descrição da etapa atual ou None)
+        with self._lock:
+            return self._completed / max(1, len(self.steps)), self._current
+
+    def is_done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
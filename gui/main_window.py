@@ -92,6 +92,8 @@ class DeepSaveFrame(ttk.Frame):
         def capture_task():
             success, error_code = deepsave_logic.capture_and_save_face(full_path, self.haar_cascade_path)
             if success:
+                # Uma sessão DeepScan aberta passa a reconhecer a pessoa sem reiniciar
+                deepscan_logic.notify_gallery_change(person_id)
                 self.after(0, lambda: messagebox.showinfo("Sucesso", "Foto capturada e salva com sucesso!", parent=self))
                 self.after(0, self._reset_form)
             else:
@@ -126,6 +128,31 @@ class MainContentFrame(ttk.Frame):
         ttk.Button(buttons_frame, text="Deep Save", command=self.app_controller.show_deepsave_frame, style="Purple.TButton").pack(pady=10, fill=tk.X)
         ttk.Button(buttons_frame, text="Deep Scan", command=self.app_controller.start_deepscan, style="Purple.TButton").pack(pady=10, fill=tk.X)
 
+        # Progresso do pré-carregamento (modelos e galeria) iniciado no login
+        self.warmup_label = ttk.Label(buttons_frame, text="", style="TLabel", font=('Helvetica', 9))
+        self.warmup_label.pack(pady=(10, 0), fill=tk.X)
+        self.warmup_bar = ttk.Progressbar(buttons_frame, mode="determinate", maximum=100)
+        self.warmup_bar.pack(fill=tk.X)
+        self._poll_warmup()
+
+    def _poll_warmup(self):
+        status = deepscan_logic.warmup_status()
+        if status is None:
+            self.warmup_label.pack_forget()
+            self.warmup_bar.pack_forget()
+            return
+        fraction, step, done = status
+        self.warmup_bar["value"] = fraction * 100
+        if not done:
+            self.warmup_label.config(text=f"Preparando Deep Scan: {step or '...'}")
+            self.after(200, self._poll_warmup)
+        elif deepscan_logic.is_warm(self.app_controller.user_email):
+            self.warmup_label.config(text="Deep Scan pronto.")
+            self.warmup_bar.pack_forget()
+        else:
+            self.warmup_label.config(text="Pré-carregamento incompleto; o Deep Scan carregará ao iniciar.")
+            self.warmup_bar.pack_forget()
+
 # --- Janela Principal ---
 class DeepMainWindow(tk.Tk):
     def __init__(self, login_app_instance, user_data, initial_language, *args, **kwargs):
@@ -181,9 +208,24 @@ class DeepMainWindow(tk.Tk):
         if not self.user_email:
             messagebox.showerror("Erro", "Email do usuário não encontrado.", parent=self)
             return
-        messagebox.showinfo("Deep Scan", "Iniciando reconhecimento.\nUma nova janela será aberta.", parent=self)
+        # Com o pré-carregamento concluído a câmera abre na hora; senão avisa que vai esperar
+        if not deepscan_logic.is_warm(self.user_email):
+            messagebox.showinfo("Deep Scan", "Iniciando reconhecimento.\nUma nova janela será aberta assim que os modelos terminarem de carregar.", parent=self)
         utils.run_function_in_thread(deepscan_logic.execute_recognition_session, "deepscan_thread", "Deep Scan", args_tuple=(self.user_email,))
 
+    def recalibrate_deepscan(self):
+        # Refaz o autoajuste do detector desta máquina. Usa a mesma thread do Deep Scan: nunca
+        # calibra com uma sessão aberta disputando a CPU
+        def calibration_task():
+            profile = deepscan_logic.recalibrate_machine()
+            if profile:
+                text = f"Detector '{profile['engine']}' a {profile['max_side']}px: {profile['detect_ms']:.1f} ms por frame (alvo {profile['target_fps']} FPS)."
+            else:
+                text = "Nenhum detector disponível para calibrar; mantida a configuração padrão."
+            self.after(0, lambda: messagebox.showinfo("Calibrar desempenho", text, parent=self))
+        messagebox.showinfo("Calibrar desempenho", "A calibração roda em segundo plano e leva alguns segundos.", parent=self)
+        utils.run_function_in_thread(calibration_task, "deepscan_thread", "Deep Scan")
+
     def apply_language_change(self):
         lang_name = self.selected_language.get()
         if lang_name == "Português":
@@ -21,6 +21,9 @@ class SettingsFrame(ttk.Frame):
         self.language_button = ttk.Button(self, text="Idioma", command=self.app_controller.show_language_frame, style="Purple.TButton")
         self.language_button.pack(fill=tk.X, pady=10, padx=50)
 
+        self.autotune_button = ttk.Button(self, text="Calibrar desempenho", command=self.app_controller.recalibrate_deepscan, style="Purple.TButton")
+        self.autotune_button.pack(fill=tk.X, pady=10, padx=50)
+
         self.back_button = ttk.Button(self, text="Voltar para Deep", command=self.app_controller.show_main_content_frame, style="Purple.TButton")
         self.back_button.pack(fill=tk.X, pady=(20, 10), padx=50)
 
@@ -28,6 +31,7 @@ class SettingsFrame(ttk.Frame):
         self.title_label.config(text=texts.get("settings_title", "Configurações"))
         self.profile_button.config(text=texts.get("profile_button", "Perfil"))
         self.language_button.config(text=texts.get("language_button", "Idioma"))
+        self.autotune_button.config(text=texts.get("autotune_button", "Calibrar desempenho"))
         self.back_button.config(text=texts.get("back_to_deep_button", "Voltar para Deep"))
 
 
@@ -1,15 +1,23 @@
 #Ponto de entrada principal da aplicação
 
 # -*- coding: utf-8 -*-
+import multiprocessing
 import tkinter as tk
 from gui.login_window import LoginApp
-from gui.main_window import DeepMainWindow
 import utils
 
 # Função de callback que a janela de login chama quando o login é bem-sucedido
 def launch_deep_main_window(login_app_instance, user_data, selected_language):
     # Esconde a janela de login em vez de destruí-la, para poder reabri-la no logout
     login_app_instance.withdraw()
+
+    # Importados só depois do login: a janela principal puxa OpenCV/NumPy (e, sob demanda, o DeepFace),
+    # que a tela de login não usa. Fica fora do topo do arquivo para ela abrir na hora.
+    from gui.main_window import DeepMainWindow
+    from core import deepscan_logic
+
+    # Começa a carregar modelos e galeria em segundo plano enquanto a janela principal abre
+    deepscan_logic.start_warmup(user_data.get("email"))
     
     # Cria e executa a janela principal da aplicação
     deep_app = DeepMainWindow(login_app_instance, user_data, selected_language)
@@ -17,6 +25,9 @@ def launch_deep_main_window(login_app_instance, user_data, selected_language):
 
 # Ponto de entrada do script
 if __name__ == "__main__":
+    # Necessário para os workers de inferência em processos no executável congelado
+    multiprocessing.freeze_support()
+
     # 1. Garante que as pastas e arquivos essenciais existam
     utils.ensure_core_directories_and_files_exist()
     
@@ -3,31 +3,45 @@
 # -*- coding: utf-8 -*-
 import json
 from tkinter import messagebox
-from google import genai
+from core.lazy_imports import LazyModule
+
+# O SDK do Gemini é pesado: só é importado na primeira tradução pedida
+genai = LazyModule("google.genai")
 
 
 class LanguageService:
     def __init__(self, api_key):
         self.is_configured = False
+        self.model = None
         if not api_key or api_key == "SUA_CHAVE_DE_API_AQUI":
             print("[API WARNING] Chave da API do Gemini não fornecida.")
             return
-        try:
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-pro')
-            self.is_configured = True
-            print("API do Gemini configurada com sucesso.")
-        except Exception as e:
-            print(f"Erro ao configurar a API do Gemini: {e}")
-            messagebox.showwarning(
-                "API não configurada",
-                f"A chave de API do Gemini é inválida ou houve um erro.\n{e}\nA tradução está desabilitada."
-            )
+        # A configuração (e a importação do SDK) fica para a primeira tradução
+        self.api_key = api_key
+        self.is_configured = True
+
+    def _get_model(self):
+        if self.model is None:
+            try:
+                genai.configure(api_key=self.api_key)
+                self.model = genai.GenerativeModel('gemini-pro')
+                print("API do Gemini configurada com sucesso.")
+            except Exception as e:
+                self.is_configured = False
+                print(f"Erro ao configurar a API do Gemini: {e}")
+                messagebox.showwarning(
+                    "API não configurada",
+                    f"A chave de API do Gemini é inválida ou houve um erro.\n{e}\nA tradução está desabilitada."
+                )
+        return self.model
 
     def translate_ui_texts(self, texts_dict, target_language_code):
         if not self.is_configured:
             messagebox.showerror("Erro de API", "A API do Gemini não está configurada para tradução.")
             return None
+        model = self._get_model()
+        if model is None:
+            return None
 
         prompt = f"""
         Traduza os seguintes textos de interface de usuário para o idioma com o código '{target_language_code}'.
@@ -40,7 +54,7 @@ class LanguageService:
         """
         try:
             print(f"Enviando para o Gemini para tradução para '{target_language_code}'...")
-            response = self.model.generate_content(prompt)
+            response = model.generate_content(prompt)
             cleaned_response = response.text.strip().replace('```json', '').replace('```', '')
             translated_texts = json.loads(cleaned_response)
             print("Tradução recebida com sucesso.")
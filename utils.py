@@ -6,7 +6,11 @@ import sys
 import re
 import hashlib
 import threading
-from tkinter import messagebox
+try:
+    from tkinter import messagebox
+except ImportError:
+    # Modo headless (servidor sem Tk): só as funções de interface usam o messagebox
+    messagebox = None
 
 import config
 
@@ -23,10 +27,15 @@ DB_FILE_PATH = os.path.join(BASE_PATH, config.DB_FILENAME)
 def get_resource_path(relative_path):
     return os.path.join(BASE_PATH, relative_path)
 
+def get_metrics_export_path(configured_path):
+    # None desativa a exportação; caminhos relativos ficam na pasta do app
+    return get_resource_path(configured_path) if configured_path else None
+
 def ensure_core_directories_and_files_exist():
     print("[SETUP] Verificando diretórios e arquivos...")
     os.makedirs(os.path.join(BASE_PATH, config.USER_DATA_ROOT_FOLDER), exist_ok=True)
     os.makedirs(get_resource_path(config.DSC_SUBFOLDER_FONTS), exist_ok=True)
+    os.makedirs(get_resource_path(config.DET_SUBFOLDER_MODELS), exist_ok=True)
     if not os.path.exists(DB_FILE_PATH):
         try:
             with open(DB_FILE_PATH, 'w', encoding='utf-8') as f:
@@ -40,9 +49,12 @@ def sanitize_username_for_path(username_email):
         return "default_user"
     return re.sub(r'[^\w.\-]', '_', username_email)
 
+def get_user_data_dir(user_email):
+    return os.path.join(BASE_PATH, config.USER_DATA_ROOT_FOLDER, sanitize_username_for_path(user_email))
+
 def get_user_specific_paths(user_email):
     sanitized_email = sanitize_username_for_path(user_email)
-    user_data_dir = os.path.join(BASE_PATH, config.USER_DATA_ROOT_FOLDER, sanitized_email)
+    user_data_dir = get_user_data_dir(user_email)
     user_faces_path = os.path.join(user_data_dir, config.DS_SUBFOLDER_FACES)
     user_info_file_path = os.path.join(user_data_dir, config.DS_INFO_FILENAME)
     